@@ -0,0 +1,58 @@
+"""
+Память на одну операцию: список словарей (read_xlsx), список Transaction (__slots__)
+и колонки TransactionRecords; плюс время calcul_total_expen, proc_card_data и top_transactions_5.
+
+python -m benchmarks.bench_records 1000000
+"""
+
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Tuple
+
+from benchmarks.synthetic import make_operations
+from src.records import TransactionRecords
+from src.store import normalize_operations, to_records
+from src.views import calcul_total_expen, proc_card_data, top_transactions_5
+
+
+def allocated(build: Callable[[], Any]) -> Tuple[Any, int]:
+    """
+    Результат build и сколько памяти он занимает после построения (tracemalloc), байт.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def timed(func: Callable, *args: Any) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main(rows: int) -> None:
+    frame = normalize_operations(make_operations(rows))
+    records, dict_bytes = allocated(lambda: to_records(frame))
+    compact = TransactionRecords.from_frame(frame)
+    slots, slots_bytes = allocated(lambda: list(compact))
+    del slots
+    compact_bytes = compact.nbytes()
+    print(f"{rows} операций, байт на операцию:")
+    print(f"  список словарей     {dict_bytes / rows:8.1f}")
+    print(f"  список Transaction  {slots_bytes / rows:8.1f}")
+    ratio = dict_bytes / compact_bytes
+    print(f"  TransactionRecords  {compact_bytes / rows:8.1f}  (в {ratio:.0f} раз меньше словарей)")
+    for name, func in [
+        ("calcul_total_expen", calcul_total_expen),
+        ("proc_card_data", proc_card_data),
+        ("top_transactions_5", top_transactions_5),
+    ]:
+        print(f"{name}: список {timed(func, records):.3f} с, TransactionRecords {timed(func, compact):.3f} с")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,50 @@
+"""
+Сравнение старых (цикл по списку словарей) и векторных расчетов views на синтетической выписке.
+
+python -m benchmarks.bench_views 1000000
+"""
+
+import sys
+import time
+from typing import Any, Callable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.views import calcul_total_expen, proc_card_data
+
+
+def make_frame(rows: int, cards: int = 20, seed: int = 0) -> pd.DataFrame:
+    """
+    Синтетическая выписка с колонками, нужными для расчетов по картам.
+    """
+    rng = np.random.default_rng(seed)
+    card_numbers = np.array([f"*{1000 + i}" for i in range(cards)] + [np.nan], dtype=object)
+    amounts = np.round(rng.normal(-500, 700, rows), 2)
+    return pd.DataFrame(
+        {
+            "card_number": card_numbers[rng.integers(0, cards + 1, rows)],
+            "transaction_amount": amounts,
+            "bonuses_including_cashback": np.where(amounts < 0, np.floor(-amounts / 100), 0.0),
+        }
+    )
+
+
+def timed(func: Callable, *args: Any) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(rows: int) -> None:
+    frame = make_frame(rows)
+    records = frame.to_dict("records")
+    for name, func in [("calcul_total_expen", calcul_total_expen), ("proc_card_data", proc_card_data)]:
+        old, old_time = timed(func, records)
+        new, new_time = timed(func, frame)
+        assert old == new, f"{name}: результаты не совпали"
+        print(f"{name}: список {old_time:.3f} с, таблица {new_time:.3f} с, ускорение x{old_time / new_time:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
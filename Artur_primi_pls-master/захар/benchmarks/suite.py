@@ -0,0 +1,196 @@
+"""
+Набор бенчмарков на синтетических выписках от 10 тыс. до 10 млн операций: время и пик памяти
+read_xlsx, get_keyword, get_expen_by_categ, filter_by_category_date, calcul_total_expen,
+proc_card_data, top_transactions_5 и всего main_views (котировки подменены, сеть не нужна).
+
+python -m benchmarks.suite --rows 10000 100000 1000000 --output bench.json
+python -m benchmarks.suite --baseline bench.json --tolerance 0.25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from unittest import mock
+
+import pandas as pd
+
+from benchmarks.synthetic import make_operations, write_statement
+from src import views
+from src.cache import drop_cache
+from src.reports import filter_by_category_date
+from src.services import get_expen_by_categ, get_keyword
+from src.store import clear_stores, get_store
+from src.utils import read_xlsx
+from src.views import calcul_total_expen, main_views, proc_card_data, top_transactions_5
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+DEFAULT_TOLERANCE = 0.25
+# быстрее этого время не сравнивается с базой - шум таймера больше самой работы
+MIN_SECONDS = 0.05
+STATEMENT_FILE = "operations_bench.csv"
+SEARCH_WORD = "Магнит"
+CATEGORY = "Супермаркеты"
+REPORT_DATE = "2021-12-31"
+START_DATE = "01.10.2021"
+NO_MARKET = {"currency_rates": [], "stock_prices": []}
+
+
+def measure(func: Callable[[], Any], setup: Callable[[], None], repeat: int, memory: bool) -> Dict[str, Any]:
+    """
+    Лучшее время func из repeat запусков (перед каждым вызывается setup) и пик памяти
+    отдельного запуска под tracemalloc (он сам замедляет код, поэтому время меряется без него).
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if memory:
+        setup()
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def cases(file_path: str) -> List[tuple]:
+    """
+    (имя, функция, подготовка) для каждого замера на выписке file_path.
+    """
+    frame = get_store(file_path).frame
+    records = read_xlsx(file_path)
+    state_file = views.STATE_FILE
+
+    def cold() -> None:
+        clear_stores()
+        drop_cache(file_path)
+
+    def fresh_state() -> None:
+        # дашборд считается целиком, а не дополняется из сохраненных итогов
+        if os.path.exists(state_file):
+            os.remove(state_file)
+
+    def dashboard() -> None:
+        with mock.patch("builtins.input", return_value=""), mock.patch.object(
+            views, "get_market_data", return_value=NO_MARKET
+        ), contextlib.redirect_stdout(io.StringIO()):
+            main_views(file_path)
+
+    def nothing() -> None:
+        pass
+
+    return [
+        ("read_xlsx (разбор файла)", lambda: read_xlsx(file_path), cold),
+        ("read_xlsx (кеш на диске)", lambda: read_xlsx(file_path), clear_stores),
+        ("read_xlsx (в памяти)", lambda: read_xlsx(file_path), nothing),
+        ("get_keyword", lambda: get_keyword(SEARCH_WORD, file_path), nothing),
+        ("get_expen_by_categ", lambda: get_expen_by_categ(frame, CATEGORY, REPORT_DATE), nothing),
+        ("filter_by_category_date", lambda: filter_by_category_date(frame, CATEGORY, START_DATE), nothing),
+        ("calcul_total_expen (таблица)", lambda: calcul_total_expen(frame), nothing),
+        ("calcul_total_expen (список)", lambda: calcul_total_expen(records), nothing),
+        ("proc_card_data (таблица)", lambda: proc_card_data(frame), nothing),
+        ("proc_card_data (список)", lambda: proc_card_data(records), nothing),
+        ("top_transactions_5 (таблица)", lambda: top_transactions_5(frame), nothing),
+        ("top_transactions_5 (список)", lambda: top_transactions_5(records), nothing),
+        ("main_views", dashboard, fresh_state),
+    ]
+
+
+def run_suite(rows_list: Sequence[int], repeat: int = 3, memory: bool = True) -> Dict[str, Any]:
+    """
+    Прогоняет все замеры для каждого размера выписки во временном каталоге
+    (get_keyword и main_views пишут свои JSON в текущий каталог).
+    """
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            for rows in rows_list:
+                file_path = os.path.join(tmp, f"{rows}_{STATEMENT_FILE}")
+                write_statement(file_path, make_operations(rows))
+                for name, func, setup in cases(file_path):
+                    result = measure(func, setup, repeat, memory)
+                    results.append({"function": name, "rows": rows, **result})
+                    print(f"{rows:>10} {name:<30} {result['seconds']:9.4f} с", file=sys.stderr)
+                clear_stores()
+        finally:
+            os.chdir(cwd)
+    meta = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "repeat": repeat,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """
+    Регрессии относительно базового прогона: время или пик памяти выросли больше, чем на tolerance.
+    Сравниваются только замеры с одинаковыми функцией и размером выписки.
+    """
+    base = {(item["function"], item["rows"]): item for item in baseline}
+    regressions = []
+    for item in results:
+        old = base.get((item["function"], item["rows"]))
+        if old is None:
+            continue
+        seconds_limit = max(old["seconds"], MIN_SECONDS) * (1 + tolerance)
+        if item["seconds"] > seconds_limit:
+            regressions.append(
+                f"{item['function']} ({item['rows']} строк): время {old['seconds']:.4f} -> {item['seconds']:.4f} с"
+            )
+        if item.get("peak_bytes") and old.get("peak_bytes"):
+            if item["peak_bytes"] > old["peak_bytes"] * (1 + tolerance):
+                regressions.append(
+                    f"{item['function']} ({item['rows']} строк): память "
+                    f"{old['peak_bytes']} -> {item['peak_bytes']} байт"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки на синтетических выписках")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="размеры выписок")
+    parser.add_argument("--repeat", type=int, default=3, help="запусков на замер, берется лучший")
+    parser.add_argument("--no-memory", action="store_true", help="не измерять пик памяти")
+    parser.add_argument("--output", help="куда записать результаты (JSON)")
+    parser.add_argument("--baseline", help="базовый прогон (JSON) для поиска регрессий")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="допустимый рост, доля")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.rows, args.repeat, not args.no_memory)
+    text = json.dumps(report, indent=4, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(report["results"], baseline, args.tolerance)
+        for line in regressions:
+            print(f"РЕГРЕССИЯ: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
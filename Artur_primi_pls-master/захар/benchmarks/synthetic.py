@@ -0,0 +1,95 @@
+"""
+Синтетическая выписка со всеми колонками operations_mi.xls - для бенчмарков.
+
+python -m benchmarks.synthetic 1000000 operations_1m.csv
+"""
+
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# категория -> (доля операций, MCC, описания)
+CATEGORIES: Dict[str, tuple] = {
+    "Супермаркеты": (0.30, 5411, ["Магнит", "Колхоз", "Пятерочка", "Перекресток", "ВкусВилл", "Лента"]),
+    "Фастфуд": (0.12, 5814, ["Вкусно и точка", "Бургер Кинг", "Теремок", "Додо Пицца"]),
+    "Транспорт": (0.12, 4111, ["Метро Санкт-Петербург", "Яндекс Такси", "РЖД", "Московский транспорт"]),
+    "Каршеринг": (0.04, 7512, ["Ситидрайв", "Делимобиль", "Яндекс Драйв"]),
+    "Аптеки": (0.05, 5912, ["Аптека Вита", "Ригла", "Планета Здоровья"]),
+    "Переводы": (0.10, 6538, ["Перевод с карты", "Иван С.", "Мария К.", "Перевод по СБП"]),
+    "Связь": (0.04, 4814, ["МТС", "Билайн", "МегаФон", "Ростелеком"]),
+    "Развлечения": (0.05, 7832, ["Кинотеатр Формула Кино", "Яндекс Музыка", "Кинопоиск"]),
+    "Рестораны": (0.06, 5812, ["Кофемания", "Шоколадница", "Теремок на Невском"]),
+    "Одежда и обувь": (0.04, 5651, ["Спортмастер", "Zolla", "Твое"]),
+    "Пополнения": (0.06, 6012, ["Пополнение через Сбербанк", "Внесение наличных", "Зарплата"]),
+    "Услуги банка": (0.02, 6012, ["Плата за оповещения", "Обслуживание карты"]),
+}
+DESCRIPTIONS: List[str] = [name for _, _, names in CATEGORIES.values() for name in names]
+INCOME_CATEGORIES = ["Пополнения"]
+
+
+def make_operations(
+    rows: int,
+    cards: int = 20,
+    days: int = 365,
+    seed: int = 0,
+    weights: Optional[Dict[str, float]] = None,
+    start: str = "2021-01-01",
+) -> pd.DataFrame:
+    """
+    Выписка на rows операций за days дней начиная со start в формате выгрузки банка
+    (даты строками, новые операции сверху). weights - доли категорий вместо стандартных.
+    """
+    rng = np.random.default_rng(seed)
+    names = list(CATEGORIES)
+    if weights is None:
+        shares = np.array([CATEGORIES[name][0] for name in names])
+    else:
+        shares = np.array([weights.get(name, 0.0) for name in names])
+    categories = rng.choice(len(names), size=rows, p=shares / shares.sum())
+    # описание - случайное из списка своей категории
+    counts = np.array([len(CATEGORIES[name][2]) for name in names])
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    descriptions = offsets[categories] + (rng.random(rows) * counts[categories]).astype(np.int64)
+
+    income = np.isin(categories, [names.index(name) for name in INCOME_CATEGORIES])
+    amounts = np.round(np.where(income, rng.lognormal(9, 0.8, rows), -rng.lognormal(6, 1.1, rows)), 2)
+    card_numbers = np.array([f"*{1000 + i}" for i in range(cards)] + [np.nan], dtype=object)
+    seconds = np.sort(rng.integers(0, days * 86400, rows))[::-1]
+    moments = pd.Timestamp(start) + pd.to_timedelta(seconds, unit="s")
+    failed = rng.random(rows) < 0.02
+    return pd.DataFrame(
+        {
+            "date_operation": moments.strftime("%d.%m.%Y %H:%M:%S"),
+            "data_payment": moments.strftime("%d.%m.%Y"),
+            "card_number": card_numbers[rng.integers(0, cards + 1, rows)],
+            "status": np.where(failed, "FAILED", "OK"),
+            "transaction_amount": amounts,
+            "currency_operation": "RUB",
+            "payment_amount": amounts,
+            "payment_currency": "RUB",
+            "cashback": np.where(rng.random(rows) < 0.05, np.floor(np.abs(amounts) / 100), np.nan),
+            "category": np.array(names, dtype=object)[categories],
+            "MCC": np.array([CATEGORIES[name][1] for name in names], dtype=float)[categories],
+            "description": np.array(DESCRIPTIONS, dtype=object)[descriptions],
+            "bonuses_including_cashback": np.where((amounts < 0) & ~failed, np.floor(-amounts / 100), 0.0),
+            "rounding_investment_bank": 0.0,
+            "amount_rounding_operation": np.abs(amounts),
+        }
+    )
+
+
+def write_statement(file_path: str, frame: pd.DataFrame) -> None:
+    """
+    Записывает выписку в csv или xlsx (по расширению); xlsx для миллионов строк пишется долго.
+    """
+    if file_path.lower().endswith(".csv"):
+        frame.to_csv(file_path, index=False)
+    else:
+        frame.to_excel(file_path, index=False)
+
+
+if __name__ == "__main__":
+    target = sys.argv[2] if len(sys.argv) > 2 else "operations_synthetic.csv"
+    write_statement(target, make_operations(int(sys.argv[1])))
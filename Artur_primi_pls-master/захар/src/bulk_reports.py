@@ -0,0 +1,182 @@
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.aggregates import card_keys
+from src.json_writer import write_records
+from src.metrics import timed
+from src.store import DATA_PATH, get_store
+
+logger = logging.getLogger(__name__)
+
+BULK_PATH = "bulk_reports.jsonl"
+WINDOW_MONTHS = 3
+SHARDS = ["card", "year"]
+# колонки выписки, которые нужны отчетам (в процессы пула передаются только они)
+INPUT_COLUMNS = [
+    "data_payment",
+    "card_number",
+    "category",
+    "payment_amount",
+    "transaction_amount",
+    "bonuses_including_cashback",
+]
+COLUMNS = ["card", "category", "window_start", "window_end", "operations", "payment_amount", "spent", "cashback"]
+
+
+def month_numbers(frame: pd.DataFrame) -> np.ndarray:
+    """
+    Номер месяца платежа (год * 12 + месяц - 1) для каждой строки, -1 - без даты платежа.
+    """
+    dates = pd.to_datetime(frame["data_payment"], format="%d.%m.%Y", errors="coerce")
+    months = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype="float64", na_value=np.nan)
+    return np.where(np.isnan(months), -1, months).astype(np.int64)
+
+
+def _month_start(months: pd.Series) -> pd.Series:
+    return pd.to_datetime({"year": months // 12, "month": months % 12 + 1, "day": 1})
+
+
+def monthly_totals(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Суммы за каждый месяц по паре (карта, категория) - один groupby по всей таблице.
+    Операции без даты платежа или без категории в отчеты не входят.
+    """
+    amounts = np.zeros(len(frame))
+    if "transaction_amount" in frame:
+        amounts = np.nan_to_num(frame["transaction_amount"].to_numpy(dtype="float64"))
+    cashback = frame["bonuses_including_cashback"] if "bonuses_including_cashback" in frame else 0.0
+    table = pd.DataFrame(
+        {
+            "card": card_keys(frame["card_number"]) if "card_number" in frame else np.nan,
+            "category": frame["category"].astype(object),
+            "month": month_numbers(frame),
+            "operations": 1,
+            "payment_amount": frame["payment_amount"].to_numpy(dtype="float64"),
+            "spent": np.where(amounts < 0, -amounts, 0.0),
+            "cashback": cashback,
+        },
+        index=frame.index,
+    )
+    table = table[(table["month"] >= 0) & table["category"].notna()]
+    return table.groupby(["card", "category", "month"], dropna=False, sort=False).sum(min_count=0).reset_index()
+
+
+def rolling_windows(monthly: pd.DataFrame, first: Optional[int] = None, last: Optional[int] = None) -> pd.DataFrame:
+    """
+    Суммы за скользящие окна из WINDOW_MONTHS календарных месяцев: месяц m попадает в окна,
+    которые оканчиваются месяцами m, m+1, m+2. Окна без операций не выводятся; first/last -
+    какими месяцами могут оканчиваться окна (по умолчанию - от первого до последнего месяца данных).
+    """
+    if monthly.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    first = int(monthly["month"].min()) if first is None else first
+    last = int(monthly["month"].max()) if last is None else last
+    shifted = pd.concat([monthly.assign(month=monthly["month"] + shift) for shift in range(WINDOW_MONTHS)])
+    shifted = shifted[(shifted["month"] >= first) & (shifted["month"] <= last)]
+    windows = shifted.groupby(["card", "category", "month"], dropna=False, sort=False).sum().reset_index()
+    windows = windows[windows["operations"] > 0]
+    end = _month_start(windows["month"]) + pd.offsets.MonthEnd(0)
+    start = _month_start(windows["month"] - (WINDOW_MONTHS - 1))
+    windows = windows.assign(window_start=start.dt.strftime("%Y-%m-%d"), window_end=end.dt.strftime("%Y-%m-%d"))
+    windows["operations"] = windows["operations"].astype(np.int64)
+    windows = windows.sort_values(["window_end", "category", "card"], ignore_index=True, na_position="first")
+    return windows[COLUMNS]
+
+
+def report_shard(frame: pd.DataFrame, first: Optional[int] = None, last: Optional[int] = None) -> pd.DataFrame:
+    """
+    Отчеты по части выписки (одной задаче пула процессов).
+    """
+    return rolling_windows(monthly_totals(frame), first, last)
+
+
+def _card_shards(frame: pd.DataFrame, count: int) -> List[pd.DataFrame]:
+    # все операции одной карты попадают в одну часть, иначе ее окна разойдутся по частям
+    codes, _ = pd.factorize(card_keys(frame["card_number"]), use_na_sentinel=False)
+    return [frame[codes % count == shard] for shard in range(count)]
+
+
+def _year_shards(frame: pd.DataFrame, months: np.ndarray, first: int, last: int) -> List[Tuple[pd.DataFrame, int, int]]:
+    # окна января и февраля захватывают конец прошлого года, поэтому части перекрываются на 2 месяца
+    return [
+        (
+            frame[(months >= year * 12 - (WINDOW_MONTHS - 1)) & (months < year * 12 + 12)],
+            max(year * 12, first),
+            min(year * 12 + 11, last),
+        )
+        for year in range(first // 12, last // 12 + 1)
+    ]
+
+
+@timed("aggregate", "bulk_reports", rows=lambda frame, *args, **kwargs: len(frame))
+def bulk_reports(frame: pd.DataFrame, shard: Optional[str] = None, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Полная матрица отчетов: все категории x все скользящие окна по 3 месяца x все карты
+    за один проход по таблице. shard="card" или "year" - считать частями в пуле процессов
+    (workers - число процессов, 1 - без пула); результат тот же, что без разбиения.
+    """
+    if shard is not None and shard not in SHARDS:
+        raise ValueError(f"Неизвестное разбиение: {shard}, можно {', '.join(SHARDS)}")
+    frame = frame[[name for name in INPUT_COLUMNS if name in frame]]
+    months = month_numbers(frame)
+    dated = months[months >= 0]
+    if shard is None or not len(dated):
+        return report_shard(frame)
+    # у каждой части свой диапазон месяцев, а окна считаются по общему
+    first, last = int(dated.min()), int(dated.max())
+    if shard == "card":
+        parts = _card_shards(frame, workers or os.cpu_count() or 1)
+        tasks = [(part, first, last) for part in parts if len(part)]
+    else:
+        tasks = _year_shards(frame, months, first, last)
+    logger.info(f"Отчеты частями ({shard}): {len(tasks)}")
+    if len(tasks) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(report_shard, *zip(*tasks)))
+    else:
+        parts = [report_shard(*task) for task in tasks]
+    result = pd.concat(parts, ignore_index=True)
+    return result.sort_values(["window_end", "category", "card"], ignore_index=True, na_position="first")
+
+
+def write_bulk_reports(file_path: str, reports: pd.DataFrame) -> int:
+    """
+    Один сводный файл отчетов: JSON Lines (.jsonl, .jsonl.gz) или Parquet (.parquet, нужен pyarrow).
+    """
+    if file_path.endswith(".parquet"):
+        try:
+            reports.to_parquet(file_path, index=False)
+        except ImportError as e:
+            logger.error(f"Для Parquet нужен pyarrow или fastparquet: {e}")
+            raise
+        return len(reports)
+    return write_records(file_path, reports, lines=True)
+
+
+def main_bulk_reports(argv: Optional[List[str]] = None) -> None:
+    """
+    Все отчеты месячного закрытия одним запуском вместо reports.json на каждый запрос.
+    """
+    parser = argparse.ArgumentParser(description="Отчеты по всем категориям, картам и окнам по 3 месяца")
+    parser.add_argument("file_path", nargs="?", default=DATA_PATH)
+    parser.add_argument("--output", default=BULK_PATH, help=".jsonl (.jsonl.gz) или .parquet")
+    parser.add_argument("--shard", choices=SHARDS, help="считать частями в пуле процессов")
+    parser.add_argument("--workers", type=int, help="число процессов")
+    args = parser.parse_args(argv)
+    reports = bulk_reports(get_store(args.file_path).frame, args.shard, args.workers)
+    count = write_bulk_reports(args.output, reports)
+    logger.info(f"Отчетов записано в {args.output}: {count}")
+    print(f"Отчетов записано в {args.output}: {count}")
+
+
+if __name__ == "__main__":
+    from src.utils import init_app
+
+    init_app()
+    main_bulk_reports()
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".cache"
+# строки, дописанные в хранилище выписки (TransactionStore.append); кеш выписки пересобирается, а они остаются
+APPENDED_SUFFIX = ".appended"
+META_FILE = "meta.json"
+CACHE_VERSION = 1
+
+
+def cache_dir(file_path: str) -> str:
+    """
+    Папка-спутник с колонками выписки: operations_mi.xls -> operations_mi.xls.cache
+    """
+    return os.path.abspath(file_path) + CACHE_SUFFIX
+
+
+def file_digest(file_path: str) -> str:
+    """
+    sha256 содержимого файла, читается кусками по 1 МБ.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_key(file_path: str) -> Dict[str, Any]:
+    stat = os.stat(file_path)
+    return {"source": os.path.abspath(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_meta(directory: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+            meta: Dict[str, Any] = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    return meta
+
+
+def _write_meta(directory: str, meta: Dict[str, Any]) -> None:
+    tmp_path = os.path.join(directory, META_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+
+def is_fresh(file_path: str, meta: Dict[str, Any]) -> bool:
+    """
+    Проверяет, что кеш собран из этого же файла: путь и размер, затем mtime,
+    а если mtime поменялся - хеш содержимого.
+    """
+    key = _source_key(file_path)
+    if meta["source"] != key["source"] or meta["size"] != key["size"]:
+        return False
+    if meta["mtime_ns"] == key["mtime_ns"]:
+        return True
+    if file_digest(file_path) != meta["sha256"]:
+        return False
+    # файл только "потрогали" - запоминаем новый mtime, чтобы не хешировать каждый раз
+    meta["mtime_ns"] = key["mtime_ns"]
+    _write_meta(cache_dir(file_path), meta)
+    return True
+
+
+def read_cache(file_path: str) -> Optional[pd.DataFrame]:
+    """
+    Загружает таблицу из кеша, если он есть и соответствует файлу, иначе None.
+    Числовые колонки и даты отображаются в память (mmap), а не читаются целиком.
+    """
+    directory = cache_dir(file_path)
+    meta = _read_meta(directory)
+    if meta is None or not is_fresh(file_path, meta):
+        return None
+    try:
+        frame = read_columns(directory, meta["columns"])
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Кеш {directory} поврежден: {e}")
+        return None
+    logger.info(f"Операции загружены из кеша {directory}")
+    return frame
+
+
+def read_columns(directory: str, described: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Таблица из колонок, записанных write_columns; числа и даты отображаются в память (mmap).
+    """
+    columns = {}
+    for column in described:
+        values = np.load(os.path.join(directory, column["file"]), mmap_mode="r", allow_pickle=False)
+        if column["kind"] == "category":
+            columns[column["name"]] = pd.Categorical.from_codes(values, categories=column["categories"])
+        elif column["kind"] == "object":
+            uniques = np.array(column["categories"] + [np.nan], dtype=object)
+            columns[column["name"]] = uniques[values]
+        else:
+            columns[column["name"]] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def write_cache(file_path: str, frame: pd.DataFrame) -> None:
+    """
+    Сохраняет типизированную таблицу рядом с файлом: по .npy на колонку и meta.json.
+    """
+    directory = cache_dir(file_path)
+    os.makedirs(directory, exist_ok=True)
+    meta_path = os.path.join(directory, META_FILE)
+    if os.path.exists(meta_path):
+        # без meta кеш считается недействительным, пока колонки переписываются
+        os.remove(meta_path)
+    meta: Dict[str, Any] = _source_key(file_path)
+    meta["sha256"] = file_digest(file_path)
+    meta["version"] = CACHE_VERSION
+    meta["rows"] = len(frame)
+    meta["columns"] = write_columns(directory, frame)
+    _write_meta(directory, meta)
+    logger.info(f"Кеш операций записан в {directory}")
+
+
+def write_columns(directory: str, frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Пишет таблицу по .npy на колонку (категории и строки - кодами) и возвращает описание колонок.
+    """
+    described: List[Dict[str, Any]] = []
+    for position, name in enumerate(frame.columns):
+        column = frame[name]
+        entry: Dict[str, Any] = {"name": name, "file": f"{position}.npy"}
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            entry["kind"] = "category"
+            entry["categories"] = column.cat.categories.tolist()
+            values = column.cat.codes.to_numpy()
+        elif column.dtype == object:
+            codes, uniques = pd.factorize(column)
+            entry["kind"] = "object"
+            entry["categories"] = uniques.tolist()
+            values = codes
+        else:
+            entry["kind"] = "array"
+            values = column.to_numpy()
+        np.save(os.path.join(directory, entry["file"]), values, allow_pickle=False)
+        described.append(entry)
+    return described
+
+
+def appended_dir(file_path: str) -> str:
+    """
+    Папка-спутник с дописанными строками: operations_mi.xls -> operations_mi.xls.appended
+    """
+    return os.path.abspath(file_path) + APPENDED_SUFFIX
+
+
+def read_appended(file_path: str) -> Optional[pd.DataFrame]:
+    """
+    Строки, дописанные к выписке в прошлых запусках, или None, если их нет.
+    """
+    directory = appended_dir(file_path)
+    meta = _read_meta(directory)
+    if meta is None:
+        return None
+    try:
+        return read_columns(directory, meta["columns"])
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Дописанные строки {directory} не прочитаны: {e}")
+        return None
+
+
+def write_appended(file_path: str, frame: pd.DataFrame) -> None:
+    """
+    Сохраняет все дописанные к выписке строки: колонки пишутся во временную папку,
+    которая затем заменяет прежнюю.
+    """
+    directory = appended_dir(file_path)
+    tmp_directory = directory + ".tmp"
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+    meta: Dict[str, Any] = {"version": CACHE_VERSION, "rows": len(frame)}
+    meta["columns"] = write_columns(tmp_directory, frame)
+    _write_meta(tmp_directory, meta)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_directory, directory)
+    logger.info(f"Дописанные строки ({len(frame)}) сохранены в {directory}")
+
+
+def drop_cache(file_path: str) -> None:
+    """
+    Удаляет кеш файла, если он есть.
+    """
+    shutil.rmtree(cache_dir(file_path), ignore_errors=True)
@@ -0,0 +1,232 @@
+import argparse
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.aggregates import card_keys
+from src.json_writer import write_records
+from src.metrics import timed
+from src.store import DATA_PATH, get_store
+
+logger = logging.getLogger(__name__)
+
+RULES_FILE = "cashback_rules.toml"
+# как в описании банка: 1 рубль на каждые 100 рублей расходов
+DEFAULT_RATE = 0.01
+ROUNDING = ["floor", "none"]
+COLUMNS = ["card", "month", "spent", "expected", "actual", "difference"]
+
+
+def _as_set(value: Any) -> Optional[List[Any]]:
+    if value is None:
+        return None
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+@dataclass(frozen=True)
+class CashbackRule:
+    """
+    Одно правило: ставка rate для операций, подходящих под все заданные условия
+    (категории, MCC, последние 4 цифры карт, даты платежа от start до end включительно).
+    cap - предел кешбэка по правилу на карту за календарный месяц.
+    """
+
+    rate: float
+    name: str = ""
+    categories: Optional[FrozenSet[str]] = None
+    mcc: Optional[FrozenSet[int]] = None
+    cards: Optional[FrozenSet[str]] = None
+    start: Optional[pd.Timestamp] = None
+    end: Optional[pd.Timestamp] = None
+    cap: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CashbackRule":
+        unknown = set(data) - {"name", "rate", "category", "mcc", "card", "start", "end", "cap"}
+        if unknown:
+            raise ValueError(f"Неизвестные поля правила кешбэка: {', '.join(sorted(unknown))}")
+        if "rate" not in data:
+            raise ValueError(f"У правила кешбэка нет ставки rate: {data}")
+        categories, mcc, cards = _as_set(data.get("category")), _as_set(data.get("mcc")), _as_set(data.get("card"))
+        return cls(
+            rate=float(data["rate"]),
+            name=str(data.get("name", "")),
+            categories=frozenset(str(value) for value in categories) if categories is not None else None,
+            mcc=frozenset(int(value) for value in mcc) if mcc is not None else None,
+            cards=frozenset(str(value)[-4:] for value in cards) if cards is not None else None,
+            start=pd.Timestamp(data["start"]) if data.get("start") is not None else None,
+            end=pd.Timestamp(data["end"]) if data.get("end") is not None else None,
+            cap=float(data["cap"]) if data.get("cap") is not None else None,
+        )
+
+
+@dataclass
+class CashbackRules:
+    """
+    Набор правил кешбэка. Для операции берется первое подходящее правило (порядок в файле),
+    если ни одно не подошло - default_rate. rounding="floor" - кешбэк каждой операции
+    округляется вниз до рубля, как у банка; "none" - без округления.
+    """
+
+    rules: List[CashbackRule] = field(default_factory=list)
+    default_rate: float = DEFAULT_RATE
+    rounding: str = "floor"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CashbackRules":
+        rounding = data.get("rounding", "floor")
+        if rounding not in ROUNDING:
+            raise ValueError(f"Неизвестное округление кешбэка: {rounding}, можно {', '.join(ROUNDING)}")
+        return cls(
+            rules=[CashbackRule.from_dict(rule) for rule in data.get("rules", [])],
+            default_rate=float(data.get("default_rate", DEFAULT_RATE)),
+            rounding=rounding,
+        )
+
+    def compile(self) -> "CompiledRules":
+        return CompiledRules(self)
+
+
+class CompiledRules:
+    """
+    Правила, собранные один раз в векторные выражения над колонками выписки. Условия
+    по категории, карте и MCC проверяются по различным значениям колонки, а не по каждой
+    строке, и раскладываются на строки через коды factorize.
+    """
+
+    def __init__(self, rules: CashbackRules) -> None:
+        self.rules = rules.rules
+        self.rates = np.array([rule.rate for rule in self.rules] + [rules.default_rate])
+        # у правила по умолчанию предела нет
+        self.caps = np.array([np.inf if rule.cap is None else rule.cap for rule in self.rules] + [np.inf])
+        self.floor = rules.rounding == "floor"
+
+    @staticmethod
+    def _member(column: pd.Series, allowed: FrozenSet[Any]) -> np.ndarray:
+        codes, uniques = pd.factorize(column)
+        matches = np.array([value in allowed for value in uniques] + [False], dtype=bool)
+        return matches[codes]
+
+    def rule_index(self, frame: pd.DataFrame, cards: pd.Series, dates: pd.Series) -> np.ndarray:
+        """
+        Номер правила для каждой строки (len(rules) - правило по умолчанию).
+        """
+        index = np.full(len(frame), len(self.rules), dtype=np.int64)
+        unmatched = np.ones(len(frame), dtype=bool)
+        mcc = frame["MCC"] if "MCC" in frame else pd.Series(np.nan, index=frame.index)
+        mcc = mcc.astype("float64").astype("Int64")
+        for number, rule in enumerate(self.rules):
+            mask = unmatched.copy()
+            if rule.categories is not None:
+                mask &= self._member(frame["category"], rule.categories) if "category" in frame else False
+            if rule.mcc is not None:
+                mask &= self._member(mcc, rule.mcc)
+            if rule.cards is not None:
+                mask &= self._member(cards, rule.cards)
+            if rule.start is not None:
+                mask &= (dates >= rule.start).to_numpy()
+            if rule.end is not None:
+                mask &= (dates <= rule.end).to_numpy()
+            index[mask] = number
+            unmatched &= ~mask
+        return index
+
+    def apply(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Ожидаемый и фактический кешбэк по карте и месяцу платежа одним проходом:
+        ставка правила по строкам, округление, сумма по (карта, месяц, правило) с пределом cap
+        и затем по (карта, месяц). Кешбэк начисляется только на расходы прошедших операций
+        (status "OK"); строки без распознанной даты платежа не учитываются.
+        """
+        cards = card_keys(frame["card_number"]) if "card_number" in frame else pd.Series(np.nan, index=frame.index)
+        dates = pd.to_datetime(frame["data_payment"], format="%d.%m.%Y", errors="coerce").dt.normalize()
+        amounts = np.nan_to_num(frame["transaction_amount"].to_numpy(dtype="float64"))
+        # по отклоненным операциям (FAILED) банк кешбэк не начисляет
+        passed = (frame["status"] == "OK").to_numpy() if "status" in frame else np.ones(len(frame), dtype=bool)
+        spent = np.where((amounts < 0) & passed, -amounts, 0.0)
+        rule = self.rule_index(frame, cards, dates)
+        expected = spent * self.rates[rule]
+        if self.floor:
+            # 1e-9 - чтобы 6.9999999 из-за погрешности float не округлилось до 6
+            expected = np.floor(expected + 1e-9)
+        actual = np.zeros(len(frame))
+        if "bonuses_including_cashback" in frame:
+            actual = np.nan_to_num(frame["bonuses_including_cashback"].to_numpy(dtype="float64"))
+        table = pd.DataFrame(
+            {
+                "card": cards.to_numpy(),
+                # номер месяца (год * 12 + месяц - 1), в строку переводится уже после группировки
+                "month": (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype="float64", na_value=np.nan),
+                "rule": rule,
+                "spent": spent,
+                "expected": expected,
+                "actual": actual,
+            }
+        )
+        table = table[table["card"].notna() & table["month"].notna()]
+        by_rule = table.groupby(["card", "month", "rule"], sort=False).sum().reset_index()
+        by_rule["expected"] = np.minimum(by_rule["expected"].to_numpy(), self.caps[by_rule["rule"].to_numpy()])
+        result = by_rule.groupby(["card", "month"]).sum().reset_index()
+        months = result["month"].astype(np.int64)
+        result["month"] = (months // 12).astype(str) + "-" + (months % 12 + 1).astype(str).str.zfill(2)
+        result["difference"] = result["actual"] - result["expected"]
+        return result.sort_values(["month", "card"], ignore_index=True)[COLUMNS]
+
+
+def load_rules(file_path: str = RULES_FILE) -> CashbackRules:
+    """
+    Правила кешбэка из JSON или TOML. Без файла - одна ставка 1 рубль на 100 рублей.
+    """
+    if not os.path.exists(file_path):
+        return CashbackRules()
+    if file_path.lower().endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:  # python 3.10
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("Для правил в TOML на python 3.10 нужен пакет tomli (или правила в JSON)")
+        with open(file_path, "rb") as f:
+            data = tomllib.load(f)
+    else:
+        with open(file_path, encoding="utf-8") as f:
+            data = json.load(f)
+    return CashbackRules.from_dict(data)
+
+
+@timed("aggregate", "check_cashback", rows=lambda frame, *args, **kwargs: len(frame))
+def check_cashback(frame: pd.DataFrame, rules: Optional[CashbackRules] = None) -> pd.DataFrame:
+    """
+    Сверка кешбэка банка с правилами: по карте и месяцу - расходы, ожидаемый и начисленный
+    кешбэк и разница (actual - expected). Операции без карты или даты платежа не учитываются.
+    """
+    return (rules if rules is not None else CashbackRules()).compile().apply(frame)
+
+
+def main_cashback(argv: Optional[List[str]] = None) -> None:
+    """
+    Сверяет кешбэк выписки с правилами и пишет результат в JSON Lines.
+    """
+    parser = argparse.ArgumentParser(description="Сверка кешбэка по правилам")
+    parser.add_argument("file_path", nargs="?", default=DATA_PATH)
+    parser.add_argument("--rules", default=RULES_FILE, help="правила в JSON или TOML")
+    parser.add_argument("--output", default="cashback.jsonl")
+    args = parser.parse_args(argv)
+    result = check_cashback(get_store(args.file_path).frame, load_rules(args.rules))
+    count = write_records(args.output, result, lines=True)
+    mismatches = int((result["difference"].abs() >= 0.01).sum())
+    logger.info(f"Сверка кешбэка: {count} карт-месяцев, расхождений {mismatches}")
+    print(f"Сверка кешбэка записана в {args.output}: {count} карт-месяцев, расхождений {mismatches}")
+
+
+if __name__ == "__main__":
+    from src.utils import init_app
+
+    init_app()
+    main_cashback()
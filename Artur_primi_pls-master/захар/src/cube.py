@@ -0,0 +1,181 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.aggregates import card_keys, round_like_python
+
+DAY = np.timedelta64(1, "D")
+MEASURES = ["payment_amount", "transaction_amount", "bonuses_including_cashback", "spent", "spent_rounded"]
+# у измерения all один ключ на всю таблицу - для общих сумм
+DIMENSIONS = ["all", "category", "card"]
+# суммы из куба округляются до копейки: разность префиксных сумм дает хвосты вроде -862.8800000000001,
+# которых нет у суммы по строкам
+MONEY_DIGITS = 2
+
+
+def measure_columns(frame: pd.DataFrame) -> np.ndarray:
+    """
+    Меры куба по строкам: суммы, бонусы и расходы (spent - модуль отрицательных
+    сумм операции, spent_rounded - то же с округлением каждой строки до 0.1, как в proc_card_data).
+    """
+    columns = []
+    for name in MEASURES[:3]:
+        if name in frame:
+            columns.append(np.nan_to_num(frame[name].to_numpy(dtype="float64")))
+        else:
+            columns.append(np.zeros(len(frame)))
+    amounts = columns[1]
+    spent = np.where(amounts < 0, -amounts, 0.0)
+    columns.append(spent)
+    columns.append(round_like_python(spent, 1))
+    return np.column_stack(columns)
+
+
+class SpendingCube:
+    """
+    Дневные суммы мер по категориям, картам и всей таблице. Префиксные суммы по дням
+    пересчитываются лениво, так что сумма за любой период - разность двух строк.
+    Операции без даты платежа учитываются только в суммах за все время.
+    """
+
+    def __init__(self) -> None:
+        self.origin: Optional[np.datetime64] = None
+        self.days = 0
+        self.keys: Dict[str, Dict[Any, int]] = {dimension: {} for dimension in DIMENSIONS}
+        self.daily: Dict[str, np.ndarray] = {dimension: np.zeros((0, 0, len(MEASURES))) for dimension in DIMENSIONS}
+        self.undated: Dict[str, np.ndarray] = {dimension: np.zeros((0, len(MEASURES))) for dimension in DIMENSIONS}
+        self._prefix: Dict[str, Optional[np.ndarray]] = {dimension: None for dimension in DIMENSIONS}
+
+    def _dimension_keys(self, frame: pd.DataFrame, dimension: str) -> pd.Series:
+        if dimension == "all":
+            return pd.Series("", index=frame.index, dtype=object)
+        if dimension == "card":
+            if "card_number" not in frame:
+                return pd.Series(np.nan, index=frame.index, dtype=object)
+            return card_keys(frame["card_number"])
+        if "category" not in frame:
+            return pd.Series(np.nan, index=frame.index, dtype=object)
+        return frame["category"]
+
+    def _grow_days(self, first: np.datetime64, last: np.datetime64) -> None:
+        origin = first if self.origin is None else min(self.origin, first)
+        head = 0 if self.origin is None else int((self.origin - origin) // DAY)
+        days = max(self.days + head, int((last - origin) // DAY) + 1)
+        tail = days - self.days - head
+        if head or tail:
+            for dimension in DIMENSIONS:
+                self.daily[dimension] = np.pad(self.daily[dimension], ((head, tail), (0, 0), (0, 0)))
+        self.origin = origin
+        self.days = days
+
+    def add(self, frame: pd.DataFrame) -> None:
+        """
+        Добавляет строки в куб; стоимость пропорциональна числу новых строк и числу дней.
+        """
+        if frame.empty:
+            return
+        values = measure_columns(frame)
+        dates = pd.to_datetime(frame["data_payment"], format="%d.%m.%Y").to_numpy(dtype="datetime64[D]")
+        dated = ~np.isnat(dates)
+        day_index = np.full(len(frame), -1, dtype=np.int64)
+        if dated.any():
+            self._grow_days(dates[dated].min(), dates[dated].max())
+            day_index[dated] = (dates[dated] - self.origin) // DAY
+        for dimension in DIMENSIONS:
+            codes, uniques = pd.factorize(self._dimension_keys(frame, dimension))
+            keys = self.keys[dimension]
+            for key in uniques:
+                keys.setdefault(key, len(keys))
+            mapping = np.array([keys[key] for key in uniques], dtype=np.int64)
+            width = len(keys)
+            daily = self.daily[dimension]
+            undated = self.undated[dimension]
+            if daily.shape[1] < width:
+                daily = np.pad(daily, ((0, 0), (0, width - daily.shape[1]), (0, 0)))
+            if undated.shape[0] < width:
+                undated = np.pad(undated, ((0, width - undated.shape[0]), (0, 0)))
+            on_day = (codes >= 0) & dated
+            no_day = (codes >= 0) & ~dated
+            cells = day_index[on_day] * width + mapping[codes[on_day]]
+            undated_keys = mapping[codes[no_day]]
+            for measure in range(len(MEASURES)):
+                daily[:, :, measure] += np.bincount(
+                    cells, weights=values[on_day, measure], minlength=self.days * width
+                ).reshape(self.days, width)
+                undated[:, measure] += np.bincount(undated_keys, weights=values[no_day, measure], minlength=width)
+            self.daily[dimension] = daily
+            self.undated[dimension] = undated
+            self._prefix[dimension] = None
+
+    def _prefix_sums(self, dimension: str) -> np.ndarray:
+        prefix = self._prefix[dimension]
+        if prefix is None:
+            daily = self.daily[dimension]
+            prefix = np.zeros((daily.shape[0] + 1,) + daily.shape[1:])
+            np.cumsum(daily, axis=0, out=prefix[1:])
+            self._prefix[dimension] = prefix
+        return prefix
+
+    def _day_bounds(self, start: Any, end: Any) -> Tuple[int, int]:
+        # период включает оба конца; время внутри дня сдвигает границу внутрь периода
+        first, last = 0, self.days
+        if self.origin is None:
+            return 0, 0
+        if start is not None:
+            start_ts = pd.Timestamp(start)
+            start_day = start_ts.normalize() + pd.Timedelta(days=int(start_ts != start_ts.normalize()))
+            first = int((np.datetime64(start_day, "D") - self.origin) // DAY)
+        if end is not None:
+            last = int((np.datetime64(pd.Timestamp(end).normalize(), "D") - self.origin) // DAY) + 1
+        first = min(max(first, 0), self.days)
+        return first, min(max(last, first), self.days)
+
+    def totals(self, dimension: str, measure: str, start: Any = None, end: Any = None) -> Dict[Any, float]:
+        """
+        Суммы меры по всем ключам измерения за период [start, end] (до копейки). Без границ - за все время,
+        включая операции без даты платежа.
+        """
+        prefix = self._prefix_sums(dimension)
+        measure_index = MEASURES.index(measure)
+        first, last = self._day_bounds(start, end)
+        sums = prefix[last, :, measure_index] - prefix[first, :, measure_index]
+        if start is None and end is None:
+            sums = sums + self.undated[dimension][:, measure_index]
+        return {key: round(float(sums[index]), MONEY_DIGITS) for key, index in self.keys[dimension].items()}
+
+    def total(self, dimension: str, key: Any, measure: str, start: Any = None, end: Any = None) -> float:
+        """
+        Сумма меры по одному ключу за период [start, end] (до копейки).
+        """
+        index = self.keys[dimension].get(key)
+        if index is None:
+            return 0.0
+        prefix = self._prefix_sums(dimension)
+        measure_index = MEASURES.index(measure)
+        first, last = self._day_bounds(start, end)
+        result = prefix[last, index, measure_index] - prefix[first, index, measure_index]
+        if start is None and end is None:
+            result += self.undated[dimension][index, measure_index]
+        return round(float(result), MONEY_DIGITS)
+
+    def monthly(self, dimension: str, key: Any, measure: str) -> List[Dict[str, Any]]:
+        """
+        Суммы меры по одному ключу помесячно.
+        """
+        if self.origin is None:
+            return []
+        last_day = pd.Timestamp(self.origin + (self.days - 1) * DAY)
+        return [
+            {"month": str(month), measure: self.total(dimension, key, measure, month.start_time, month.end_time)}
+            for month in pd.period_range(pd.Timestamp(self.origin), last_day, freq="M")
+        ]
+
+
+def build_cube(frame: pd.DataFrame) -> SpendingCube:
+    """
+    Строит куб по таблице операций.
+    """
+    cube = SpendingCube()
+    cube.add(frame)
+    return cube
@@ -0,0 +1,54 @@
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class CategoryDateIndex:
+    """
+    Строки, отсортированные по категории и дате платежа.
+    Окно (категория, начало, конец) находится двумя бинарными поисками.
+    """
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        payment_dates = pd.to_datetime(frame["data_payment"], format="%d.%m.%Y")
+        codes, categories = pd.factorize(frame["category"])
+        valid = np.flatnonzero((codes >= 0) & payment_dates.notna().to_numpy())
+        dates = payment_dates.to_numpy(dtype="datetime64[ns]")[valid]
+        order = np.lexsort((dates, codes[valid]))
+        self.positions = valid[order]
+        self.dates = dates[order]
+        self.amounts: Optional[np.ndarray] = None
+        if "payment_amount" in frame:
+            self.amounts = np.nan_to_num(frame["payment_amount"].to_numpy(dtype="float64")[self.positions])
+        sorted_codes = codes[self.positions]
+        self.groups: Dict[Any, Tuple[int, int]] = {}
+        for code, category in enumerate(categories):
+            start, stop = np.searchsorted(sorted_codes, [code, code + 1])
+            self.groups[category] = (int(start), int(stop))
+
+    def window(self, category: Any, start: Any, end: Any, include_end: bool = True) -> Tuple[int, int]:
+        """
+        Границы окна в отсортированных массивах: дата от start (включительно) до end.
+        """
+        group_start, group_stop = self.groups.get(category, (0, 0))
+        dates = self.dates[group_start:group_stop]
+        lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start), "ns"), side="left")
+        hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end), "ns"), side="right" if include_end else "left")
+        return group_start + int(lo), group_start + int(max(lo, hi))
+
+    def rows(self, category: Any, start: Any, end: Any, include_end: bool = True) -> np.ndarray:
+        """
+        Номера строк окна в исходном порядке таблицы.
+        """
+        lo, hi = self.window(category, start, end, include_end)
+        return np.sort(self.positions[lo:hi])
+
+    def total(self, category: Any, start: Any, end: Any, include_end: bool = True) -> float:
+        """
+        Сумма payment_amount за окно.
+        """
+        if self.amounts is None:
+            raise KeyError("payment_amount")
+        lo, hi = self.window(category, start, end, include_end)
+        return float(self.amounts[lo:hi].sum())
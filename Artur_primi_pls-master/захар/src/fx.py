@@ -0,0 +1,249 @@
+import argparse
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = "RUB"
+RATES_FILE = "fx_rates.csv"
+# сумма в колонке -> колонка с ее валютой
+AMOUNT_CURRENCIES = {"transaction_amount": "currency_operation", "payment_amount": "payment_currency"}
+
+
+class RateTable:
+    """
+    Исторические курсы валют к рублю: на каждую дату снимка - сколько рублей за единицу валюты.
+    Курс на дату операции берется последний известный на эту дату (as-of), для операций раньше
+    первого снимка - первый известный. version растет при каждом изменении таблицы.
+    """
+
+    def __init__(self, frame: Optional[pd.DataFrame] = None) -> None:
+        self.frame = pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "currency": [], "rate": []})
+        self.version = 0
+        self._lock = threading.Lock()
+        if frame is not None:
+            self.add_frame(frame)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def currencies(self) -> List[str]:
+        return sorted(set(self.frame["currency"]) | {BASE_CURRENCY})
+
+    def add_frame(self, frame: pd.DataFrame) -> None:
+        """
+        Добавляет курсы из таблицы с колонками date, currency, rate; курс той же валюты
+        на ту же дату заменяется новым.
+        """
+        rates = pd.DataFrame(
+            {
+                "date": pd.to_datetime(frame["date"]).dt.normalize().astype("datetime64[ns]"),
+                "currency": frame["currency"].astype(str).str.strip().str.upper(),
+                "rate": pd.to_numeric(frame["rate"], errors="coerce").astype("float64"),
+            }
+        ).dropna()
+        with self._lock:
+            combined = pd.concat([self.frame, rates], ignore_index=True)
+            combined = combined.drop_duplicates(["date", "currency"], keep="last")
+            self.frame = combined.sort_values(["date", "currency"], ignore_index=True)
+            self.version += 1
+
+    def add(self, day: Union[str, date, datetime], rates: Dict[str, float]) -> None:
+        """
+        Снимок курсов на одну дату: {"USD": 90.5, "EUR": 98.1}.
+        """
+        self.add_frame(pd.DataFrame({"date": day, "currency": list(rates), "rate": list(rates.values())}))
+
+    def rates_at(self, currencies: pd.Series, dates: pd.Series) -> np.ndarray:
+        """
+        Курс к рублю для каждой строки одним as-of соединением (merge_asof по валюте и дате).
+        Пустая валюта считается рублями; для строки без даты берется последний курс валюты.
+        """
+        # коды валют нормализуются по различным значениям, а не по каждой строке
+        positions, uniques = pd.factorize(currencies)
+        names = np.array([str(value).strip().upper() for value in uniques] + [BASE_CURRENCY], dtype=object)
+        codes = names[positions]
+        result = np.full(len(codes), np.nan)
+        base = codes == BASE_CURRENCY
+        result[base] = 1.0
+        foreign = np.flatnonzero(~base)
+        if not len(foreign):
+            return result
+        with self._lock:
+            table = self.frame
+        unknown = sorted(set(names[:-1]) - set(table["currency"]) - {BASE_CURRENCY})
+        if unknown:
+            raise ValueError(f"Нет курсов для валют: {', '.join(unknown)}")
+        dates = pd.to_datetime(dates.iloc[foreign]).astype("datetime64[ns]").to_numpy()
+        latest = table["date"].max()
+        query = pd.DataFrame(
+            {
+                "date": np.where(pd.isna(dates), latest.to_datetime64(), dates).astype("datetime64[ns]"),
+                "currency": codes[foreign],
+                "position": foreign,
+            }
+        ).sort_values("date", kind="stable")
+        merged = pd.merge_asof(query, table, on="date", by="currency", direction="backward")
+        early = merged["rate"].isna().to_numpy()
+        if early.any():
+            # операции раньше первого снимка валюты - по первому известному курсу
+            before = merged[early].drop(columns="rate")
+            forward = pd.merge_asof(before, table, on="date", by="currency", direction="forward")
+            merged.loc[early, "rate"] = forward["rate"].to_numpy()
+        result[merged["position"].to_numpy()] = merged["rate"].to_numpy()
+        return result
+
+    def convert(self, frame: pd.DataFrame, currency: str = BASE_CURRENCY) -> pd.DataFrame:
+        """
+        Копия выписки, в которой transaction_amount и payment_amount пересчитаны из своих валют
+        (currency_operation, payment_currency) в currency по курсу на дату платежа
+        (data_payment, а без нее - дату операции). Валюты в колонках становятся currency.
+        """
+        currency = currency.strip().upper()
+        converted = frame.copy()
+        dates = operation_dates(frame)
+        if currency == BASE_CURRENCY:
+            target = np.ones(len(frame))
+        else:
+            target = self.rates_at(pd.Series(currency, index=frame.index), dates)
+        for amount, currency_column in AMOUNT_CURRENCIES.items():
+            if amount not in frame:
+                continue
+            if currency_column in frame:
+                source = self.rates_at(frame[currency_column], dates)
+            else:
+                source = np.ones(len(frame))
+            converted[amount] = frame[amount].to_numpy(dtype="float64") * source / target
+            if currency_column in frame:
+                converted[currency_column] = pd.Categorical([currency] * len(frame))
+        return converted
+
+    def to_frame(self) -> pd.DataFrame:
+        with self._lock:
+            return self.frame.copy()
+
+    def save(self, file_path: str = RATES_FILE) -> None:
+        """
+        Записывает курсы в CSV (date, currency, rate) или JSON ({"YYYY-MM-DD": {"USD": 90.5}}).
+        """
+        frame = self.to_frame()
+        tmp_path = file_path + ".tmp"
+        if file_path.lower().endswith(".json"):
+            snapshots: Dict[str, Dict[str, float]] = {}
+            for row in frame.itertuples(index=False):
+                snapshots.setdefault(row.date.strftime("%Y-%m-%d"), {})[row.currency] = row.rate
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshots, f, indent=4, ensure_ascii=False)
+        else:
+            frame.assign(date=frame["date"].dt.strftime("%Y-%m-%d")).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, file_path)
+
+
+def operation_dates(frame: pd.DataFrame) -> pd.Series:
+    """
+    Дата курса для каждой операции: дата платежа, а если ее нет - день операции.
+    """
+    dates = pd.Series(pd.NaT, index=frame.index, dtype="datetime64[ns]")
+    for name in ["data_payment", "date_operation"]:
+        if name in frame:
+            column = frame[name]
+            if not pd.api.types.is_datetime64_any_dtype(column):
+                column = pd.to_datetime(column, dayfirst=True, errors="coerce")
+            dates = dates.fillna(column.dt.normalize().astype("datetime64[ns]"))
+    return dates
+
+
+def load_rates(file_path: str = RATES_FILE) -> RateTable:
+    """
+    Курсы из CSV (date, currency, rate) или JSON: {"YYYY-MM-DD": {"USD": 90.5}} или список
+    записей {"date", "currency", "rate"}. Нет файла - пустая таблица (только рубли).
+    """
+    if not os.path.exists(file_path):
+        return RateTable()
+    if file_path.lower().endswith(".json"):
+        with open(file_path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [
+                {"date": day, "currency": currency, "rate": rate}
+                for day, rates in data.items()
+                for currency, rate in rates.items()
+            ]
+        return RateTable(pd.DataFrame(data, columns=["date", "currency", "rate"]))
+    return RateTable(pd.read_csv(file_path))
+
+
+_rates: Dict[str, RateTable] = {}
+_rates_lock = threading.Lock()
+
+
+def get_rates(file_path: str = RATES_FILE) -> RateTable:
+    """
+    Таблица курсов файла, читается один раз на процесс.
+    """
+    key = os.path.abspath(file_path)
+    with _rates_lock:
+        if key not in _rates:
+            _rates[key] = load_rates(file_path)
+        return _rates[key]
+
+
+def update_rates(
+    currencies: List[str],
+    api_key: Optional[str] = None,
+    file_path: Optional[str] = RATES_FILE,
+    rates: Optional[RateTable] = None,
+    day: Any = None,
+) -> RateTable:
+    """
+    Добавляет снимок сегодняшних курсов из apilayer (market.fetch_rates, по запросу на валюту)
+    и сохраняет таблицу в file_path.
+    """
+    from src.market import fetch_rates
+
+    rates = rates if rates is not None else get_rates(file_path or RATES_FILE)
+    fetched = fetch_rates([currency for currency in currencies if currency != BASE_CURRENCY], api_key)
+    rates.add(day or date.today(), fetched)
+    if file_path:
+        rates.save(file_path)
+    logger.info(f"Курсы обновлены: {fetched}")
+    return rates
+
+
+def to_currency(transactions: Any, currency: Optional[str], rates: Optional[RateTable] = None) -> Any:
+    """
+    Выписка (таблица или список словарей) с суммами в currency; без currency - как есть.
+    """
+    if currency is None:
+        return transactions
+    from src.store import normalize_operations
+
+    if not isinstance(transactions, pd.DataFrame):
+        transactions = normalize_operations(pd.DataFrame(list(transactions)))
+    return (rates if rates is not None else get_rates()).convert(transactions, currency)
+
+
+def main_fx(argv: Optional[List[str]] = None) -> None:
+    """
+    Добавляет в таблицу курсов снимок сегодняшних курсов валют из apilayer.
+    """
+    parser = argparse.ArgumentParser(description="Таблица курсов валют")
+    parser.add_argument("currencies", nargs="+", help="валюты, например USD EUR")
+    parser.add_argument("--file", default=RATES_FILE, help="CSV или JSON с курсами")
+    args = parser.parse_args(argv)
+    rates = update_rates([currency.upper() for currency in args.currencies], os.getenv("api_key"), args.file)
+    print(f"Курсов в {args.file}: {len(rates)}")
+
+
+if __name__ == "__main__":
+    from src.utils import init_app
+
+    init_app()
+    main_fx()
@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from src.aggregates import card_totals, sum_expenses
+from src.metrics import timed
+from src.store import DATA_PATH, DEDUP_COLUMNS, TransactionStore, get_store, normalize_operations, to_records
+from src.topk import TopK
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "dashboard_state.json"
+STATE_VERSION = 2
+TOP_COUNT = 5
+CATEGORY_MONTHS = 3
+
+
+def _row_keys(frame: pd.DataFrame) -> List[str]:
+    # ключ операции для строк на границе high-water mark (та же секунда, что и последняя учтенная)
+    keys = [name for name in DEDUP_COLUMNS if name in frame]
+    return [json.dumps(record, ensure_ascii=False, default=str) for record in to_records(frame[keys])]
+
+
+class DashboardState:
+    """
+    Материализованные итоги дашборда: сумма расходов, расходы и кешбэк по картам, топ-5
+    транзакций и дневные траты по категориям. Учитываются только операции новее
+    high-water mark по date_operation, поэтому обновление стоит O(новых строк).
+    source и store_version - выписка и версия хранилища, по которым посчитаны итоги:
+    для другой выписки или если выписка изменилась не только дописыванием новых строк,
+    итоги считаются заново.
+    """
+
+    def __init__(self, source: Optional[str] = None, store_version: Optional[str] = None) -> None:
+        self.source = source
+        self.store_version = store_version
+        self.rows = 0
+        self.high_water: Optional[pd.Timestamp] = None
+        self.boundary: Set[str] = set()
+        self.total_expenses = 0.0
+        self.cards: Dict[str, Dict[str, Any]] = {}
+        self.top = TopK(TOP_COUNT)
+        self.category_daily: Dict[str, Dict[str, float]] = {}
+
+    def matches(self, file_path: str, store: TransactionStore) -> bool:
+        """
+        Итоги можно дополнять по хранилищу: посчитаны по этой выписке, и хранилище с тех пор
+        не менялось или только выросло новыми операциями (covers).
+        """
+        if self.source != os.path.abspath(file_path):
+            return False
+        return self.store_version == store.version or self.covers(store.frame)
+
+    def covers(self, frame: pd.DataFrame) -> bool:
+        """
+        Операции frame не позже high-water mark - ровно учтенные: столько же строк, и все ключи
+        границы на месте. Так новая выгрузка, в которую только дописали операции, дополняет итоги,
+        а выписка с операциями задним числом или с удаленными строками - нет.
+        """
+        if self.high_water is None:
+            return self.rows == 0
+        dates = frame["date_operation"]
+        keys = _row_keys(frame[(dates == self.high_water).to_numpy()])
+        known = sum(key in self.boundary for key in keys)
+        return int((dates < self.high_water).sum()) + known == self.rows and self.boundary <= set(keys)
+
+    def older_rows(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Строки frame раньше high-water mark: их new_rows не учитывает.
+        """
+        if self.high_water is None:
+            return frame.iloc[:0]
+        return frame[(frame["date_operation"] < self.high_water).to_numpy()]
+
+    def new_rows(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Строки таблицы, которые еще не учтены: позже high-water mark или в ту же секунду,
+        но с другим ключом. Строки без даты операции пропускаются.
+        """
+        dates = frame["date_operation"]
+        undated = int(dates.isna().sum())
+        if undated:
+            logger.warning(f"Пропущено операций без date_operation: {undated}")
+        if self.high_water is None:
+            return frame[dates.notna().to_numpy()]
+        newer = (dates > self.high_water).to_numpy()
+        same = np.flatnonzero((dates == self.high_water).to_numpy())
+        if len(same):
+            keys = _row_keys(frame.take(same))
+            newer[same[[key not in self.boundary for key in keys]]] = True
+        return frame[newer]
+
+    def apply(self, delta: pd.DataFrame) -> None:
+        """
+        Учитывает новые строки во всех итогах.
+        """
+        if delta.empty:
+            return
+        self.total_expenses = sum_expenses(delta, self.total_expenses)
+        card_totals(delta, self.cards)
+        self.top.update(delta)
+        self._add_category_days(delta)
+        last = delta["date_operation"].max()
+        if self.high_water is None or last > self.high_water:
+            self.high_water = last
+            self.boundary = set()
+        self.boundary.update(_row_keys(delta[(delta["date_operation"] == self.high_water).to_numpy()]))
+        self.rows += len(delta)
+
+    def _add_category_days(self, delta: pd.DataFrame) -> None:
+        if "category" not in delta or "data_payment" not in delta or "payment_amount" not in delta:
+            return
+        days = delta["data_payment"].dt.strftime("%Y-%m-%d")
+        amounts = np.nan_to_num(delta["payment_amount"].to_numpy(dtype="float64"))
+        grouped = (
+            pd.Series(amounts, index=delta.index).groupby([delta["category"].astype(object), days], sort=False).sum()
+        )
+        for (category, day), amount in grouped.items():
+            category_days = self.category_daily.setdefault(category, {})
+            category_days[day] = category_days.get(day, 0.0) + float(amount)
+
+    def update(self, frame: pd.DataFrame) -> int:
+        """
+        Учитывает строки frame новее high-water mark; возвращает их число.
+        """
+        delta = self.new_rows(frame)
+        self.apply(delta)
+        return len(delta)
+
+    def category_totals(self, report_date: Any = None, months: int = CATEGORY_MONTHS) -> Dict[str, float]:
+        """
+        Траты по категориям за months месяцев до report_date включительно (по умолчанию - до high-water mark),
+        как get_expen_by_categ.
+        """
+        end = pd.Timestamp(report_date) if report_date is not None else self.high_water
+        if end is None:
+            return {}
+        start = end - pd.DateOffset(months=months)
+        # день начала входит в период, только если у границы нет времени (как в кубе)
+        first = (start.normalize() + pd.Timedelta(days=int(start != start.normalize()))).strftime("%Y-%m-%d")
+        last = end.strftime("%Y-%m-%d")
+        return {
+            category: sum(amount for day, amount in days.items() if first <= day <= last)
+            for category, days in self.category_daily.items()
+        }
+
+    def result(self, report_date: Any = None) -> Dict[str, Any]:
+        """
+        Итоги дашборда в формате main_views плюс траты по категориям и high-water mark.
+        """
+        return {
+            "total_expenses": self.total_expenses,
+            "card_data": list(self.cards.values()),
+            "top_transactions": self.top.result(),
+            "category_totals": self.category_totals(report_date),
+            "high_water_mark": None if self.high_water is None else str(self.high_water),
+            "rows": self.rows,
+        }
+
+    def to_json(self) -> Dict[str, Any]:
+        heap = self.top.heaps.get("", [])
+        return {
+            "version": STATE_VERSION,
+            "source": self.source,
+            "store_version": self.store_version,
+            "rows": self.rows,
+            "high_water": None if self.high_water is None else self.high_water.isoformat(),
+            "boundary": sorted(self.boundary),
+            "total_expenses": self.total_expenses,
+            "cards": list(self.cards.values()),
+            "top": [{"value": value, "position": -position, "record": record} for value, position, record in heap],
+            "category_daily": self.category_daily,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "DashboardState":
+        state = cls(data["source"], data["store_version"])
+        state.rows = data["rows"]
+        state.high_water = None if data["high_water"] is None else pd.Timestamp(data["high_water"])
+        state.boundary = set(data["boundary"])
+        state.total_expenses = data["total_expenses"]
+        state.cards = {card["last_digits"]: card for card in data["cards"]}
+        # кучу топа восстанавливаем как есть: порядок и позиции строк уже соблюдают инвариант heapq
+        state.top.heaps[""] = [(item["value"], -item["position"], item["record"]) for item in data["top"]]
+        state.top.seen = state.rows
+        state.category_daily = data["category_daily"]
+        return state
+
+    def save(self, path: str = STATE_FILE) -> None:
+        """
+        Записывает итоги на диск (атомарно, через временный файл).
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def load_state(path: str = STATE_FILE) -> DashboardState:
+    """
+    Итоги, сохраненные в path; если файла нет или он другого формата - пустые.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == STATE_VERSION:
+            return DashboardState.from_json(data)
+        logger.warning(f"Итоги {path} другого формата, считаем заново")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Итоги {path} не прочитаны, считаем заново: {e}")
+    return DashboardState()
+
+
+def _rebuild(file_path: str, store: TransactionStore) -> DashboardState:
+    state = DashboardState(os.path.abspath(file_path), store.version)
+    state.update(store.frame)
+    return state
+
+
+def refresh_dashboard(
+    file_path: str = DATA_PATH, state_file: str = STATE_FILE, report_date: Any = None
+) -> Dict[str, Any]:
+    """
+    Дополняет сохраненные итоги операциями выписки новее high-water mark и сохраняет их.
+    Если итоги посчитаны по другой выписке или в выписке изменились уже учтенные операции
+    (появились операции раньше high-water mark, строки удалены), итоги считаются заново.
+    """
+    state = load_state(state_file)
+    store = get_store(file_path)
+    rebuilt = not state.matches(file_path, store)
+    moved = state.store_version != store.version
+    with timed("aggregate", "refresh_dashboard") as timer:
+        if rebuilt:
+            if state.source is not None:
+                logger.info(f"Итоги {state_file} посчитаны по другой выписке или ее версии, считаем заново")
+            state = _rebuild(file_path, store)
+            added = timer.rows = state.rows
+        else:
+            added = timer.rows = state.update(store.frame)
+            state.store_version = store.version
+    if added or rebuilt or moved:
+        state.save(state_file)
+    logger.info(f"Итоги дашборда обновлены, новых операций: {added}")
+    return state.result(report_date)
+
+
+def _late_rows(store: TransactionStore, older: pd.DataFrame) -> pd.DataFrame:
+    # строки раньше high-water mark, которых нет в хранилище (сравнение по ключу операции за тот же период)
+    if older.empty:
+        return older
+    dates = store.frame["date_operation"]
+    first, last = older["date_operation"].min(), older["date_operation"].max()
+    known = set(_row_keys(store.frame[((dates >= first) & (dates <= last)).to_numpy()]))
+    return older[[key not in known for key in _row_keys(older)]]
+
+
+def append_operations(
+    rows: pd.DataFrame, file_path: Optional[str] = None, state_file: str = STATE_FILE, report_date: Any = None
+) -> Dict[str, Any]:
+    """
+    Добавляет новые строки выписки: уже учтенные отбрасываются, остальные дописываются
+    в хранилище file_path (если задан) и в сохраненные итоги. Хранилище выписки сохраняет
+    их и на диске, так что следующий запуск их не теряет. Строки раньше high-water mark
+    с хранилищем считаются новыми, если их там нет, и тогда итоги пересчитываются по хранилищу;
+    без хранилища их не с чем сверить, и они пропускаются.
+    """
+    state = load_state(state_file)
+    frame = normalize_operations(rows)
+    if file_path is None:
+        delta = state.new_rows(frame)
+        skipped = len(state.older_rows(frame))
+        if skipped:
+            logger.warning(f"Пропущено операций раньше high-water mark (без хранилища не сверить): {skipped}")
+        state.apply(delta)
+        state.save(state_file)
+        logger.info(f"Добавлено операций: {len(delta)} из {len(rows)}")
+        return state.result(report_date)
+    store = get_store(file_path)
+    if not state.matches(file_path, store):
+        state = _rebuild(file_path, store)
+    late = _late_rows(store, state.older_rows(frame))
+    delta = state.new_rows(frame)
+    store.append(pd.concat([late, delta]) if len(late) else delta)
+    if len(late):
+        logger.info(f"Операций раньше high-water mark: {len(late)}, итоги считаем заново")
+        state = _rebuild(file_path, store)
+    else:
+        state.apply(delta)
+        state.store_version = store.version
+    state.save(state_file)
+    logger.info(f"Добавлено операций: {len(late) + len(delta)} из {len(rows)}")
+    return state.result(report_date)
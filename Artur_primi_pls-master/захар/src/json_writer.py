@@ -0,0 +1,115 @@
+import gzip
+import io
+import json
+import math
+import os
+from typing import IO, Any, Dict, Iterable, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.metrics import timed
+from src.store import to_records
+
+CHUNK_SIZE = 50_000
+Records = Union[pd.DataFrame, Iterable[Dict[str, Any]]]
+
+
+def json_safe(value: Any) -> Any:
+    """
+    Значение, которое json пишет без невалидных токенов: NaN и бесконечности -> None (null),
+    числа numpy -> обычные числа; словари и списки обходятся рекурсивно.
+    """
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) or math.isinf(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def iter_records(data: Records, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Записи для вывода: таблица переводится в словари частями по chunk_size строк,
+    так что в памяти одновременно только одна часть.
+    """
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunk_size):
+            yield from to_records(data.iloc[start : start + chunk_size], nan_as_none=True)
+    else:
+        for record in data:
+            yield json_safe(record)
+
+
+def open_output(file_path: str, compress: Optional[bool] = None) -> IO[str]:
+    """
+    Открывает файл для записи текста; gzip - если compress или (по умолчанию) расширение .gz.
+    """
+    if compress or (compress is None and file_path.endswith(".gz")):
+        return gzip.open(file_path, "wt", encoding="utf-8")
+    return open(file_path, "w", encoding="utf-8")
+
+
+def dump_records(data: Records, out: IO[str], indent: Optional[int] = 4, lines: bool = False) -> int:
+    """
+    Пишет записи в out по одной: JSON-массив (с indent - так же, как json.dump)
+    или JSON Lines (по компактной записи на строку). Возвращает число записей.
+    """
+    count = 0
+    if lines:
+        for record in iter_records(data):
+            out.write(json.dumps(record, ensure_ascii=False, allow_nan=False, separators=(",", ":")))
+            out.write("\n")
+            count += 1
+        return count
+    pad = "\n" + " " * indent if indent else ""
+    separator = "," + (pad if indent else " ")
+    for record in iter_records(data):
+        text = json.dumps(record, ensure_ascii=False, allow_nan=False, indent=indent)
+        out.write(separator if count else "[" + pad)
+        out.write(text.replace("\n", pad) if indent else text)
+        count += 1
+    out.write(("\n]" if indent else "]") if count else "[]")
+    return count
+
+
+def dumps_records(data: Records, indent: Optional[int] = 4) -> str:
+    """
+    То же, что dump_records, но в строку.
+    """
+    with timed("serialize", "dumps_records") as timer:
+        out = io.StringIO()
+        timer.rows = dump_records(data, out, indent)
+        text = out.getvalue()
+        timer.size = len(text.encode("utf-8"))
+    return text
+
+
+def write_records(
+    file_path: str, data: Records, indent: Optional[int] = 4, lines: bool = False, compress: Optional[bool] = None
+) -> int:
+    """
+    Потоково пишет записи (таблицу, список или итератор словарей) в файл: JSON-массив
+    или JSON Lines, при необходимости в gzip. Возвращает число записей.
+    """
+    with timed("serialize", "write_records") as timer:
+        with open_output(file_path, compress) as out:
+            timer.rows = dump_records(data, out, indent, lines)
+        timer.size = os.path.getsize(file_path)
+    return timer.rows
+
+
+def write_json(file_path: str, data: Any, indent: Optional[int] = 4, compress: Optional[bool] = None) -> None:
+    """
+    Пишет данные в JSON без NaN-токенов. Списки и таблицы пишутся потоково, по записи.
+    """
+    if isinstance(data, (pd.DataFrame, list, Iterator)):
+        write_records(file_path, data, indent, compress=compress)
+        return
+    with timed("serialize", "write_json") as timer:
+        with open_output(file_path, compress) as out:
+            json.dump(json_safe(data), out, indent=indent, ensure_ascii=False, allow_nan=False)
+        timer.size = os.path.getsize(file_path)
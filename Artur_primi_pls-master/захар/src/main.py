@@ -1,14 +1,88 @@
-from src.reports import main_reports
-from src.services import main_services
-from src.views import main_views
+import argparse
+import json
+import sys
+from typing import List
 
 
 def main() -> None:
     """вызываю все функции из модуля views,reports,services"""
+    from src.reports import main_reports
+    from src.services import main_services
+    from src.views import main_views
+
     main_views()
     main_reports()
     main_services()
 
 
+def run_cli(argv: List[str], init: bool = False) -> int:
+    """
+    Неинтерактивный запуск: одна команда, ответ в JSON (в stdout или в файл --output;
+    для .jsonl - JSON Lines, для .gz - со сжатием).
+    Возвращает код выхода. Модули с pandas импортируются только после разбора
+    аргументов, так что --help и ошибки в аргументах отвечают сразу.
+    init - после разбора аргументов вызвать init_app (.env и лог), как при запуске из консоли.
+    """
+    parser = argparse.ArgumentParser(description="Анализ банковских операций")
+    parser.add_argument("--data", help="файл, каталог или шаблон glob с выписками")
+    parser.add_argument("--output", help="куда записать JSON вместо вывода на экран")
+    parser.add_argument("--cache-dir", help="каталог для кеша ответов на диске (повторные запросы - без пересчета)")
+    parser.add_argument("--metrics", help="куда записать метрики по этапам (.prom - формат Prometheus, иначе JSON)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    dashboard = commands.add_parser("dashboard", help="данные главной страницы")
+    dashboard.add_argument("--date-time", help="YYYY-MM-DD HH:MM:SS")
+    dashboard.add_argument("--currency", help="валюта итогов (по курсам из fx_rates.csv), по умолчанию рубли")
+    search = commands.add_parser("search", help="поиск по описанию и категории")
+    search.add_argument("q")
+    search.add_argument("--fuzzy", action="store_true", help="нечеткий поиск: опечатки, ранжирование")
+    search.add_argument("--stem", action="store_true", help="с --fuzzy: искать и другие формы слова")
+    search.add_argument("--limit", help="с --fuzzy: сколько транзакций вернуть")
+    category = commands.add_parser("category", help="траты по категории за 3 месяца")
+    category.add_argument("category")
+    category.add_argument("--date", help="YYYY-MM-DD")
+    category.add_argument("--currency", help="валюта итогов (по курсам из fx_rates.csv), по умолчанию рубли")
+    reports = commands.add_parser("reports", help="операции категории за 90 дней от даты")
+    reports.add_argument("category")
+    reports.add_argument("start_date", help="DD.MM.YYYY")
+    server = commands.add_parser("serve", help="запустить HTTP API")
+    server.add_argument("--host")
+    server.add_argument("--port", type=int)
+    args = parser.parse_args(argv)
+    if init:
+        from src.utils import init_app
+
+        init_app()
+    from src.json_writer import json_safe, write_json, write_records
+    from src.metrics import write_metrics
+    from src.result_cache import configure_cache
+    from src.server import HOST, PORT, handle_request, serve
+    from src.store import DATA_PATH
+
+    data = args.data or DATA_PATH
+    if args.cache_dir:
+        configure_cache(directory=args.cache_dir)
+    if args.command == "serve":
+        serve(data, args.host or HOST, args.port or PORT)
+        return 0
+    params = {name: value for name, value in vars(args).items() if isinstance(value, str)}
+    params.update({name: "1" for name in ("fuzzy", "stem") if getattr(args, name, False)})
+    status, body = handle_request(f"/{args.command}", params, data)
+    if args.output and isinstance(body, list):
+        # .jsonl (.jsonl.gz) - по записи на строку, .gz - со сжатием
+        write_records(args.output, body, lines=".jsonl" in args.output)
+    elif args.output:
+        write_json(args.output, body)
+    else:
+        print(json.dumps(json_safe(body), indent=4, ensure_ascii=False, allow_nan=False))
+    if args.metrics:
+        write_metrics(args.metrics)
+    return 0 if status == 200 else 1
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:], init=True))
+    from src.utils import init_app
+
+    init_app()
     main()
@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from src.metrics import timed
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+RATES_URL = "https://api.apilayer.com/exchangerates_data/latest"
+CACHE_FILE = "market_cache.json"
+CACHE_TTL = 15 * 60
+REQUEST_TIMEOUT = 40
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """
+    Общая сессия requests: соединения с API переиспользуются между запросами.
+    requests импортируется при первом обращении, а не при импорте модуля.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+class TTLCache:
+    """
+    Кеш значений со сроком жизни; если указан путь, хранится в JSON-файле между запусками.
+    """
+
+    def __init__(self, path: Optional[str] = CACHE_FILE, ttl: float = CACHE_TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._items = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Кеш котировок {path} не прочитан: {e}")
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item["expires"] < time.time():
+                return None
+            return item["value"]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._items[key] = {"value": value, "expires": time.time() + self.ttl}
+
+    def save(self) -> None:
+        """
+        Записывает непросроченные значения на диск.
+        """
+        if not self.path:
+            return
+        now = time.time()
+        with self._lock:
+            items = {key: item for key, item in self._items.items() if item["expires"] >= now}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def fetch_rate(currency: str, api_key: Optional[str] = None, base_url: str = RATES_URL) -> float:
+    """
+    Курс рубля за 1 единицу валюты, как в прежнем get_cur_rate: base=валюта, symbols=RUB.
+    Курс берется из ответа как есть, без пересчета через рубль (база RUB есть не на всех тарифах apilayer).
+    """
+    response = get_session().get(
+        base_url,
+        params={"base": currency, "symbols": "RUB"},
+        headers={"apikey": api_key or ""},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    rate = response.json()["rates"]["RUB"]
+    if not rate:
+        raise ValueError(f"Нулевой курс {currency} в ответе")
+    return rate
+
+
+def fetch_rates(currencies: List[str], api_key: Optional[str] = None, base_url: str = RATES_URL) -> Dict[str, float]:
+    """
+    Курсы нескольких валют к рублю, по запросу на валюту через общую сессию.
+    """
+    return {currency: fetch_rate(currency, api_key, base_url) for currency in currencies}
+
+
+def fetch_stock(ticker: str) -> float:
+    """
+    Максимальная цена акции за день (Yahoo Finance).
+    """
+    import yfinance as yf
+
+    history = yf.Ticker(ticker).history(period="1d")
+    return float(history["High"].iloc[0])
+
+
+@timed("fetch")
+def get_market_data(
+    currencies: List[str],
+    stocks: List[str],
+    api_key: Optional[str] = None,
+    cache: Optional[TTLCache] = None,
+    base_url: str = RATES_URL,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Курсы валют и цены акций для дашборда. Все, что есть в кеше, берется оттуда;
+    недостающие курсы запрашиваются одним запросом, акции - параллельно с ним.
+    """
+    cache = cache if cache is not None else TTLCache()
+    rates = {currency: cache.get(f"rate:{currency}") for currency in currencies}
+    prices = {stock: cache.get(f"stock:{stock}") for stock in stocks}
+    missing_rates = [currency for currency, rate in rates.items() if rate is None]
+    missing_stocks = [stock for stock, price in prices.items() if price is None]
+    if missing_rates or missing_stocks:
+        import requests
+
+        with ThreadPoolExecutor(max_workers=len(missing_rates) + len(missing_stocks)) as pool:
+            rate_futures = {
+                currency: pool.submit(fetch_rate, currency, api_key, base_url) for currency in missing_rates
+            }
+            stock_futures = {stock: pool.submit(fetch_stock, stock) for stock in missing_stocks}
+            for currency, future in rate_futures.items():
+                try:
+                    rates[currency] = future.result()
+                    cache.set(f"rate:{currency}", rates[currency])
+                except (requests.RequestException, KeyError, ValueError) as e:
+                    logger.error(f"Не удалось получить курс {currency}: {e}")
+            for stock, future in stock_futures.items():
+                try:
+                    prices[stock] = future.result()
+                    cache.set(f"stock:{stock}", prices[stock])
+                except Exception as e:
+                    logger.error(f"Не удалось получить цену {stock}: {e}")
+        try:
+            cache.save()
+        except OSError as e:
+            logger.warning(f"Кеш котировок не сохранен: {e}")
+    return {
+        "currency_rates": [{"currency": currency, "rate": rates[currency]} for currency in currencies],
+        "stock_prices": [{"stock": stock, "price": prices[stock]} for stock in stocks],
+    }
@@ -0,0 +1,210 @@
+import functools
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# этапы обработки: разбор выписки, отбор строк, расчеты, котировки из сети, запись JSON
+STAGES = ["load", "filter", "aggregate", "fetch", "serialize"]
+# верхние границы корзин гистограммы времени, секунды
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float("inf"))
+PREFIX = "operations"
+
+Labels = Tuple[str, str]
+
+
+class Histogram:
+    """
+    Распределение длительностей по корзинам BUCKETS плюс сумма и число наблюдений.
+    """
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class Metrics:
+    """
+    Счетчики и гистограммы по этапам (stage) и операциям (operation - обычно имя функции).
+    Обновление - пара словарных операций под блокировкой, так что его можно звать на горячем пути
+    и из потоков API.
+    """
+
+    COUNTERS = ["calls", "errors", "rows", "bytes"]
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters: Dict[str, Dict[Labels, float]] = {name: {} for name in self.COUNTERS}
+            self.histograms: Dict[Labels, Histogram] = {}
+
+    def record(
+        self,
+        stage: str,
+        operation: str,
+        seconds: float,
+        rows: Optional[int] = None,
+        size: Optional[int] = None,
+        error: bool = False,
+    ) -> None:
+        """
+        Один вызов этапа: время в гистограмму, вызов (и ошибка) в счетчики, плюс строки и байты.
+        """
+        labels = (stage, operation)
+        with self._lock:
+            histogram = self.histograms.get(labels)
+            if histogram is None:
+                histogram = self.histograms[labels] = Histogram()
+            histogram.observe(seconds)
+            for name, value in (("calls", 1), ("errors", int(error)), ("rows", rows), ("bytes", size)):
+                if value:
+                    counter = self.counters[name]
+                    counter[labels] = counter.get(labels, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Все метрики словарем (для JSON): по этапам и операциям - счетчики и гистограмма времени.
+        """
+        with self._lock:
+            result: Dict[str, Any] = {}
+            for (stage, operation), histogram in sorted(self.histograms.items()):
+                item = {name: self.counters[name].get((stage, operation), 0) for name in self.COUNTERS}
+                item["seconds"] = histogram.to_dict()
+                result.setdefault(stage, {})[operation] = item
+            return result
+
+    def to_prometheus(self) -> str:
+        """
+        Метрики в текстовом формате Prometheus (exposition format 0.0.4).
+        """
+        lines: List[str] = []
+        snapshot = self.snapshot()
+        items = [(stage, operation, item) for stage, ops in snapshot.items() for operation, item in ops.items()]
+        for name in self.COUNTERS:
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for stage, operation, item in items:
+                lines.append(f'{metric}{{stage="{stage}",operation="{operation}"}} {item[name]}')
+        metric = f"{PREFIX}_stage_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for stage, operation, item in items:
+            labels = f'stage="{stage}",operation="{operation}"'
+            for bound, count in item["seconds"]["buckets"].items():
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{metric}_sum{{{labels}}} {item['seconds']['sum']}")
+            lines.append(f"{metric}_count{{{labels}}} {item['seconds']['count']}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+class Timer:
+    """
+    Замер одного выполнения этапа. Внутри with можно задать rows и size (байт):
+
+        with timed("load", "parse_operations") as timer:
+            frame = ...
+            timer.rows = len(frame)
+    """
+
+    def __init__(self, stage: str, operation: str, metrics: Metrics) -> None:
+        self.stage = stage
+        self.operation = operation
+        self.metrics = metrics
+        self.rows: Optional[int] = None
+        self.size: Optional[int] = None
+        self.start = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        seconds = time.perf_counter() - self.start
+        error = exc_type is not None
+        self.metrics.record(self.stage, self.operation, seconds, self.rows, self.size, error)
+        # структурная запись в лог; json собирается, только если INFO кто-то пишет
+        if logger.isEnabledFor(logging.INFO):
+            event = {"event": "stage", "stage": self.stage, "operation": self.operation, "seconds": round(seconds, 6)}
+            if self.rows is not None:
+                event["rows"] = self.rows
+            if self.size is not None:
+                event["bytes"] = self.size
+            if error:
+                event["error"] = exc_type.__name__
+            logger.info(json.dumps(event, ensure_ascii=False))
+
+
+class timed:
+    """
+    Замер этапа - как контекстный менеджер (with timed("filter", "search")) и как декоратор
+    (@timed("aggregate"), операция - имя функции). rows - функция от аргументов вызова,
+    возвращающая число обработанных строк (например len для первого аргумента).
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        operation: Optional[str] = None,
+        rows: Optional[Callable[..., int]] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.stage = stage
+        self.operation = operation
+        self.rows = rows
+        self.metrics = metrics
+
+    def __enter__(self) -> Timer:
+        self._timer = Timer(self.stage, self.operation or self.stage, self.metrics or METRICS)
+        return self._timer.__enter__()
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        self._timer.__exit__(exc_type, exc, traceback)
+
+    def __call__(self, func: Callable) -> Callable:
+        operation = self.operation or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # новый Timer на каждый вызов - декоратор безопасен для потоков и рекурсии
+            with Timer(self.stage, operation, self.metrics or METRICS) as timer:
+                if self.rows is not None:
+                    timer.rows = self.rows(*args, **kwargs)
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+def write_metrics(file_path: str, metrics: Optional[Metrics] = None) -> None:
+    """
+    Сохраняет метрики: .prom - в формате Prometheus, иначе JSON.
+    """
+    metrics = metrics or METRICS
+    with open(file_path, "w", encoding="utf-8") as f:
+        if file_path.endswith(".prom"):
+            f.write(metrics.to_prometheus())
+        else:
+            json.dump(metrics.snapshot(), f, indent=4, ensure_ascii=False)
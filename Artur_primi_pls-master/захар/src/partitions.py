@@ -0,0 +1,273 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.cache import read_columns, write_columns
+from src.cube import build_cube
+from src.date_index import CategoryDateIndex
+from src.metrics import timed
+from src.store import (
+    CATEGORY_COLUMNS,
+    MANIFEST_FILE,
+    TransactionStore,
+    combine_operations,
+    load_many,
+    load_operations,
+    resolve_sources,
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+UNDATED = "undated"
+# номер строки в порядке загрузки: части склеиваются обратно в порядке исходных выписок
+ROW_COLUMN = "row_id"
+
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    """
+    Манифест набора: для каждого месяца платежа - каталог части, число строк, первая и последняя
+    дата платежа и категории. Нет манифеста - пустой набор со случайным dataset_id: счетчик version
+    у пересозданного набора начинается заново, а dataset_id - уже другой.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest: Dict[str, Any] = json.load(f)
+    except FileNotFoundError:
+        return {
+            "format": MANIFEST_VERSION,
+            "dataset_id": uuid.uuid4().hex,
+            "version": 0,
+            "next_row": 0,
+            "partitions": {},
+        }
+    if manifest.get("format") != MANIFEST_VERSION:
+        raise ValueError(f"Неизвестный формат набора {directory}: {manifest.get('format')}")
+    return manifest
+
+
+def manifest_signature(manifest: Dict[str, Any]) -> str:
+    """
+    Версия набора для кешей хранилищ и ответов: dataset_id и номер записи манифеста.
+    """
+    return f"{manifest['dataset_id']}:{manifest['version']}"
+
+
+def _write_manifest(directory: str, manifest: Dict[str, Any]) -> None:
+    tmp_path = os.path.join(directory, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST_FILE))
+
+
+def partition_keys(frame: pd.DataFrame) -> pd.Series:
+    """
+    Месяц платежа каждой строки ("2024-06"), для строк без даты платежа - "undated".
+    """
+    if "data_payment" not in frame:
+        return pd.Series(UNDATED, index=frame.index)
+    # np.datetime_as_string в разы быстрее dt.strftime
+    dates = frame["data_payment"].to_numpy(dtype="datetime64[M]")
+    months = np.datetime_as_string(dates, unit="M").astype(object)
+    months[np.isnat(dates)] = UNDATED
+    return pd.Series(months, index=frame.index)
+
+
+def read_partition(directory: str, entry: Dict[str, Any]) -> pd.DataFrame:
+    return read_columns(os.path.join(directory, entry["directory"]), entry["columns"])
+
+
+def _concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    # у частей разные категории - склеиваем значения и снова делаем категории, как combine_operations
+    frames = [frame.astype({name: object for name in CATEGORY_COLUMNS if name in frame}) for frame in frames]
+    combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[ROW_COLUMN])
+    combined = combined.sort_values(ROW_COLUMN, kind="stable", ignore_index=True)
+    for name in CATEGORY_COLUMNS:
+        if name in combined:
+            combined[name] = combined[name].astype("category")
+    return combined.drop(columns=ROW_COLUMN)
+
+
+def ingest(directory: str, frame: pd.DataFrame) -> Dict[str, int]:
+    """
+    Раскладывает операции по частям месяцев платежа. Затронутые части переписываются
+    вместе со старыми строками (повторы той же операции из пересекающихся выписок убираются,
+    как в combine_operations), остальные не трогаются. Возвращает число новых строк по частям.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory)
+    frame = frame.assign(**{ROW_COLUMN: np.arange(len(frame), dtype=np.int64) + manifest["next_row"]})
+    keys = partition_keys(frame)
+    added: Dict[str, int] = {}
+    obsolete = []
+    version = manifest["version"] + 1
+    with timed("load", "ingest_partitions") as timer:
+        for key, rows in frame.groupby(keys.to_numpy(), sort=True):
+            entry = manifest["partitions"].get(key)
+            merged, new_rows = rows, len(rows)
+            if entry is not None:
+                combined = combine_operations([read_partition(directory, entry), rows], ["old", "new"])
+                new_rows = int((combined["source_file"] == "new").sum())
+                if not new_rows:
+                    continue
+                merged = combined.drop(columns="source_file")
+                obsolete.append(entry["directory"])
+            added[key] = new_rows
+            name = f"{key}.v{version}"
+            path = os.path.join(directory, name)
+            os.makedirs(path, exist_ok=True)
+            dates = merged["data_payment"].dropna() if "data_payment" in merged else pd.Series(dtype="datetime64[ns]")
+            categories = merged["category"].dropna().unique() if "category" in merged else []
+            manifest["partitions"][key] = {
+                "directory": name,
+                "rows": len(merged),
+                "min_date": dates.min().strftime("%Y-%m-%d") if len(dates) else None,
+                "max_date": dates.max().strftime("%Y-%m-%d") if len(dates) else None,
+                "categories": sorted(str(category) for category in categories),
+                "columns": write_columns(path, merged.reset_index(drop=True)),
+            }
+        timer.rows = sum(added.values())
+    manifest["version"] = version
+    manifest["next_row"] += len(frame)
+    manifest["partitions"] = dict(sorted(manifest["partitions"].items()))
+    _write_manifest(directory, manifest)
+    # старые каталоги частей удаляются только после записи нового манифеста
+    for name in obsolete:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    logger.info(f"В набор {directory} добавлено строк: {sum(added.values())}, частей затронуто: {len(added)}")
+    return added
+
+
+def ingest_statement(directory: str, file_path: str, workers: Optional[int] = None) -> Dict[str, int]:
+    """
+    Добавляет в набор выписку (файл, каталог или шаблон glob).
+    """
+    paths = resolve_sources(file_path)
+    if not paths or not all(os.path.exists(path) for path in paths):
+        raise FileNotFoundError(f"Не найдено выписок: {file_path}")
+    frame = load_operations(paths[0]) if len(paths) == 1 else load_many(paths, workers).drop(columns="source_file")
+    return ingest(directory, frame)
+
+
+def _overlaps(entry: Dict[str, Any], start: Any, end: Any) -> bool:
+    if entry["min_date"] is None:
+        return False
+    if start is not None and pd.Timestamp(entry["max_date"]) < pd.Timestamp(start).normalize():
+        return False
+    return end is None or pd.Timestamp(entry["min_date"]) <= pd.Timestamp(end)
+
+
+class PartitionedStore(TransactionStore):
+    """
+    Хранилище поверх набора помесячных частей. Запросы с границами дат (окна и суммы по категории)
+    открывают только части, которые по манифесту пересекаются с периодом и содержат категорию,
+    так что чтение и память растут с длиной периода, а не со всей историей. Вся история
+    читается только при обращении к frame (поиск, дашборд).
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        self.source = directory
+        self.version = f"partitions:{manifest_signature(self.manifest)}"
+        self._frame: Optional[pd.DataFrame] = None
+        self._search_index = None
+        self._date_index = None
+        self._cube = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(entry["rows"] for entry in self.manifest["partitions"].values())
+
+    def partitions_for(self, category: Any = None, start: Any = None, end: Any = None) -> List[str]:
+        """
+        Части, которые нужно открыть для запроса: пересекаются с [start, end] и содержат category.
+        Без границ нужны все части, включая строки без даты платежа.
+        """
+        keys = []
+        for key, entry in self.manifest["partitions"].items():
+            if category is not None and str(category) not in entry["categories"]:
+                continue
+            if (start is not None or end is not None) and not _overlaps(entry, start, end):
+                continue
+            keys.append(key)
+        return keys
+
+    def load(self, keys: List[str]) -> pd.DataFrame:
+        """
+        Строки частей keys в порядке загрузки выписок.
+        """
+        with timed("load", "read_partitions") as timer:
+            entries = [self.manifest["partitions"][key] for key in keys]
+            frame = _concat([read_partition(self.directory, entry) for entry in entries])
+            timer.rows = len(frame)
+        logger.info(f"Открыто частей {len(keys)} из {len(self.manifest['partitions'])}")
+        return frame
+
+    @property
+    def frame(self) -> pd.DataFrame:  # type: ignore[override]
+        if self._frame is None:
+            self._frame = self.load(list(self.manifest["partitions"]))
+        return self._frame
+
+    def owns(self, frame: pd.DataFrame) -> bool:
+        return self._frame is not None and self._frame is frame
+
+    def category_rows(self, category: Any, start: Any, end: Any, include_end: bool = True) -> pd.DataFrame:
+        part = self.load(self.partitions_for(category, start, end))
+        if part.empty:
+            return part
+        return part.take(CategoryDateIndex(part).rows(category, start, end, include_end))
+
+    def category_total(self, category: Any, measure: str, start: Any = None, end: Any = None) -> float:
+        part = self.load(self.partitions_for(category, start, end))
+        return build_cube(part).total("category", category, measure, start, end)
+
+    def append(self, rows: pd.DataFrame) -> None:
+        if rows.empty:
+            return
+        with self._lock:
+            ingest(self.directory, rows)
+            self.manifest = read_manifest(self.directory)
+            self._frame = self._search_index = self._date_index = self._cube = None
+            self.version = f"partitions:{manifest_signature(self.manifest)}"
+
+    def warm_up(self) -> None:
+        pass
+
+
+def main_partitions(argv: Optional[List[str]] = None) -> None:
+    """
+    ingest - добавить выписку в набор, info - части набора по манифесту.
+    """
+    parser = argparse.ArgumentParser(description="Набор выписок по месяцам")
+    parser.add_argument("command", choices=["ingest", "info"])
+    parser.add_argument("directory", help="каталог набора")
+    parser.add_argument("file_path", nargs="?", help="для ingest: выписка, каталог или шаблон glob")
+    parser.add_argument("--workers", type=int, help="процессов для разбора нескольких выписок")
+    args = parser.parse_args(argv)
+    if args.command == "ingest":
+        if not args.file_path:
+            parser.error("для ingest нужна выписка")
+        added = ingest_statement(args.directory, args.file_path, args.workers)
+        print(f"Добавлено строк: {sum(added.values())}, частей затронуто: {len(added)}")
+        return
+    for key, entry in read_manifest(args.directory)["partitions"].items():
+        print(
+            f"{key}: {entry['rows']} строк, {entry['min_date']}..{entry['max_date']}, категорий {len(entry['categories'])}"
+        )
+
+
+if __name__ == "__main__":
+    from src.utils import init_app
+
+    init_app()
+    main_partitions()
@@ -0,0 +1,184 @@
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.store import DATE_FORMATS, get_store, normalize_operations, to_records
+
+
+@dataclass(slots=True)
+class Transaction:
+    """
+    Одна операция выписки без словаря на строку. Поддерживает и доступ как к словарю
+    (transaction["transaction_amount"], get), чтобы код для списка словарей работал и с ней.
+    """
+
+    date_operation: Any = None
+    data_payment: Any = None
+    card_number: Any = None
+    status: Any = None
+    transaction_amount: float = np.nan
+    currency_operation: Any = None
+    payment_amount: float = np.nan
+    payment_currency: Any = None
+    cashback: float = np.nan
+    category: Any = None
+    MCC: float = np.nan
+    description: Any = None
+    bonuses_including_cashback: float = np.nan
+    rounding_investment_bank: float = np.nan
+    amount_rounding_operation: float = np.nan
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+FIELDS = [field.name for field in fields(Transaction)]
+ITER_CHUNK = 10_000
+
+
+class TransactionRecords:
+    """
+    Операции выписки в колонках (struct of arrays): суммы - float64, даты - datetime64,
+    строки (категория, карта, описание, статусы) - коды int32 в общую таблицу
+    интернированных строк. На строку уходит около сотни байт вместо словаря с 15 ключами.
+    """
+
+    def __init__(
+        self,
+        numbers: Dict[str, np.ndarray],
+        dates: Dict[str, np.ndarray],
+        codes: Dict[str, np.ndarray],
+        strings: Dict[str, np.ndarray],
+        order: List[str],
+    ) -> None:
+        self.numbers = numbers
+        self.dates = dates
+        self.codes = codes
+        self.strings = strings
+        self.order = order
+        self.size = len(next(iter({**numbers, **dates, **codes}.values()), []))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "TransactionRecords":
+        """
+        Колонки из типизированной таблицы (как в TransactionStore); категории берутся без копирования строк.
+        """
+        numbers, dates, codes, strings = {}, {}, {}, {}
+        for name in frame.columns:
+            column = frame[name]
+            if pd.api.types.is_datetime64_any_dtype(column):
+                dates[name] = column.to_numpy(dtype="datetime64[s]")
+            elif pd.api.types.is_float_dtype(column) or pd.api.types.is_integer_dtype(column):
+                numbers[name] = column.to_numpy(dtype="float64")
+            else:
+                if isinstance(column.dtype, pd.CategoricalDtype):
+                    column_codes, uniques = column.cat.codes.to_numpy(), column.cat.categories
+                else:
+                    column_codes, uniques = pd.factorize(column)
+                codes[name] = column_codes.astype(np.int32)
+                strings[name] = np.array(
+                    [sys.intern(value) if isinstance(value, str) else value for value in uniques], dtype=object
+                )
+        return cls(numbers, dates, codes, strings, list(frame.columns))
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "TransactionRecords":
+        """
+        Колонки из списка словарей в формате read_xlsx.
+        """
+        return cls.from_frame(normalize_operations(pd.DataFrame(records)))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def column(self, name: str) -> Union[np.ndarray, pd.Categorical]:
+        """
+        Колонка целиком: массив чисел или дат, для строк - Categorical поверх кодов (без копирования).
+        """
+        if name in self.numbers:
+            return self.numbers[name]
+        if name in self.dates:
+            return self.dates[name]
+        return pd.Categorical.from_codes(self.codes[name], categories=self.strings[name], validate=False)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Типизированная таблица (как в TransactionStore) - для векторных расчетов views.
+        """
+        return pd.DataFrame({name: self.column(name) for name in self.order}, copy=False)
+
+    def _value(self, name: str, row: int) -> Any:
+        if name in self.numbers:
+            return float(self.numbers[name][row])
+        if name in self.dates:
+            value = self.dates[name][row]
+            if np.isnat(value):
+                return np.nan
+            return pd.Timestamp(value).strftime(DATE_FORMATS.get(name, "%d.%m.%Y %H:%M:%S"))
+        code = self.codes[name][row]
+        return self.strings[name][code] if code >= 0 else np.nan
+
+    def __getitem__(self, row: int) -> Transaction:
+        if row < 0:
+            row += self.size
+        if not 0 <= row < self.size:
+            raise IndexError(row)
+        transaction = Transaction()
+        for name in self.order:
+            if name in FIELDS:
+                setattr(transaction, name, self._value(name, row))
+        return transaction
+
+    def _values(self, name: str, start: int, stop: int) -> List[Any]:
+        # значения колонки для строк start..stop - векторно, а не по одной строке
+        if name in self.numbers:
+            return self.numbers[name][start:stop].tolist()
+        if name in self.dates:
+            date_format = DATE_FORMATS.get(name, "%d.%m.%Y %H:%M:%S")
+            return pd.Series(self.dates[name][start:stop]).dt.strftime(date_format).tolist()
+        if name in self.codes:
+            table = np.append(self.strings[name], np.nan)
+            return table[self.codes[name][start:stop]].tolist()
+        return [Transaction.__dataclass_fields__[name].default] * (stop - start)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for start in range(0, self.size, ITER_CHUNK):
+            stop = min(start + ITER_CHUNK, self.size)
+            columns = [self._values(name, start, stop) for name in FIELDS]
+            for values in zip(*columns):
+                yield Transaction(*values)
+
+    def to_records(self, rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Строки (все или с номерами rows) списком словарей в формате read_xlsx.
+        """
+        frame = self.to_frame()
+        return to_records(frame if rows is None else frame.take(rows))
+
+    def nbytes(self) -> int:
+        """
+        Память под колонки и таблицы строк, байт.
+        """
+        total = sum(array.nbytes for group in (self.numbers, self.dates, self.codes) for array in group.values())
+        for table in self.strings.values():
+            total += table.nbytes + sum(sys.getsizeof(value) for value in table if isinstance(value, str))
+        return total
+
+
+def read_records(file_path: str) -> TransactionRecords:
+    """
+    Компактная замена utils.read_xlsx: операции файла (каталога, шаблона) колонками, а не списком словарей.
+    """
+    return TransactionRecords.from_frame(get_store(file_path).frame)
@@ -1,55 +1,73 @@
-import json
+import logging
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Union
 
 import pandas as pd
 
-from src.utils import liggin
+from src.json_writer import write_records
+from src.metrics import timed
+from src.result_cache import QUERY_CACHE
+from src.store import DATA_PATH, TransactionStore, get_store, is_database, is_dataset, store_of, to_records
+from src.utils import init_app
 
-logger = liggin()
+logger = logging.getLogger(__name__)
 
 
 def read_xlsx(file_path: str) -> pd.DataFrame:
     """
-    Чтение операций из XLS-файла.
+    Чтение операций из XLS-файла (через общее хранилище операций).
     """
     logger.info(f"Чтение данных из файла {file_path}")
     try:
-        return pd.read_excel(file_path)
+        return get_store(file_path).frame
     except FileNotFoundError:
         logger.error(f"Файл {file_path} не обнаружен")
         return pd.DataFrame()
 
 
-def filter_by_category_date(transactions: pd.DataFrame, category: str, start_date: str) -> Any:
+def filter_by_category_date(transactions: Union[pd.DataFrame, TransactionStore], category: str, start_date: str) -> Any:
     """
     Фильтрация  по категории и дате, выводит уже отфильтрованные транзакции
+    (повторный запрос к тем же данным - из кеша ответов). Вместо таблицы можно передать
+    хранилище - для базы SQLite окно выбирается запросом по индексу (category, data_payment).
     """
-    end_date = datetime.strptime(start_date, "%d.%m.%Y") + timedelta(days=90)
-    filtered_transactions = transactions[
-        (transactions["category"] == category)
-        & (transactions["data_payment"] >= start_date)
-        & (transactions["data_payment"] < end_date.strftime("d.%m.%Y"))
-    ]
-    return filtered_transactions.to_dict("records")
+    return QUERY_CACHE.get_or_compute(
+        "reports",
+        {"category": category, "start_date": start_date},
+        store_of(transactions),
+        lambda: to_records(select_by_category_date(transactions, category, start_date)),
+    )
 
 
-def main_reports() -> None:
+@timed("filter", rows=lambda transactions, *args, **kwargs: len(transactions))
+def select_by_category_date(
+    transactions: Union[pd.DataFrame, TransactionStore], category: str, start_date: str
+) -> pd.DataFrame:
+    """
+    То же, что filter_by_category_date, но строками таблицы - для потоковой записи в файл.
+    """
+    start = datetime.strptime(start_date, "%d.%m.%Y")
+    end_date = start + timedelta(days=90)
+    return store_of(transactions).category_rows(category, start, end_date, include_end=False)
+
+
+def main_reports(file_path: str = DATA_PATH) -> None:
     """
     функция обеденяющея весь модуль reports(ВСЕ ФУНКЦИИ МОДУЛЯ REPORTS)
     """
-    operations = read_xlsx("../data/operations_mi.xls")
+    # базу SQLite и набор по месяцам не читаем целиком - окно выберет запрос к базе или нужные месяцы
+    operations = get_store(file_path) if is_database(file_path) or is_dataset(file_path) else read_xlsx(file_path)
     category = input("Напишите категорию: ")
     start_date = input("Напешите дату (от каторой надо считать) 3-месячного периода (например 01.01.2001): ")
 
-    filtered_operations = filter_by_category_date(operations, category, start_date)
-
-    with open("reports.json", "w", encoding="utf-8") as f:
-        json.dump(filtered_operations, f, indent=4, ensure_ascii=False)
+    filtered_operations = select_by_category_date(operations, category, start_date)
+    # строки пишутся в файл частями, без полного списка словарей в памяти
+    write_records("reports.json", filtered_operations)
 
     logger.info("Отфильтрованные операции записаны сюда reports.json")
     print("Отфильтрованные операции записаны сюда reports.json")
 
 
 if __name__ == "__main__":
+    init_app()
     main_reports()
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 1024
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class ResultCache:
+    """
+    Кеш готовых ответов (поиск, траты по категории, отчеты) в виде JSON-текста: LRU в памяти
+    с ограничением по числу записей и по размеру и необязательный второй уровень на диске.
+    Ключ - вид запроса, нормализованные параметры и версия хранилища операций, так что после
+    загрузки новой выписки (или TransactionStore.append) старые ответы просто перестают находиться.
+    """
+
+    def __init__(
+        self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES, directory: Optional[str] = None
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = self.bypass = self.evictions = 0
+
+    @staticmethod
+    def key(kind: str, params: Dict[str, Any], store: Any) -> Optional[str]:
+        """
+        Ключ запроса или None, если у хранилища нет версии (таблица не из файла) - такое не кешируется.
+        """
+        version = getattr(store, "version", "")
+        if not version:
+            return None
+        text = json.dumps([kind, params, getattr(store, "source", None), version], sort_keys=True, default=str)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.directory or "", f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+        if self.directory:
+            try:
+                with open(self._disk_path(key), encoding="utf-8") as f:
+                    text = f.read()
+            except OSError:
+                text = None
+            if text is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, text)
+                return text
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key: str, text: str) -> None:
+        size = len(text)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = text
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def set(self, key: str, text: str) -> None:
+        self._remember(key, text)
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                path = self._disk_path(key)
+                # пишем во временный файл и переименовываем, чтобы не прочитать половину ответа
+                with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(f"{path}.tmp", path)
+            except OSError as e:
+                logger.warning(f"Не удалось записать ответ в кеш {self.directory}: {e}")
+
+    def get_or_compute(
+        self, kind: str, params: Dict[str, Any], store: Any, compute: Callable[[], Any], as_text: bool = False
+    ) -> Any:
+        """
+        Ответ из кеша, а если его нет - compute() с сохранением. as_text - compute возвращает
+        готовую JSON-строку (она и кешируется); иначе значение хранится через json.dumps
+        и при попадании возвращается новой копией.
+        """
+        key = self.key(kind, params, store)
+        if key is None:
+            with self._lock:
+                self.bypass += 1
+            return compute()
+        text = self.get(key)
+        if text is not None:
+            return text if as_text else json.loads(text)
+        value = compute()
+        self.set(key, value if as_text else json.dumps(value, ensure_ascii=False))
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Попадания (в памяти и на диске), промахи, вытеснения, незакешируемые запросы и объем.
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypass": self.bypass,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "directory": self.directory,
+            }
+
+    def clear(self, disk: bool = True) -> None:
+        """
+        Очищает кеш в памяти, счетчики и (disk=True) каталог на диске.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = self.bypass = self.evictions = 0
+        if disk and self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+QUERY_CACHE = ResultCache()
+
+
+def configure_cache(
+    max_entries: Optional[int] = None, max_bytes: Optional[int] = None, directory: Optional[str] = None
+) -> ResultCache:
+    """
+    Меняет ограничения общего кеша ответов и включает дисковый уровень (directory).
+    """
+    if max_entries is not None:
+        QUERY_CACHE.max_entries = max_entries
+    if max_bytes is not None:
+        QUERY_CACHE.max_bytes = max_bytes
+    if directory is not None:
+        QUERY_CACHE.directory = directory
+    return QUERY_CACHE
@@ -0,0 +1,367 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "search_index.npz"
+SEARCH_COLUMNS = ["description", "category"]
+# нечеткий поиск: минимальная похожесть слова (0..1), допустимые опечатки, размер выдачи
+FUZZY_THRESHOLD = 0.6
+MAX_EDITS = 2
+FUZZY_LIMIT = 20
+
+VOWELS = set("аеиоуыэюя")
+REFLEXIVE_ENDINGS = ["ся", "сь"]
+# окончания существительных, прилагательных и глаголов - от длинных к коротким
+WORD_ENDINGS = sorted(
+    (
+        "иями ями ами иях ях ах ием ем ом ой ей ий ый ая яя ое ее ые ие ого его ому ему ыми ими ую юю "
+        "ов ев ам ям ия ья ье ию ью ешь ете ить ать ять еть ть ы и а я о е у ю ь"
+    ).split(),
+    key=len,
+    reverse=True,
+)
+
+
+def normalize_text(text: Any) -> str:
+    """
+    Приводит строку к виду для поиска: casefold (работает и для кириллицы) и ё -> е.
+    """
+    return str(text).casefold().replace("ё", "е")
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Все подстроки длины 3.
+    """
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def words(text: str) -> List[str]:
+    """
+    Слова нормализованной строки (буквы и цифры), без знаков препинания.
+    """
+    return "".join(char if char.isalnum() else " " for char in text).split()
+
+
+def stem_ru(word: str) -> str:
+    """
+    Упрощенный стеммер для русского: после первой гласной отрезает возвратную частицу
+    и самое длинное окончание ("обеды" -> "обед", "аптеки" -> "аптек"). Латиница не меняется.
+    """
+    start = next((i + 1 for i, char in enumerate(word) if char in VOWELS), len(word))
+    tail = word[start:]
+    for endings in (REFLEXIVE_ENDINGS, WORD_ENDINGS):
+        for ending in endings:
+            if tail.endswith(ending):
+                tail = tail[: -len(ending)]
+                break
+    return word[:start] + tail
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Расстояние Левенштейна, если оно не больше limit, иначе limit + 1 (счет обрывается раньше).
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+def word_similarity(a: str, b: str, max_edits: int = MAX_EDITS) -> float:
+    """
+    Похожесть слов от 0 до 1: лучшее из коэффициента Дайса по триграммам (с границами слова)
+    и 1 - опечатки / длина, если опечаток не больше max_edits.
+    """
+    if a == b:
+        return 1.0
+    grams_a, grams_b = trigrams(f" {a} "), trigrams(f" {b} ")
+    score = 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+    distance = edit_distance(a, b, max_edits)
+    if distance <= max_edits:
+        score = max(score, 1 - distance / max(len(a), len(b)))
+    return score
+
+
+class Automaton:
+    """
+    Автомат Ахо-Корасик: за один проход по строке находит все образцы, которые в ней встречаются.
+    """
+
+    def __init__(self, patterns: List[str]) -> None:
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.out[state].append(pattern_id)
+        # ссылки неудач строятся обходом в ширину, у детей корня они ведут в корень
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0) if state else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, text: str) -> Set[int]:
+        """
+        Номера образцов, встречающихся в text.
+        """
+        found: Set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            found.update(self.out[state])
+        return found
+
+
+class SearchIndex:
+    """
+    Инвертированный индекс по описанию и категории: словарь различных значений,
+    для каждого значения - номера строк, и триграммы значений для поиска подстрок.
+    """
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.terms: List[str] = []
+        self.term_ids: Dict[str, int] = {}
+        self.postings: List[np.ndarray] = []
+        self.grams: Dict[str, Set[int]] = {}
+        # словарь отдельных слов для нечеткого поиска, строится при первом нечетком запросе
+        self.words: Optional[List[str]] = None
+        self.word_ids: Dict[str, int] = {}
+        self.word_terms: List[Set[int]] = []
+        self.word_grams: Dict[str, Set[int]] = {}
+        self._words_lock = threading.Lock()
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.terms.append(term)
+            self.term_ids[term] = term_id
+            self.postings.append(np.empty(0, dtype=np.int64))
+            for gram in trigrams(term):
+                self.grams.setdefault(gram, set()).add(term_id)
+            if self.words is not None:
+                self._add_words(term_id)
+        return term_id
+
+    def _add_words(self, term_id: int) -> None:
+        assert self.words is not None
+        for word in words(self.terms[term_id]):
+            word_id = self.word_ids.get(word)
+            if word_id is None:
+                word_id = self.word_ids[word] = len(self.words)
+                self.words.append(word)
+                self.word_terms.append(set())
+                for gram in trigrams(f" {word} "):
+                    self.word_grams.setdefault(gram, set()).add(word_id)
+            self.word_terms[word_id].add(term_id)
+
+    def _word_index(self) -> List[str]:
+        with self._words_lock:
+            if self.words is None:
+                self.words = []
+                for term_id in range(len(self.terms)):
+                    self._add_words(term_id)
+        return self.words
+
+    def add(self, frame: pd.DataFrame) -> None:
+        """
+        Добавляет в индекс строки таблицы; номера строк продолжают уже проиндексированные.
+        """
+        if frame.empty:
+            return
+        row_ids = []
+        term_codes = []
+        for name in SEARCH_COLUMNS:
+            # нормализуем только различные значения, а не каждую строку
+            codes, uniques = pd.factorize(frame[name])
+            mapping = np.array([self._term_id(normalize_text(value)) for value in uniques], dtype=np.int64)
+            present = codes >= 0
+            row_ids.append(np.flatnonzero(present) + self.rows)
+            term_codes.append(mapping[codes[present]])
+        all_rows = np.concatenate(row_ids)
+        all_terms = np.concatenate(term_codes)
+        order = np.lexsort((all_rows, all_terms))
+        all_rows, all_terms = all_rows[order], all_terms[order]
+        bounds = np.flatnonzero(np.diff(all_terms)) + 1
+        starts = np.concatenate(([0], bounds))
+        for start, term_rows in zip(starts, np.split(all_rows, bounds)):
+            term_id = int(all_terms[start])
+            self.postings[term_id] = np.union1d(self.postings[term_id], term_rows)
+        self.rows += len(frame)
+
+    def matching_terms(self, query: str) -> List[int]:
+        """
+        Номера значений словаря, содержащих подстроку query.
+        """
+        needle = normalize_text(query)
+        if len(needle) < 3:
+            candidates: Iterable[int] = range(len(self.terms))
+        else:
+            sets = sorted((self.grams.get(gram, set()) for gram in trigrams(needle)), key=len)
+            candidates = set.intersection(*sets)
+        return sorted(term_id for term_id in candidates if needle in self.terms[term_id])
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Номера строк (по возрастанию), у которых описание или категория содержит query.
+        """
+        if not query:
+            return np.arange(self.rows, dtype=np.int64)
+        found = [self.postings[term_id] for term_id in self.matching_terms(query)]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def fuzzy_terms(
+        self, query: str, stem: bool = False, threshold: float = FUZZY_THRESHOLD, max_edits: int = MAX_EDITS
+    ) -> List[Tuple[int, float]]:
+        """
+        Значения словаря, похожие на query, с оценкой 0..1 по убыванию. Каждое слово запроса
+        сравнивается только со словами словаря, у которых есть общая триграмма (или общая основа
+        при stem), оценка значения - средняя по словам запроса лучшая похожесть.
+        """
+        vocabulary = self._word_index()
+        query_words = words(normalize_text(query))
+        if not query_words:
+            return []
+        totals: Dict[int, float] = {}
+        for query_word in query_words:
+            needle = stem_ru(query_word) if stem else query_word
+            candidates: Set[int] = set()
+            for gram in trigrams(f" {needle} " if not stem else f" {needle}"):
+                candidates |= self.word_grams.get(gram, set())
+            best: Dict[int, float] = {}
+            for word_id in candidates:
+                word = vocabulary[word_id]
+                score = word_similarity(needle, stem_ru(word) if stem else word, max_edits)
+                if score >= threshold:
+                    for term_id in self.word_terms[word_id]:
+                        best[term_id] = max(best.get(term_id, 0.0), score)
+            for term_id, score in best.items():
+                totals[term_id] = totals.get(term_id, 0.0) + score
+        ranked = [(term_id, total / len(query_words)) for term_id, total in totals.items()]
+        ranked = [(term_id, score) for term_id, score in ranked if score >= threshold]
+        return sorted(ranked, key=lambda item: (-item[1], item[0]))
+
+    def fuzzy_search(
+        self,
+        query: str,
+        limit: int = FUZZY_LIMIT,
+        stem: bool = False,
+        threshold: float = FUZZY_THRESHOLD,
+        max_edits: int = MAX_EDITS,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Нечеткий поиск: номера не более limit строк и их оценки, лучшие сначала
+        (при равной оценке - в порядке выписки). Строка получает оценку лучшего из своих значений.
+        """
+        scores = np.zeros(self.rows)
+        for term_id, score in self.fuzzy_terms(query, stem, threshold, max_edits):
+            rows = self.postings[term_id]
+            scores[rows] = np.maximum(scores[rows], score)
+        found = np.flatnonzero(scores)
+        order = np.lexsort((found, -scores[found]))[:limit]
+        return found[order], scores[found[order]]
+
+    def search_many(self, queries: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Номера строк для каждого запроса; словарь значений проходится один раз для всех запросов.
+        """
+        needles = sorted({normalize_text(query) for query in queries if query})
+        automaton = Automaton(needles)
+        hits: List[List[int]] = [[] for _ in needles]
+        for term_id, term in enumerate(self.terms):
+            for needle_id in automaton.find(term):
+                hits[needle_id].append(term_id)
+        by_needle = {}
+        for needle, term_ids in zip(needles, hits):
+            found = [self.postings[term_id] for term_id in term_ids]
+            by_needle[needle] = np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+        return {
+            query: by_needle[normalize_text(query)] if query else np.arange(self.rows, dtype=np.int64)
+            for query in queries
+        }
+
+    def save(self, path: str, version: str) -> None:
+        """
+        Сохраняет индекс на диск вместе с версией данных, по которым он построен.
+        """
+        lengths = np.array([len(rows) for rows in self.postings], dtype=np.int64)
+        postings = np.concatenate(self.postings) if self.postings else np.empty(0, dtype=np.int64)
+        header = json.dumps({"version": version, "rows": self.rows, "terms": self.terms}, ensure_ascii=False)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, header=np.array(header), lengths=lengths, postings=postings)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, version: str) -> Optional["SearchIndex"]:
+        """
+        Загружает индекс с диска; None, если его нет или он построен по другим данным.
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                header = json.loads(str(data["header"]))
+                lengths = data["lengths"]
+                postings = data["postings"]
+        except (OSError, ValueError, KeyError):
+            return None
+        if header["version"] != version:
+            return None
+        index = cls()
+        for term in header["terms"]:
+            index._term_id(term)
+        index.postings = np.split(postings, np.cumsum(lengths)[:-1]) if len(lengths) else []
+        index.rows = header["rows"]
+        return index
+
+
+def open_index(frame: pd.DataFrame, path: Optional[str] = None, version: str = "") -> SearchIndex:
+    """
+    Берет индекс с диска, если он построен по этой же версии данных, иначе строит заново
+    (и сохраняет, если указан путь). Строки, добавленные после сохранения, доиндексируются.
+    """
+    index = SearchIndex.load(path, version) if path and version else None
+    if index is None or index.rows > len(frame):
+        index = SearchIndex()
+    rows_before = index.rows
+    if rows_before < len(frame):
+        index.add(frame.iloc[rows_before:])
+        logger.info(f"Проиндексировано строк для поиска: {len(frame) - rows_before}")
+        if path and version:
+            try:
+                index.save(path, version)
+            except OSError as e:
+                logger.warning(f"Не удалось сохранить поисковый индекс {path}: {e}")
+    return index
@@ -0,0 +1,161 @@
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.json_writer import json_safe
+from src.metrics import METRICS
+from src.reports import filter_by_category_date
+from src.result_cache import QUERY_CACHE
+from src.search_index import FUZZY_LIMIT
+from src.services import category_expenses, find_transactions
+from src.store import DATA_PATH, get_store
+from src.views import build_dashboard, get_greet
+
+logger = logging.getLogger(__name__)
+
+HOST = "127.0.0.1"
+PORT = 8000
+
+
+def api_greeting(file_path: str, date_time: Optional[str] = None) -> Dict[str, Any]:
+    return {"greeting": get_greet(date_time)}
+
+
+def api_dashboard(file_path: str, date_time: Optional[str] = None, currency: Optional[str] = None) -> Dict[str, Any]:
+    return build_dashboard(date_time, file_path, currency=currency)
+
+
+def api_search(
+    file_path: str, q: str, fuzzy: Optional[str] = None, limit: Optional[str] = None, stem: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    if not fuzzy:
+        return find_transactions(q, file_path)
+    return find_transactions(q, file_path, fuzzy=True, limit=int(limit or FUZZY_LIMIT), stem=bool(stem))
+
+
+def api_category(
+    file_path: str, category: str, date: Optional[str] = None, currency: Optional[str] = None
+) -> Dict[str, Any]:
+    return category_expenses(get_store(file_path), category, date, currency)
+
+
+def api_reports(file_path: str, category: str, start_date: str) -> List[Dict[str, Any]]:
+    return filter_by_category_date(get_store(file_path), category, start_date)
+
+
+def api_health(file_path: str) -> Dict[str, Any]:
+    return {"status": "ok", "operations": len(get_store(file_path))}
+
+
+def api_metrics(file_path: str, format: Optional[str] = None) -> Any:
+    # format=prometheus - текстом для Prometheus, иначе JSON
+    if format == "prometheus":
+        return METRICS.to_prometheus()
+    return METRICS.snapshot()
+
+
+def api_cache(file_path: str) -> Dict[str, Any]:
+    return QUERY_CACHE.stats()
+
+
+# путь -> (обработчик, обязательные параметры, необязательные параметры)
+ROUTES: Dict[str, Tuple[Callable[..., Any], List[str], List[str]]] = {
+    "/greeting": (api_greeting, [], ["date_time"]),
+    "/dashboard": (api_dashboard, [], ["date_time", "currency"]),
+    "/search": (api_search, ["q"], ["fuzzy", "limit", "stem"]),
+    "/category": (api_category, ["category"], ["date", "currency"]),
+    "/reports": (api_reports, ["category", "start_date"], []),
+    "/health": (api_health, [], []),
+    "/metrics": (api_metrics, [], ["format"]),
+    "/cache": (api_cache, [], []),
+}
+
+
+def handle_request(path: str, params: Dict[str, str], file_path: str = DATA_PATH) -> Tuple[int, Any]:
+    """
+    Выполняет запрос к API и возвращает HTTP-статус и тело ответа (то же, что отдают функции модулей).
+    """
+    route = ROUTES.get(path.rstrip("/") or "/")
+    if route is None:
+        return 404, {"error": f"Неизвестный путь: {path}"}
+    handler, required, optional = route
+    missing = [name for name in required if not params.get(name)]
+    if missing:
+        return 400, {"error": f"Не заданы параметры: {', '.join(missing)}"}
+    kwargs = {name: params[name] for name in required + optional if params.get(name)}
+    try:
+        return 200, handler(file_path, **kwargs)
+    except FileNotFoundError as e:
+        logger.error(f"Нет данных для {path}: {e}")
+        return 503, {"error": f"Файл с операциями не найден: {file_path}"}
+    except ValueError as e:
+        return 400, {"error": f"Неверный параметр: {e}"}
+    except Exception as e:
+        logger.exception(f"Ошибка при обработке {path}")
+        return 500, {"error": f"Произошла ошибка: {e}"}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """
+    GET-запросы к API; каждый запрос обслуживается в своем потоке.
+    """
+
+    server: "ApiServer"
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        status, body = handle_request(url.path, params, self.server.file_path)
+        if isinstance(body, str):
+            content_type, payload = "text/plain; version=0.0.4; charset=utf-8", body.encode("utf-8")
+        else:
+            content_type = "application/json; charset=utf-8"
+            payload = json.dumps(json_safe(body), indent=4, ensure_ascii=False, allow_nan=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+class ApiServer(ThreadingHTTPServer):
+    """
+    HTTP-сервер, который держит хранилище операций загруженным между запросами.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, file_path: str = DATA_PATH, host: str = HOST, port: int = PORT) -> None:
+        super().__init__((host, port), ApiHandler)
+        self.file_path = file_path
+
+
+def warm_up(file_path: str = DATA_PATH) -> None:
+    """
+    Загружает хранилище и строит индексы заранее, чтобы первые запросы не ждали разбора выписки.
+    """
+    store = get_store(file_path)
+    store.warm_up()
+    logger.info(f"Загружено операций: {len(store)}")
+
+
+def serve(file_path: str = DATA_PATH, host: str = HOST, port: int = PORT) -> None:
+    """
+    Запускает API: GET /greeting, /dashboard, /search?q=(&fuzzy=1&limit=&stem=1), /category?category=&date=,
+    /reports?category=&start_date=, /health, /metrics (?format=prometheus), /cache.
+    """
+    try:
+        warm_up(file_path)
+    except FileNotFoundError:
+        logger.error(f"Файл {file_path} не найден, данные загрузятся при первом запросе")
+    with ApiServer(file_path, host, port) as server:
+        print(f"API запущен на http://{host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -1,33 +1,85 @@
 import json
+import logging
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 
-from src.utils import liggin
+from src.cube import build_cube
+from src.fx import get_rates, to_currency
+from src.json_writer import dumps_records, write_json
+from src.metrics import timed
+from src.result_cache import QUERY_CACHE
+from src.search_index import FUZZY_LIMIT, normalize_text
+from src.store import DATA_PATH, TransactionStore, get_store, store_of, to_records
+from src.utils import init_app
 
-logger = liggin()
+logger = logging.getLogger(__name__)
 
 
-def get_keyword(search_t: str) -> str:
+def find_transactions(
+    search_t: str, file_path: str = DATA_PATH, fuzzy: bool = False, limit: int = FUZZY_LIMIT, stem: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Транзакции, содержащие search_t в описании или категории, списком словарей
+    (или одно сообщение, если ничего не найдено). Повторный запрос к тем же данным берется из кеша.
+    fuzzy - нечеткий поиск (опечатки, другие формы слова с stem): не больше limit самых
+    похожих транзакций, у каждой оценка похожести score.
+    """
+    store = get_store(file_path)
+    params = _search_params(search_t, fuzzy, limit, stem)
+    return QUERY_CACHE.get_or_compute(
+        "search", params, store, lambda: _search_records(store, search_t, fuzzy, limit, stem)
+    )
+
+
+def _search_params(search_t: str, fuzzy: bool, limit: int, stem: bool) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"q": normalize_text(search_t)}
+    if fuzzy:
+        params.update(fuzzy=True, limit=limit, stem=stem)
+    return params
+
+
+def _search_records(
+    store: TransactionStore, search_t: str, fuzzy: bool = False, limit: int = FUZZY_LIMIT, stem: bool = False
+) -> List[Dict[str, Any]]:
+    with timed("filter", "fuzzy_search" if fuzzy else "find_transactions") as timer:
+        timer.rows = len(store)
+        if fuzzy:
+            rows, scores = store.search_index().fuzzy_search(search_t, limit, stem)
+            trans_list = to_records(store.frame.take(rows))
+            for record, score in zip(trans_list, scores):
+                record["score"] = round(float(score), 3)
+        else:
+            trans_list = to_records(store.search(search_t))
+    if not trans_list:
+        trans_list = [{"message": "Слово не найдено ни где"}]
+    return trans_list
+
+
+def get_keyword(
+    search_t: str, file_path: str = DATA_PATH, fuzzy: bool = False, limit: int = FUZZY_LIMIT, stem: bool = False
+) -> str:
     """
     Возвращает JSON-ответ с транзакциями, содержащими search_t в описании или категории.
+    file_path - файл, каталог или шаблон glob с выписками.
+    fuzzy=True - нечеткий поиск ("Магнт" найдет "Магнит", с stem=True "обеды" найдет "обед"):
+    не больше limit транзакций, самые похожие первыми.
     """
     logger.info(f"Поиск по ключевому слову: {search_t}")
     try:
-        file_path = "../data/operations_mi.xls"
-        data = pd.read_excel(file_path)
-        data["description"] = data["description"].astype(str)
-        data["category"] = data["category"].astype(str)
-        filtered_data = data[
-            data["description"].str.contains(search_t, case=False) | data["category"].str.contains(search_t, case=False)
-        ]
-        trans_list = filtered_data.to_dict(orient="records")
-        if not trans_list:
-            trans_list = [{"message": "Слово не найдено ни где"}]
-        json_response = json.dumps(trans_list, indent=4, ensure_ascii=False)
+        store = get_store(file_path)
+        # сериализуем один раз: та же строка уходит и в файл, и в ответ, и в кеш ответов
+        json_response = QUERY_CACHE.get_or_compute(
+            "keyword",
+            _search_params(search_t, fuzzy, limit, stem),
+            store,
+            lambda: dumps_records(_search_records(store, search_t, fuzzy, limit, stem)),
+            as_text=True,
+        )
         with open("services.json", "w", encoding="utf-8") as f:
-            json.dump(trans_list, f, indent=4, ensure_ascii=False)
+            f.write(json_response)
         logger.info("Результаты поиска записаны в файл services.json")
         return json_response
     except FileNotFoundError:
@@ -38,43 +90,107 @@ def get_keyword(search_t: str) -> str:
         return json.dumps({"error": f"Произошла ошибка: {str(e)}"}, indent=4, ensure_ascii=False)
 
 
-def get_expen_by_categ(transaction: pd.DataFrame, category: str, report_date: Optional[str] = None) -> str:
+def search_many(
+    queries: List[str], output_file: str = "services_batch.json", file_path: str = DATA_PATH
+) -> Dict[str, Dict[str, Any]]:
     """
-    Выдает траты по категории за последние 3 месяца от указанной даты(этого его старт ,
-     все что раньше этой даты он не берет.
+    Поиск сразу по многим словам за один проход по данным.
+    Возвращает для каждого слова число найденных транзакций и сами транзакции,
+    все результаты пишутся одним файлом.
+    """
+    logger.info(f"Пакетный поиск по {len(queries)} словам")
+    store = get_store(file_path)
+    with timed("filter", "search_many") as timer:
+        timer.rows = len(store)
+        found = store.search_index().search_many(queries)
+    # каждую строку переводим в словарь один раз, даже если ее нашли несколько запросов
+    all_rows = np.unique(np.concatenate(list(found.values()))) if found else np.empty(0, dtype=np.int64)
+    all_records = to_records(store.frame.take(all_rows))
+    results = {}
+    for query, rows in found.items():
+        positions = np.searchsorted(all_rows, rows)
+        results[query] = {"count": len(rows), "transactions": [all_records[i] for i in positions]}
+    write_json(output_file, results)
+    logger.info(f"Результаты пакетного поиска записаны в файл {output_file}")
+    return results
+
+
+def category_expenses(
+    transaction: Union[pd.DataFrame, TransactionStore],
+    category: str,
+    report_date: Optional[str] = None,
+    currency: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Траты по категории за 3 месяца до report_date (YYYY-MM-DD, по умолчанию сегодня) словарем.
+    currency - сумма в этой валюте по курсам на даты платежей (src/fx.py).
+    Для таблицы из хранилища ответ кешируется до загрузки новых данных (или новых курсов);
+    хранилище можно передать и само - для базы SQLite сумма считается запросом к базе.
     """
     report_date_dt = datetime.strptime(report_date, "%Y-%m-%d") if report_date else datetime.now()
     logger.info(
         f"Расчет трат по категории: {category} за период  {report_date_dt - pd.DateOffset(months=3)}--{report_date_dt}"
     )
-    transaction["data_payment"] = pd.to_datetime(transaction["data_payment"], format="%d.%m.%Y")
-    filtered_transactions = transaction[
-        (transaction["category"] == category)
-        & (transaction["data_payment"] >= report_date_dt - pd.DateOffset(months=3))
-        & (transaction["data_payment"] <= report_date_dt)
-    ]
-    total_expenses = filtered_transactions["payment_amount"].sum()
-    result = json.dumps(
-        {"category": category, "total_expenses": total_expenses, "report_date": str(report_date_dt.date())},
-        indent=4,
-        ensure_ascii=False,
+    params: Dict[str, Any] = {"category": category, "report_date": str(report_date_dt.date())}
+    if currency is not None:
+        params.update(currency=currency.upper(), rates=get_rates().version)
+    return QUERY_CACHE.get_or_compute(
+        "category",
+        params,
+        store_of(transaction),
+        lambda: _category_expenses(transaction, category, report_date_dt, currency),
     )
+
+
+@timed("aggregate", "category_expenses", rows=lambda transaction, *args, **kwargs: len(transaction))
+def _category_expenses(
+    transaction: Union[pd.DataFrame, TransactionStore],
+    category: str,
+    report_date_dt: datetime,
+    currency: Optional[str] = None,
+) -> Dict[str, Any]:
+    start = report_date_dt - pd.DateOffset(months=3)
+    store = store_of(transaction)
+    if currency is None:
+        total_expenses = store.category_total(category, "payment_amount", start, report_date_dt)
+    else:
+        # в чужой валюте куб строится по пересчитанной копии, а не берется из хранилища
+        cube = build_cube(to_currency(store.frame, currency))
+        total_expenses = cube.total("category", category, "payment_amount", start, report_date_dt)
+    result = {"category": category, "total_expenses": total_expenses, "report_date": str(report_date_dt.date())}
+    if currency is not None:
+        result["currency"] = currency.upper()
+    return result
+
+
+def get_expen_by_categ(
+    transaction: Union[pd.DataFrame, TransactionStore],
+    category: str,
+    report_date: Optional[str] = None,
+    currency: Optional[str] = None,
+) -> str:
+    """
+    Выдает траты по категории за последние 3 месяца от указанной даты(этого его старт ,
+     все что раньше этой даты он не берет. currency - в какой валюте считать.
+    """
+    result = json.dumps(category_expenses(transaction, category, report_date, currency), indent=4, ensure_ascii=False)
     logger.info(f"Результаты расчета: {result}")
     return result
 
 
-def main_services() -> None:
+def main_services(file_path: str = DATA_PATH) -> None:
     """
     Основная функция модуля, которая обьединяет все в модуле services
     """
     # Пример использования:
     print("Ведите слово для поиска например : обед")
     search_1 = input()
-    json_result = get_keyword(search_1)
+    json_result = get_keyword(search_1, file_path)
     print(json_result)
 
     # Пример использования функции get_expenses_by_category
-    transactions_df = pd.read_excel("../data/operations_mi.xls")
+    # само хранилище, а не его таблица: у базы SQLite сумма считается запросом без чтения всей таблицы
+    transactions_df = get_store(file_path)
     print("Ведите слово для поиска например : обед")
     category_to_check = input()
     print("Ведите дату для поиска например : 2222-33-44")
@@ -84,4 +200,5 @@ def main_services() -> None:
 
 
 if __name__ == "__main__":
+    init_app()
     main_services()
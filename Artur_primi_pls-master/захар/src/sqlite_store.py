@@ -0,0 +1,311 @@
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.cube import MONEY_DIGITS
+from src.metrics import timed
+from src.search_index import normalize_text
+from src.store import DATE_FORMATS, TransactionStore, load_many, load_operations, normalize_operations, resolve_sources
+
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = "operations.db"
+INSERT_CHUNK = 50_000
+# колонки выписки в порядке выгрузки банка; даты хранятся в ISO 8601, чтобы сравнивались как строки
+SCHEMA = {
+    "date_operation": "TEXT",
+    "data_payment": "TEXT",
+    "card_number": "TEXT",
+    "status": "TEXT",
+    "transaction_amount": "REAL",
+    "currency_operation": "TEXT",
+    "payment_amount": "REAL",
+    "payment_currency": "TEXT",
+    "cashback": "REAL",
+    "category": "TEXT",
+    "MCC": "REAL",
+    "description": "TEXT",
+    "bonuses_including_cashback": "REAL",
+    "rounding_investment_bank": "REAL",
+    "amount_rounding_operation": "REAL",
+}
+COLUMNS = list(SCHEMA)
+# меры, которые можно суммировать в SQL (как в кубе: spent - модуль расходов)
+SUM_EXPRESSIONS = {
+    "payment_amount": "payment_amount",
+    "transaction_amount": "transaction_amount",
+    "bonuses_including_cashback": "bonuses_including_cashback",
+    "spent": "CASE WHEN transaction_amount < 0 THEN -transaction_amount ELSE 0 END",
+}
+DDL = [
+    # колонки, которые были в загруженных выписках, - ответы из базы содержат только их
+    "CREATE TABLE IF NOT EXISTS columns (name TEXT PRIMARY KEY)",
+    "CREATE TABLE IF NOT EXISTS texts (id INTEGER PRIMARY KEY, description TEXT, category TEXT)",
+    "CREATE TABLE IF NOT EXISTS operations (id INTEGER PRIMARY KEY, text_id INTEGER, "
+    + ", ".join(f'"{name}" {kind}' for name, kind in SCHEMA.items())
+    + ")",
+    "CREATE INDEX IF NOT EXISTS idx_category_payment ON operations (category, data_payment)",
+    "CREATE INDEX IF NOT EXISTS idx_card ON operations (card_number)",
+    "CREATE INDEX IF NOT EXISTS idx_text ON operations (text_id)",
+    # поиск подстроки: триграммы по различным описаниям и категориям, уже приведенным через normalize_text
+    "CREATE VIRTUAL TABLE IF NOT EXISTS texts_fts USING fts5(description, category, tokenize='trigram')",
+]
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_path, check_same_thread=False)
+    for statement in DDL:
+        connection.execute(statement)
+    return connection
+
+
+def _iso_dates(column: pd.Series, unit: str) -> np.ndarray:
+    # np.datetime_as_string в разы быстрее strftime; пустые даты -> None
+    values = column.to_numpy(dtype="datetime64[ns]")
+    text = np.datetime_as_string(values, unit=unit).astype(object)
+    text[np.isnat(values)] = None
+    return text
+
+
+def _column_values(frame: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in frame:
+        return np.full(len(frame), None, dtype=object)
+    column = frame[name]
+    if name in DATE_FORMATS:
+        if not pd.api.types.is_datetime64_any_dtype(column):
+            column = pd.to_datetime(column, format=DATE_FORMATS[name], errors="coerce")
+        return _iso_dates(column, "s" if name == "date_operation" else "D")
+    values = column.to_numpy(dtype=object)
+    values[pd.isna(values)] = None
+    return values
+
+
+def _iter_rows(frame: pd.DataFrame, text_ids: np.ndarray) -> Iterator[Tuple[Any, ...]]:
+    for start in range(0, len(frame), INSERT_CHUNK):
+        part = frame.iloc[start : start + INSERT_CHUNK]
+        columns = [text_ids[start : start + INSERT_CHUNK].tolist()]
+        columns += [_column_values(part, name).tolist() for name in COLUMNS]
+        yield from zip(*columns)
+
+
+def insert_operations(connection: sqlite3.Connection, frame: pd.DataFrame) -> int:
+    """
+    Дописывает операции в базу одной транзакцией: строки - executemany частями,
+    новые пары (описание, категория) - в texts и в полнотекстовый индекс texts_fts.
+    """
+    if frame.empty:
+        return 0
+    with timed("load", "sqlite_insert") as timer, connection:
+        known = {
+            (description, category): text_id
+            for text_id, description, category in connection.execute("SELECT id, description, category FROM texts")
+        }
+        pairs = pd.DataFrame({name: _column_values(frame, name) for name in ["description", "category"]})
+        codes, uniques = pd.factorize(pd.MultiIndex.from_frame(pairs.fillna("")))
+        ids = np.empty(len(uniques), dtype=np.int64)
+        new_texts = []
+        next_id = max(known.values(), default=0) + 1
+        for position, pair in enumerate(uniques):
+            if pair not in known:
+                known[pair] = next_id
+                new_texts.append((next_id, *pair))
+                next_id += 1
+            ids[position] = known[pair]
+        connection.executemany("INSERT INTO texts (id, description, category) VALUES (?, ?, ?)", new_texts)
+        connection.executemany(
+            "INSERT INTO texts_fts (rowid, description, category) VALUES (?, ?, ?)",
+            [(text_id, normalize_text(text), normalize_text(category)) for text_id, text, category in new_texts],
+        )
+        names = ", ".join(f'"{name}"' for name in COLUMNS)
+        marks = ", ".join("?" * (len(COLUMNS) + 1))
+        present = [(name,) for name in COLUMNS if name in frame]
+        connection.executemany("INSERT OR IGNORE INTO columns (name) VALUES (?)", present)
+        insert = f"INSERT INTO operations (text_id, {names}) VALUES ({marks})"
+        connection.executemany(insert, _iter_rows(frame, ids[codes]))
+        timer.rows = len(frame)
+    return len(frame)
+
+
+def build_database(db_path: str, file_path: str, workers: Optional[int] = None) -> int:
+    """
+    Создает базу заново из выписки (файла, каталога или шаблона glob). Возвращает число операций.
+    """
+    paths = resolve_sources(file_path)
+    if not paths or not all(os.path.exists(path) for path in paths):
+        raise FileNotFoundError(f"Не найдено выписок: {file_path}")
+    frame = load_operations(paths[0]) if len(paths) == 1 else load_many(paths, workers)
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = connect(tmp_path)
+    try:
+        count = insert_operations(connection, frame)
+    finally:
+        connection.close()
+    os.replace(tmp_path, db_path)
+    logger.info(f"База {db_path} собрана из {file_path}: {count} операций")
+    return count
+
+
+def _day(value: Any, ceil: bool) -> str:
+    # даты платежа - без времени: граница со временем внутри дня сдвигается к целому дню
+    timestamp = pd.Timestamp(value)
+    day = timestamp.normalize()
+    if ceil and timestamp != day:
+        day += pd.Timedelta(days=1)
+    return day.strftime("%Y-%m-%d")
+
+
+class SqliteStore(TransactionStore):
+    """
+    Хранилище операций в базе SQLite. Поиск, окна по категории и суммы считаются запросами
+    к индексам базы; вся таблица читается в память только при обращении к frame
+    (дашборд, нечеткий поиск и т.п.).
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.source = db_path
+        stat = os.stat(db_path)
+        self.version = f"sqlite:{stat.st_size}:{stat.st_mtime_ns}"
+        self._connection = connect(db_path)
+        self._frame: Optional[pd.DataFrame] = None
+        self._rows: Optional[int] = None
+        self._search_index = None
+        self._date_index = None
+        self._cube = None
+        self._lock = threading.Lock()
+        # отдельная блокировка соединения: frame читается и под self._lock (при построении индексов)
+        self._db_lock = threading.Lock()
+
+    def _query(self, sql: str, params: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        with self._db_lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def columns(self) -> List[str]:
+        """
+        Колонки загруженных выписок в порядке SCHEMA.
+        """
+        present = {row[0] for row in self._query("SELECT name FROM columns")}
+        return [name for name in COLUMNS if name in present]
+
+    def _frame_query(self, where: str = "", params: Tuple[Any, ...] = ()) -> pd.DataFrame:
+        columns = self.columns()
+        if not columns:
+            return pd.DataFrame()
+        names = ", ".join(f'"{name}"' for name in columns)
+        rows = self._query(f"SELECT {names} FROM operations {where} ORDER BY id", params)
+        return rows_to_frame(rows, columns)
+
+    @property
+    def frame(self) -> pd.DataFrame:  # type: ignore[override]
+        if self._frame is None:
+            with timed("load", "sqlite_frame") as timer:
+                frame = self._frame_query()
+                timer.rows = len(frame)
+            self._frame = frame
+        return self._frame
+
+    def __len__(self) -> int:
+        if self._rows is None:
+            self._rows = self._query("SELECT COUNT(*) FROM operations")[0][0]
+        return self._rows
+
+    def owns(self, frame: pd.DataFrame) -> bool:
+        return self._frame is not None and self._frame is frame
+
+    def search(self, query: str) -> pd.DataFrame:
+        needle = normalize_text(query)
+        if not needle:
+            return self._frame_query()
+        if len(needle) >= 3:
+            match = '"' + needle.replace('"', '""') + '"'
+            texts = "SELECT rowid FROM texts_fts WHERE texts_fts MATCH ?"
+            params: Tuple[Any, ...] = (match,)
+        else:
+            # короче триграммы fts5 не ищет - проверяем различные тексты через LIKE
+            pattern = "%" + needle.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            texts = "SELECT rowid FROM texts_fts WHERE description LIKE ? ESCAPE '\\' OR category LIKE ? ESCAPE '\\'"
+            params = (pattern, pattern)
+        with timed("filter", "sqlite_search") as timer:
+            frame = self._frame_query(f"WHERE text_id IN ({texts})", params)
+            timer.rows = len(frame)
+        return frame
+
+    def category_rows(self, category: Any, start: Any, end: Any, include_end: bool = True) -> pd.DataFrame:
+        condition = "<=" if include_end else "<"
+        bound = _day(end, ceil=not include_end)
+        with timed("filter", "sqlite_category_rows") as timer:
+            frame = self._frame_query(
+                f"WHERE category = ? AND data_payment >= ? AND data_payment {condition} ?",
+                (str(category), _day(start, ceil=True), bound),
+            )
+            timer.rows = len(frame)
+        return frame
+
+    def category_total(self, category: Any, measure: str, start: Any = None, end: Any = None) -> float:
+        if measure not in SUM_EXPRESSIONS:
+            raise KeyError(measure)
+        where, params = "category = ?", [str(category)]
+        if start is not None or end is not None:
+            where += " AND data_payment IS NOT NULL"
+        if start is not None:
+            where += " AND data_payment >= ?"
+            params.append(_day(start, ceil=True))
+        if end is not None:
+            where += " AND data_payment <= ?"
+            params.append(_day(end, ceil=False))
+        with timed("aggregate", "sqlite_category_total"):
+            total = self._query(f"SELECT SUM({SUM_EXPRESSIONS[measure]}) FROM operations WHERE {where}", tuple(params))
+        return round(float(total[0][0] or 0.0), MONEY_DIGITS)
+
+    def append(self, rows: pd.DataFrame) -> None:
+        if rows.empty:
+            return
+        with self._lock, self._db_lock:
+            insert_operations(self._connection, rows)
+            self._frame = None
+            self._rows = None
+            self._search_index = self._date_index = self._cube = None
+            self.version = f"{self.version}+{len(rows)}"
+
+    def warm_up(self) -> None:
+        len(self)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def rows_to_frame(rows: List[Tuple[Any, ...]], columns: List[str]) -> pd.DataFrame:
+    """
+    Строки запроса -> таблица с типами, как после normalize_operations.
+    """
+    frame = pd.DataFrame.from_records(rows, columns=columns)
+    for name in [name for name in DATE_FORMATS if name in frame]:
+        frame[name] = pd.to_datetime(frame[name], format="ISO8601", errors="coerce")
+    return normalize_operations(frame)
+
+
+def main_sqlite(argv: Optional[List[str]] = None) -> None:
+    """
+    Собирает базу SQLite из выписки; дальше в функции и CLI передается путь к базе (--data operations.db).
+    """
+    parser = argparse.ArgumentParser(description="База операций SQLite")
+    parser.add_argument("file_path", help="выписка, каталог или шаблон glob")
+    parser.add_argument("db_path", nargs="?", default=DATABASE_PATH)
+    parser.add_argument("--workers", type=int, help="процессов для разбора нескольких выписок")
+    args = parser.parse_args(argv)
+    count = build_database(args.db_path, args.file_path, args.workers)
+    print(f"База {args.db_path} собрана, операций: {count}")
+
+
+if __name__ == "__main__":
+    from src.utils import init_app
+
+    init_app()
+    main_sqlite()
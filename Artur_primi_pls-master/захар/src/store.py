@@ -0,0 +1,469 @@
+import argparse
+import glob
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from src.cache import cache_dir, drop_cache, read_appended, read_cache, write_appended, write_cache
+from src.cube import SpendingCube, build_cube
+from src.date_index import CategoryDateIndex
+from src.metrics import timed
+from src.search_index import INDEX_FILE, SearchIndex, open_index
+
+logger = logging.getLogger(__name__)
+
+DATA_PATH = "../data/operations_mi.xls"
+
+# форматы дат в выгрузке банка
+DATE_FORMATS = {"date_operation": "%d.%m.%Y %H:%M:%S", "data_payment": "%d.%m.%Y"}
+CATEGORY_COLUMNS = ["category", "card_number", "status", "currency_operation", "payment_currency"]
+FLOAT_COLUMNS = [
+    "transaction_amount",
+    "payment_amount",
+    "cashback",
+    "MCC",
+    "bonuses_including_cashback",
+    "rounding_investment_bank",
+    "amount_rounding_operation",
+]
+STATEMENT_EXTENSIONS = (".xls", ".xlsx", ".csv")
+# каталог с помесячными частями выписок (src/partitions.py)
+MANIFEST_FILE = "manifest.json"
+# база SQLite с уже загруженными операциями (src/sqlite_store.py)
+DATABASE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+# одна и та же операция из пересекающихся выписок
+DEDUP_COLUMNS = ["date_operation", "card_number", "transaction_amount", "description"]
+
+
+class TransactionStore:
+    """
+    Типизированная таблица операций, одна на процесс для каждого файла выписки.
+    """
+
+    def __init__(self, frame: pd.DataFrame, source: Optional[str] = None, version: str = "") -> None:
+        self.frame = frame
+        self.source = source
+        self.version = version
+        self._search_index: Optional[SearchIndex] = None
+        self._date_index: Optional[CategoryDateIndex] = None
+        self._cube: Optional[SpendingCube] = None
+        # индексы строятся лениво; под блокировкой их не строят дважды при параллельных запросах
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def records(self) -> List[Dict[str, Any]]:
+        """
+        Операции списком словарей в старом формате (даты строками).
+        """
+        return to_records(self.frame)
+
+    def search_index(self) -> SearchIndex:
+        """
+        Поисковый индекс по описанию и категории, строится при первом поиске.
+        """
+        with self._lock:
+            if self._search_index is None:
+                index_path = os.path.join(cache_dir(self.source), INDEX_FILE) if self.source else None
+                self._search_index = open_index(self.frame, index_path, self.version)
+        return self._search_index
+
+    def date_index(self) -> CategoryDateIndex:
+        """
+        Индекс по категории и дате платежа, строится при первом запросе окна.
+        """
+        with self._lock:
+            if self._date_index is None:
+                self._date_index = CategoryDateIndex(self.frame)
+        return self._date_index
+
+    def append(self, rows: pd.DataFrame) -> None:
+        """
+        Дописывает новые операции (с типами как после normalize_operations) в конец таблицы.
+        Поисковый индекс и куб, если они уже построены, дополняются только новыми строками;
+        индекс по дате построится заново при следующем запросе. У хранилища файла выписки
+        строки сохраняются и рядом с файлом (cache.write_appended) - get_store в следующем запуске их добавит.
+        """
+        if rows.empty:
+            return
+        with self._lock:
+            self.frame = append_rows(self.frame, rows)
+            if self._search_index is not None:
+                self._search_index.add(rows)
+            if self._cube is not None:
+                self._cube.add(rows)
+            self._date_index = None
+            self.version = f"{self.version}+{len(rows)}"
+            if self.source is not None:
+                appended = read_appended(self.source)
+                try:
+                    write_appended(self.source, rows if appended is None else append_rows(appended, rows))
+                except (OSError, TypeError, ValueError) as e:
+                    logger.warning(f"Дописанные строки для {self.source} не сохранены: {e}")
+
+    def cube(self) -> SpendingCube:
+        """
+        Куб дневных сумм по категориям и картам, строится при первом запросе.
+        """
+        with self._lock:
+            if self._cube is None:
+                self._cube = build_cube(self.frame)
+        return self._cube
+
+    def owns(self, frame: pd.DataFrame) -> bool:
+        """
+        Таблица - это таблица хранилища (а не посторонняя или ее копия).
+        """
+        return self.frame is frame
+
+    def search(self, query: str) -> pd.DataFrame:
+        """
+        Операции, у которых описание или категория содержит query, в порядке таблицы.
+        """
+        return self.frame.take(self.search_index().search(query))
+
+    def category_rows(self, category: Any, start: Any, end: Any, include_end: bool = True) -> pd.DataFrame:
+        """
+        Операции категории с датой платежа от start до end, в порядке таблицы.
+        """
+        return self.frame.take(self.date_index().rows(category, start, end, include_end))
+
+    def category_total(self, category: Any, measure: str, start: Any = None, end: Any = None) -> float:
+        """
+        Сумма меры куба по категории за период [start, end] (без границ - за все время).
+        """
+        return self.cube().total("category", category, measure, start, end)
+
+    def warm_up(self) -> None:
+        """
+        Строит индексы заранее, чтобы первые запросы их не ждали.
+        """
+        self.search_index()
+        self.date_index()
+        self.cube()
+
+
+_stores: Dict[str, Tuple[Any, TransactionStore]] = {}
+_stores_lock = threading.Lock()
+
+
+def normalize_operations(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит колонки выписки к нормальным типам: даты, категории и суммы.
+    """
+    columns = {}
+    for name in frame.columns:
+        column = frame[name]
+        if name in DATE_FORMATS:
+            column = pd.to_datetime(column, format=DATE_FORMATS[name], errors="coerce")
+        elif name in CATEGORY_COLUMNS:
+            column = column.astype("category")
+        elif name in FLOAT_COLUMNS:
+            column = pd.to_numeric(column, errors="coerce").astype("float64")
+        columns[name] = column
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def append_rows(frame: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Новая таблица: frame, а за ним rows. Категориальные колонки объединяют категории
+    (union_categoricals), а не переводятся в object по всей истории.
+    """
+    names = list(frame.columns) + [name for name in rows.columns if name not in frame.columns]
+    columns = {}
+    for name in names:
+        old = frame[name] if name in frame else pd.Series(np.nan, index=frame.index, dtype=object)
+        new = rows[name] if name in rows else pd.Series(np.nan, index=rows.index, dtype=object)
+        both_categorical = isinstance(old.dtype, pd.CategoricalDtype) and isinstance(new.dtype, pd.CategoricalDtype)
+        if both_categorical and old.cat.categories.dtype == new.cat.categories.dtype:
+            columns[name] = pd.Series(union_categoricals([old, new], ignore_order=True))
+        elif name in CATEGORY_COLUMNS:
+            columns[name] = pd.concat([old.astype(object), new.astype(object)], ignore_index=True).astype("category")
+        else:
+            columns[name] = pd.concat([old, new], ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def to_records(frame: pd.DataFrame, nan_as_none: bool = False) -> List[Dict[str, Any]]:
+    """
+    Переводит типизированную таблицу в список словарей, пригодный для JSON.
+    nan_as_none - пропуски как None (в JSON - null), а не NaN.
+    """
+    columns = {}
+    for name in frame.columns:
+        column = frame[name]
+        if pd.api.types.is_datetime64_any_dtype(column):
+            column = column.dt.strftime(DATE_FORMATS.get(name, "%d.%m.%Y %H:%M:%S")).astype(object)
+        elif isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.astype(object)
+        if nan_as_none and column.isna().any():
+            column = column.astype(object).where(column.notna(), None)
+        columns[name] = column
+    return pd.DataFrame(columns, index=frame.index).to_dict("records")
+
+
+def _file_signature(file_path: str) -> Tuple[int, int]:
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def parse_operations(file_path: str) -> pd.DataFrame:
+    """
+    Разбирает выписку (XLS/XLSX или CSV) и приводит типы колонок.
+    """
+    logger.info(f"Разбор файла {file_path}")
+    with timed("load", "parse_operations") as timer:
+        if file_path.lower().endswith(".csv"):
+            frame = normalize_operations(pd.read_csv(file_path, dtype={"card_number": object}))
+        else:
+            frame = normalize_operations(pd.read_excel(file_path))
+        timer.rows = len(frame)
+        if os.path.isfile(file_path):
+            timer.size = os.path.getsize(file_path)
+    return frame
+
+
+def load_operations(file_path: str) -> pd.DataFrame:
+    """
+    Загружает операции из колоночного кеша на диске, а если его нет или файл
+    поменялся - разбирает XLS и пересобирает кеш.
+    """
+    with timed("load", "read_cache") as timer:
+        frame = read_cache(file_path)
+        timer.rows = None if frame is None else len(frame)
+    if frame is not None:
+        return frame
+    frame = parse_operations(file_path)
+    try:
+        write_cache(file_path, frame)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Не удалось записать кеш для {file_path}: {e}")
+    return frame
+
+
+def is_multi_source(file_path: str) -> bool:
+    """
+    Путь задает набор выписок: каталог или шаблон glob.
+    """
+    return os.path.isdir(file_path) or glob.has_magic(file_path)
+
+
+def resolve_sources(file_path: str) -> List[str]:
+    """
+    Файлы выписок для пути: сам файл, все выписки каталога или файлы по шаблону glob.
+    """
+    if os.path.isdir(file_path):
+        paths = [os.path.join(file_path, name) for name in os.listdir(file_path)]
+    elif glob.has_magic(file_path):
+        paths = glob.glob(file_path, recursive=True)
+    else:
+        return [file_path]
+    return sorted(path for path in paths if os.path.isfile(path) and path.lower().endswith(STATEMENT_EXTENSIONS))
+
+
+def combine_operations(frames: List[pd.DataFrame], sources: List[str]) -> pd.DataFrame:
+    """
+    Склеивает выписки в одну таблицу с колонкой source_file и убирает операции,
+    повторившиеся в нескольких выписках. Одинаковые строки внутри одной выписки
+    остаются: n-я такая строка считается дублем только n-й такой же строки другой выписки.
+    """
+    parts = []
+    for frame, source in zip(frames, sources):
+        # у категориальных колонок разных файлов разные категории - склеиваем значения
+        frame = frame.astype({name: object for name in CATEGORY_COLUMNS if name in frame})
+        frame["source_file"] = source
+        parts.append(frame)
+    if not parts:
+        return pd.DataFrame(columns=["source_file"])
+    combined = pd.concat(parts, ignore_index=True)
+    keys = [name for name in DEDUP_COLUMNS if name in combined]
+    if keys:
+        key_frame = combined[keys]
+        occurrence = (
+            key_frame.assign(source_file=combined["source_file"])
+            .groupby(keys + ["source_file"], dropna=False, sort=False)
+            .cumcount()
+        )
+        duplicated = key_frame.assign(occurrence=occurrence).duplicated()
+        if duplicated.any():
+            logger.info(f"Удалено повторяющихся операций: {int(duplicated.sum())}")
+            combined = combined[~duplicated.to_numpy()].reset_index(drop=True)
+    for name in CATEGORY_COLUMNS + ["source_file"]:
+        if name in combined:
+            combined[name] = combined[name].astype("category")
+    return combined
+
+
+def load_many(paths: List[str], workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Загружает несколько выписок параллельно в пуле процессов (у каждой свой кеш на диске)
+    и склеивает их через combine_operations.
+    """
+    if len(paths) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(load_operations, paths))
+    else:
+        frames = [load_operations(path) for path in paths]
+    return combine_operations(frames, paths)
+
+
+def _load_multi_store(file_path: str, workers: Optional[int]) -> TransactionStore:
+    key = os.path.abspath(file_path)
+    paths = resolve_sources(file_path)
+    if not paths:
+        raise FileNotFoundError(f"Не найдено выписок: {file_path}")
+    signature = tuple((path, _file_signature(path)) for path in paths)
+    cached = _stores.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    logger.info(f"Загрузка {len(paths)} выписок из {file_path}")
+    version = hashlib.sha256(repr(signature).encode("utf-8")).hexdigest()[:16]
+    store = TransactionStore(load_many(paths, workers), version=version)
+    _stores[key] = (signature, store)
+    return store
+
+
+def rebuild_cache(file_path: str = DATA_PATH) -> TransactionStore:
+    """
+    Принудительно пересобирает кеш файла (или всех выписок каталога/шаблона) и хранилище в памяти.
+    """
+    for path in resolve_sources(file_path):
+        drop_cache(path)
+    with _stores_lock:
+        _stores.pop(os.path.abspath(file_path), None)
+    return get_store(file_path)
+
+
+def get_store(file_path: str = DATA_PATH, workers: Optional[int] = None) -> TransactionStore:
+    """
+    Возвращает хранилище операций файла, разбирая его только при первом обращении
+    или после изменения файла. file_path может быть каталогом или шаблоном glob -
+    тогда все выписки разбираются в workers процессах и объединяются в одно хранилище.
+    """
+    with _stores_lock:
+        return _get_store(file_path, workers)
+
+
+def is_database(file_path: str) -> bool:
+    """
+    Путь - база SQLite, а не выписка.
+    """
+    return file_path.lower().endswith(DATABASE_EXTENSIONS)
+
+
+def is_dataset(file_path: str) -> bool:
+    """
+    Путь - каталог с помесячными частями выписок (есть manifest.json).
+    """
+    return os.path.isfile(os.path.join(file_path, MANIFEST_FILE))
+
+
+def _get_store(file_path: str, workers: Optional[int]) -> TransactionStore:
+    if is_dataset(file_path):
+        from src.partitions import PartitionedStore, manifest_signature, read_manifest
+
+        # набор помесячных частей: хранилище новое, только если манифест поменялся или набор пересоздан
+        signature = manifest_signature(read_manifest(file_path))
+        cached = _stores.get(os.path.abspath(file_path))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        store = PartitionedStore(file_path)
+        _stores[os.path.abspath(file_path)] = (signature, store)
+        return store
+    if is_multi_source(file_path):
+        return _load_multi_store(file_path, workers)
+    if is_database(file_path):
+        from src.sqlite_store import SqliteStore
+
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"Нет базы операций: {file_path}")
+        signature = _file_signature(file_path)
+        cached = _stores.get(os.path.abspath(file_path))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        store = SqliteStore(file_path)
+        _stores[os.path.abspath(file_path)] = (signature, store)
+        return store
+    key = os.path.abspath(file_path)
+    try:
+        signature = _file_signature(file_path)
+    except OSError:
+        # файла нет - кешировать нечего, ошибку поднимет сам разбор
+        return TransactionStore(parse_operations(file_path))
+    cached = _stores.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    version = f"{signature[0]}:{signature[1]}"
+    frame = load_operations(file_path)
+    appended = read_appended(file_path)
+    if appended is not None:
+        # строки, дописанные в прошлых запусках; те, что уже есть в новой версии выписки, отбрасываются
+        frame = combine_operations([frame, appended], [file_path, "appended"]).drop(columns="source_file")
+        version = f"{version}+{len(appended)}"
+    store = TransactionStore(frame, source=file_path, version=version)
+    _stores[key] = (signature, store)
+    return store
+
+
+def store_for(frame: pd.DataFrame) -> TransactionStore:
+    """
+    Хранилище, которому принадлежит таблица; для посторонней таблицы - новое
+    (его индексы строятся заново и не запоминаются).
+    """
+    for _, store in list(_stores.values()):
+        if store.owns(frame):
+            return store
+    return TransactionStore(frame)
+
+
+def store_of(transactions: Union[pd.DataFrame, TransactionStore]) -> TransactionStore:
+    """
+    Хранилище для аргумента функций отчетов: само хранилище или хранилище таблицы.
+    """
+    return transactions if isinstance(transactions, TransactionStore) else store_for(transactions)
+
+
+def date_index_for(frame: pd.DataFrame) -> CategoryDateIndex:
+    """
+    Индекс по категории и дате для таблицы.
+    """
+    return store_for(frame).date_index()
+
+
+def cube_for(frame: pd.DataFrame) -> SpendingCube:
+    """
+    Куб дневных сумм для таблицы.
+    """
+    return store_for(frame).cube()
+
+
+def clear_stores() -> None:
+    """
+    Сбрасывает все загруженные хранилища.
+    """
+    with _stores_lock:
+        _stores.clear()
+
+
+def main_store(argv: Optional[List[str]] = None) -> None:
+    """
+    Команды хранилища: rebuild - пересобрать кеш выписки.
+    """
+    parser = argparse.ArgumentParser(description="Хранилище операций")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("file_path", nargs="?", default=DATA_PATH)
+    args = parser.parse_args(argv)
+    store = rebuild_cache(args.file_path)
+    print(f"Кеш для {args.file_path} пересобран, операций: {len(store)}")
+
+
+if __name__ == "__main__":
+    main_store()
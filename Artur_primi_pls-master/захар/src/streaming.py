@@ -0,0 +1,117 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from src.aggregates import card_totals, sum_expenses
+from src.search_index import normalize_text
+from src.store import normalize_operations, to_records
+
+CHUNK_SIZE = 100_000
+
+
+def _rows_to_chunks(rows: Iterator[Any], chunk_size: int) -> Iterator[pd.DataFrame]:
+    header = [str(name) for name in next(rows, [])]
+    buffer: List[Any] = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= chunk_size:
+            yield normalize_operations(pd.DataFrame(buffer, columns=header))
+            buffer = []
+    if buffer:
+        yield normalize_operations(pd.DataFrame(buffer, columns=header))
+
+
+def _xlsx_rows(file_path: str) -> Iterator[Any]:
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _xls_rows(file_path: str) -> Iterator[Any]:
+    import xlrd
+
+    # старый формат xls xlrd читает листом целиком, но в pandas строки попадают частями
+    workbook = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = workbook.sheet_by_index(0)
+        for index in range(sheet.nrows):
+            yield [None if cell.ctype == xlrd.XL_CELL_EMPTY else cell.value for cell in sheet.row(index)]
+    finally:
+        workbook.release_resources()
+
+
+def iter_chunks(file_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Читает выписку (xlsx, xls или csv) частями по chunk_size строк с нормальными типами колонок,
+    так что в памяти одновременно только одна часть.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        for chunk in pd.read_csv(file_path, chunksize=chunk_size, dtype={"card_number": object}):
+            yield normalize_operations(chunk)
+    elif extension == ".xlsx":
+        yield from _rows_to_chunks(_xlsx_rows(file_path), chunk_size)
+    elif extension == ".xls":
+        yield from _rows_to_chunks(_xls_rows(file_path), chunk_size)
+    else:
+        raise ValueError(f"Неизвестный формат выписки: {file_path}")
+
+
+def stream_total_expenses(chunks: Iterable[pd.DataFrame]) -> float:
+    """
+    Сумма расходов по всем частям; совпадает с calcul_total_expen по всей выписке.
+    """
+    total = 0.0
+    for chunk in chunks:
+        total = sum_expenses(chunk, total)
+    return total
+
+
+def stream_card_data(chunks: Iterable[pd.DataFrame]) -> List[Dict[str, Any]]:
+    """
+    Расходы и кешбэк по картам по всем частям; совпадает с proc_card_data по всей выписке.
+    """
+    totals: Dict[str, Dict[str, Any]] = {}
+    for chunk in chunks:
+        card_totals(chunk, totals)
+    return list(totals.values())
+
+
+def stream_category_window(
+    chunks: Iterable[pd.DataFrame], category: str, start: datetime, end: datetime, include_end: bool = True
+) -> Dict[str, Any]:
+    """
+    Операции категории с датой платежа от start до end и их сумма payment_amount.
+    В памяти держатся только подходящие строки.
+    """
+    found: List[Dict[str, Any]] = []
+    total = 0.0
+    for chunk in chunks:
+        dates = pd.to_datetime(chunk["data_payment"], format="%d.%m.%Y")
+        before_end = dates <= end if include_end else dates < end
+        selected = chunk[(chunk["category"] == category) & (dates >= start) & before_end]
+        total += float(np.nan_to_num(selected["payment_amount"].to_numpy(dtype="float64")).sum())
+        found.extend(to_records(selected))
+    return {"category": category, "total_expenses": total, "transactions": found}
+
+
+def stream_search(chunks: Iterable[pd.DataFrame], query: str) -> Iterator[Dict[str, Any]]:
+    """
+    Транзакции, у которых описание или категория содержит query; отдаются по мере чтения.
+    """
+    needle = normalize_text(query)
+    for chunk in chunks:
+        matched = np.zeros(len(chunk), dtype=bool)
+        for name in ["description", "category"]:
+            # проверяем различные значения части, а не каждую строку
+            codes, uniques = pd.factorize(chunk[name])
+            hits = np.array([needle in normalize_text(value) for value in uniques] + [False], dtype=bool)
+            matched |= hits[codes]
+        yield from to_records(chunk[matched])
@@ -0,0 +1,150 @@
+import heapq
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.aggregates import card_keys
+from src.store import to_records
+
+Transactions = Union[List[Dict[str, Any]], pd.DataFrame]
+GROUPS = [None, "category", "card", "month"]
+
+
+def _rank(value: Any) -> float:
+    # NaN и пустые суммы уходят в самый конец рейтинга
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return -math.inf
+    return -math.inf if math.isnan(value) else value
+
+
+def _record_group(record: Dict[str, Any], by: str) -> Any:
+    if by == "card":
+        card = record.get("card_number")
+        return card[-4:] if isinstance(card, str) and card.startswith("*") else None
+    if by == "month":
+        date = record.get("date_operation")
+        if isinstance(date, str) and len(date) >= 10:
+            # формат выгрузки: 05.06.2024 11:04:40
+            return f"{date[6:10]}-{date[3:5]}"
+        return date.strftime("%Y-%m") if isinstance(date, datetime) else None
+    value = record.get(by)
+    return None if value is None or (isinstance(value, float) and math.isnan(value)) else value
+
+
+def _frame_groups(frame: pd.DataFrame, by: str) -> pd.Series:
+    if by == "card":
+        return card_keys(frame["card_number"])
+    if by == "month":
+        dates = pd.to_datetime(frame["date_operation"], format="%d.%m.%Y %H:%M:%S")
+        return dates.dt.strftime("%Y-%m")
+    return frame[by]
+
+
+def _largest(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Позиции k наибольших значений без полной сортировки (argpartition);
+    при равенстве берутся более ранние строки, как у устойчивой сортировки.
+    """
+    if len(values) <= k:
+        chosen = np.arange(len(values))
+    else:
+        kth = np.partition(values, len(values) - k)[len(values) - k]
+        above = np.flatnonzero(values > kth)
+        equal = np.flatnonzero(values == kth)[: k - len(above)]
+        chosen = np.concatenate([above, equal])
+    return chosen[np.lexsort((chosen, -values[chosen]))]
+
+
+class TopK:
+    """
+    Топ-k транзакций по полю key (целиком или в каждой группе by) за один проход.
+    Держит по куче размера k на группу, входные данные не меняет;
+    данные можно подавать частями через update.
+    """
+
+    def __init__(self, k: int, key: str = "transaction_amount", by: Optional[str] = None) -> None:
+        if by not in GROUPS:
+            raise ValueError(f"Неизвестная группировка: {by}")
+        self.k = k
+        self.key = key
+        self.by = by
+        self.seen = 0
+        self.heaps: Dict[Any, List[Tuple[float, int, Dict[str, Any]]]] = {}
+
+    def _push(self, group: Any, value: float, position: int, record: Dict[str, Any]) -> None:
+        heap = self.heaps.setdefault(group, [])
+        # при равных суммах выше стоит более ранняя строка, поэтому -position
+        item = (value, -position, record)
+        if len(heap) < self.k:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+
+    def update(self, transactions: Transactions) -> "TopK":
+        """
+        Учитывает очередную порцию транзакций (список словарей или таблицу).
+        """
+        if self.k <= 0:
+            return self
+        if isinstance(transactions, pd.DataFrame):
+            self._update_frame(transactions)
+            return self
+        for offset, record in enumerate(transactions):
+            group = _record_group(record, self.by) if self.by else ""
+            if group is not None:
+                self._push(group, _rank(record.get(self.key)), self.seen + offset, record)
+        self.seen += len(transactions)
+        return self
+
+    def _update_frame(self, frame: pd.DataFrame) -> None:
+        values = frame[self.key].to_numpy(dtype="float64")
+        values = np.where(np.isnan(values), -np.inf, values)
+        if self.by is None:
+            groups, labels = np.zeros(len(frame), dtype=np.int64), [""]
+        else:
+            groups, labels = pd.factorize(_frame_groups(frame, self.by))
+        # в кучи попадают только кандидаты: не больше k строк каждой группы этой порции
+        order = np.argsort(groups, kind="stable")
+        order = order[groups[order] >= 0]
+        bounds = np.searchsorted(groups[order], np.arange(1, len(labels)))
+        candidates = [rows[_largest(values[rows], self.k)] for rows in np.split(order, bounds)]
+        chosen = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.int64)
+        records = to_records(frame.take(chosen))
+        for row, record in zip(chosen, records):
+            self._push(labels[groups[row]], values[row], self.seen + int(row), record)
+        self.seen += len(frame)
+
+    def result(self) -> Union[List[Dict[str, Any]], Dict[Any, List[Dict[str, Any]]]]:
+        """
+        Список лучших транзакций (по убыванию key), а при группировке - словарь группа -> список.
+        """
+        ranked = {group: [item[2] for item in sorted(heap, reverse=True)] for group, heap in self.heaps.items()}
+        if self.by is None:
+            return ranked.get("", [])
+        return ranked
+
+
+def top_k(
+    transactions: Transactions, k: int, key: str = "transaction_amount", by: Optional[str] = None
+) -> Union[List[Dict[str, Any]], Dict[Any, List[Dict[str, Any]]]]:
+    """
+    Топ-k транзакций по key, целиком или по группам by: category, card (последние 4 цифры), month.
+    """
+    return TopK(k, key, by).update(transactions).result()
+
+
+def top_k_stream(
+    chunks: Iterable[Transactions], k: int, key: str = "transaction_amount", by: Optional[str] = None
+) -> Union[List[Dict[str, Any]], Dict[Any, List[Dict[str, Any]]]]:
+    """
+    То же, что top_k, но по данным, приходящим частями; в памяти только кучи размера k.
+    """
+    selector = TopK(k, key, by)
+    for chunk in chunks:
+        selector.update(chunk)
+    return selector.result()
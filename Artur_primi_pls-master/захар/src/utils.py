@@ -1,37 +1,61 @@
+import atexit
 import json
 import logging
 from logging import Logger
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 from typing import Any
 
-import pandas as pd
+from src import json_writer
+from src.store import get_store
+
+LOG_FORMAT = logging.Formatter("%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s")
 
 
 def liggin() -> Logger:
     """
-    Настройка логирования, для дальнейшего использования в других модулях
+    Настройка логирования, для дальнейшего использования в других модулях.
+    Вызывается при запуске программы (init_app), а не при импорте модулей:
+    utils_log.txt перезаписывается. Модули кладут записи в очередь (QueueHandler),
+    а в файл их пишет отдельный поток, так что логирование не тормозит расчеты.
     """
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s",
-        filename="utils_log.txt",
-        filemode="w",
-    )
     logger = logging.getLogger(__name__)
+    if logging.getLogger().handlers:
+        return logger
+    file_handler = logging.FileHandler("utils_log.txt", mode="w", encoding="utf-8")
+    file_handler.setFormatter(LOG_FORMAT)
+    queue: SimpleQueue = SimpleQueue()
+    listener = QueueListener(queue, file_handler)
+    listener.start()
+    # при выходе дописываем в файл все, что осталось в очереди
+    atexit.register(listener.stop)
+    queue_handler = QueueHandler(queue)
+    # в очередь идет только текст сообщения, оформление - у файлового обработчика
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
     return logger
 
 
+def init_app() -> Logger:
+    """
+    Явная инициализация при запуске: переменные окружения из .env и логирование.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return liggin()
+
+
 def read_xlsx(file_path: str) -> Any:
     """
-    функция чтения файла Excel.
+    функция чтения файла Excel, каталога или шаблона glob с выписками (через общее хранилище операций).
     """
-    transactions_df = pd.read_excel(file_path)
-    return transactions_df.to_dict("records")
+    return get_store(file_path).records()
 
 
 def write_json(file_path: str, data: Any) -> None:
-    """Red book"""
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    """Red book: пишет JSON без NaN (null вместо него), списки - потоково, .gz - сжатым (src/json_writer.py)"""
+    json_writer.write_json(file_path, data)
 
 
 def read_json(file_path: str) -> Any:
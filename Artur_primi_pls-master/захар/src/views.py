@@ -1,17 +1,29 @@
 import json
 import os
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Union
 
-import requests
-import yfinance as yf
-from dotenv import load_dotenv
+import pandas as pd
 
-from src.utils import read_json, read_xlsx, write_json
+from src.aggregates import card_totals, sum_expenses
+from src.fx import to_currency
+from src.incremental import STATE_FILE, refresh_dashboard
+from src.market import get_market_data, get_session
+from src.metrics import timed
+from src.records import TransactionRecords
+from src.store import DATA_PATH, TransactionStore, get_store
+from src.topk import top_k
+from src.utils import init_app, read_json, write_json
 
-load_dotenv()
-# Получение API ключа из моего окружения
-API_KEY = os.getenv("api_key")
+CURRENCIES = ["USD", "EUR"]
+STOCKS = ["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"]
+
+
+def api_key() -> Optional[str]:
+    """
+    API ключ из моего окружения (.env читает init_app при запуске).
+    """
+    return os.getenv("api_key")
 
 
 def get_greet(date_time: Any) -> str:
@@ -34,10 +46,33 @@ def get_greet(date_time: Any) -> str:
         return "Доброй ночи!"
 
 
-def calcul_total_expen(transactions_sum: List[Dict[str, Any]]) -> float:
+def _as_frame(transactions: Any) -> Any:
+    # для пересчета валют нужна таблица; список словарей переводит сам to_currency
+    if isinstance(transactions, TransactionRecords):
+        return transactions.to_frame()
+    if isinstance(transactions, TransactionStore):
+        return transactions.frame
+    return transactions
+
+
+@timed("aggregate", rows=lambda transactions, *args, **kwargs: len(transactions))
+def calcul_total_expen(
+    transactions_sum: Union[List[Dict[str, Any]], pd.DataFrame, TransactionStore, TransactionRecords],
+    currency: Optional[str] = None,
+) -> float:
     """
-    Функция считает сумму расходов по списку транзакций.
+    Функция считает сумму расходов по списку транзакций
+    (таблицу, колонки TransactionRecords и таблицу хранилища считает векторно, результат совпадает до бита).
+    currency - сумма в этой валюте: каждая операция пересчитывается по курсу на дату платежа (src/fx.py).
     """
+    if currency is not None:
+        transactions_sum = to_currency(_as_frame(transactions_sum), currency)
+    if isinstance(transactions_sum, TransactionRecords):
+        transactions_sum = transactions_sum.to_frame()
+    if isinstance(transactions_sum, TransactionStore):
+        transactions_sum = transactions_sum.frame
+    if isinstance(transactions_sum, pd.DataFrame):
+        return sum_expenses(transactions_sum)
     total_expenses = 0.0
     for transaction in transactions_sum:
         if transaction["transaction_amount"] < 0:
@@ -45,10 +80,24 @@ def calcul_total_expen(transactions_sum: List[Dict[str, Any]]) -> float:
     return total_expenses * -1
 
 
-def proc_card_data(operat: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+@timed("aggregate", rows=lambda operat, *args, **kwargs: len(operat))
+def proc_card_data(
+    operat: Union[List[Dict[str, Any]], pd.DataFrame, TransactionStore, TransactionRecords],
+    currency: Optional[str] = None,
+) -> List[Dict[str, Any]]:
     """
-    Эта функция обрабатывает данные о картах из списка.
+    Эта функция обрабатывает данные о картах из списка
+    (таблицу, TransactionRecords и таблицу хранилища - группировкой по последним 4 цифрам).
+    currency - расходы в этой валюте по курсам на даты платежей (кешбэк остается в бонусах банка).
     """
+    if currency is not None:
+        operat = to_currency(_as_frame(operat), currency)
+    if isinstance(operat, TransactionRecords):
+        operat = operat.to_frame()
+    if isinstance(operat, TransactionStore):
+        operat = operat.frame
+    if isinstance(operat, pd.DataFrame):
+        return card_totals(operat)
     card_data = {}
     for operation in operat:
         if isinstance(operation["card_number"], str) and operation["card_number"].startswith("*"):
@@ -61,12 +110,17 @@ def proc_card_data(operat: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return list(card_data.values())
 
 
-def top_transactions_5(transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+@timed("aggregate", rows=len)
+def top_transactions_5(
+    transactions: Union[List[Dict[str, Any]], pd.DataFrame, TransactionRecords],
+) -> List[Dict[str, Any]]:
     """
-    Функция возвращает топ 5 транзакций.
+    Функция возвращает топ 5 транзакций (исходный список не сортируется и не меняется).
     """
-    transactions.sort(key=lambda x: x["transaction_amount"], reverse=True)
-    return transactions[:5]
+    if isinstance(transactions, TransactionRecords):
+        transactions = transactions.to_frame()
+    result: List[Dict[str, Any]] = top_k(transactions, 5, "transaction_amount")
+    return result
 
 
 def get_cur_rate(currency: str) -> Any:
@@ -74,7 +128,7 @@ def get_cur_rate(currency: str) -> Any:
     Эта функция получает курс валют.
     """
     url = f"https://api.apilayer.com/exchangerates_data/latest?symbols=RUB&base={currency}"
-    response = requests.get(url, headers={"apikey": API_KEY}, timeout=40)
+    response = get_session().get(url, headers={"apikey": api_key()}, timeout=40)
     response_data = json.loads(response.text)
     return response_data["rates"]["RUB"]
 
@@ -83,46 +137,65 @@ def get_stoc_cur(stock: str) -> Any:
     """
     Функция получает акции с помощью Yahoo Finance.
     """
+    import yfinance as yf
+
     stock_data = yf.Ticker(stock)
     todays_data = stock_data.history(period="1d")
     return todays_data["High"].iloc[0]
 
 
-def main_views() -> None:
+def build_dashboard(
+    date_time: Optional[str] = None,
+    file_path: str = DATA_PATH,
+    state_file: Optional[str] = None,
+    currency: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Данные дашборда: приветствие, расходы, карты, топ транзакций, курсы и акции.
+    date_time - строка YYYY-MM-DD HH:MM:SS, по умолчанию текущее время.
+    Если задан state_file, итоги берутся из сохраненных и дополняются только новыми операциями.
+    currency - итоги в этой валюте (сохраненные итоги в рублях тогда не используются).
+    """
+    if currency is not None:
+        frame = to_currency(get_store(file_path).frame, currency)
+        totals = {
+            "total_expenses": calcul_total_expen(frame),
+            "card_data": proc_card_data(frame),
+            "top_transactions": top_transactions_5(frame),
+        }
+    elif state_file is not None:
+        totals = refresh_dashboard(file_path, state_file)
+    else:
+        store = get_store(file_path)
+        totals = {
+            "total_expenses": calcul_total_expen(store),
+            "card_data": proc_card_data(store),
+            "top_transactions": top_transactions_5(store.frame),
+        }
+    market_data = get_market_data(CURRENCIES, STOCKS, api_key=api_key())
+    return {
+        "greeting": get_greet(date_time),
+        "total_expenses": totals["total_expenses"],
+        "card_data": totals["card_data"],
+        "top_transactions": totals["top_transactions"],
+        "currency_rates": market_data["currency_rates"],
+        "stock_prices": market_data["stock_prices"],
+    }
+
+
+def main_views(file_path: str = DATA_PATH) -> None:
     """
     Главная функция программы, запускающая все функции модулей.
     """
     user_input = input(
         "Введите date и tami в формате YYYY-MM-DD HH:MM:SS " "или нажмите Enter для использования на вашем устройстве:"
     )
-    greeting = get_greet(user_input if user_input else None)
-    transactions = read_xlsx("../data/operations_mi.xls")
-    total_expenses = calcul_total_expen(transactions)
-    card_data = proc_card_data(transactions)
-    top_trans = top_transactions_5(transactions)
-    currency_rates = [
-        {"currency": "USD", "rate": get_cur_rate("USD")},
-        {"currency": "EUR", "rate": get_cur_rate("EUR")},
-    ]
-    stock_prices = [
-        {"stock": "AAPL", "price": get_stoc_cur("AAPL")},
-        {"stock": "AMZN", "price": get_stoc_cur("AMZN")},
-        {"stock": "GOOGL", "price": get_stoc_cur("GOOGL")},
-        {"stock": "MSFT", "price": get_stoc_cur("MSFT")},
-        {"stock": "TSLA", "price": get_stoc_cur("TSLA")},
-    ]
-    output_data = {
-        "greeting": greeting,
-        "total_expenses": total_expenses,
-        "card_data": card_data,
-        "top_transactions": top_trans,
-        "currency_rates": currency_rates,
-        "stock_prices": stock_prices,
-    }
+    output_data = build_dashboard(user_input if user_input else None, file_path, STATE_FILE)
     output_file = "operations_data.json"
     write_json(output_file, output_data)
     print(read_json(output_file))
 
 
 if __name__ == "__main__":
+    init_app()
     main_views()
@@ -0,0 +1,48 @@
+import os
+import unittest
+
+from benchmarks.suite import compare, run_suite
+from benchmarks.synthetic import CATEGORIES, make_operations
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_synthetic_statement(self) -> None:
+        frame = make_operations(500, cards=3, seed=1)
+        self.assertEqual(len(frame), 500)
+        self.assertEqual(frame.shape[1], 15)
+        self.assertTrue(set(frame["category"]) <= set(CATEGORIES))
+        self.assertLessEqual(frame["card_number"].nunique(), 3)
+        only = make_operations(100, weights={"Аптеки": 1.0})
+        self.assertEqual(set(only["category"]), {"Аптеки"})
+
+    def test_suite_runs(self) -> None:
+        cwd = os.getcwd()
+        report = run_suite([300], repeat=1)
+        self.assertEqual(os.getcwd(), cwd)
+        functions = {item["function"] for item in report["results"]}
+        self.assertIn("main_views", functions)
+        self.assertIn("get_keyword", functions)
+        for item in report["results"]:
+            self.assertEqual(item["rows"], 300)
+            self.assertGreaterEqual(item["seconds"], 0)
+            self.assertGreater(item["peak_bytes"], 0)
+
+    def test_compare(self) -> None:
+        baseline = [
+            {"function": "get_keyword", "rows": 1000, "seconds": 1.0, "peak_bytes": 1000},
+            {"function": "main_views", "rows": 1000, "seconds": 0.001, "peak_bytes": None},
+        ]
+        results = [
+            {"function": "get_keyword", "rows": 1000, "seconds": 1.2, "peak_bytes": 2000},
+            {"function": "main_views", "rows": 1000, "seconds": 0.004, "peak_bytes": 10},
+            {"function": "get_keyword", "rows": 5000, "seconds": 9.0, "peak_bytes": 1},
+        ]
+        regressions = compare(results, baseline, tolerance=0.25)
+        # время в допуске, память выросла вдвое; быстрые замеры и новые размеры не сравниваются
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("память", regressions[0])
+        self.assertEqual(len(compare(results, baseline, tolerance=0.1)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
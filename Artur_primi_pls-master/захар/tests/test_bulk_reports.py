@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.bulk_reports import bulk_reports, main_bulk_reports, month_numbers, write_bulk_reports
+from src.store import normalize_operations
+
+OPERATIONS = pd.DataFrame(
+    {
+        "data_payment": ["15.01.2024", "20.02.2024", "05.04.2024", "10.04.2024", "31.12.2023", None],
+        "card_number": ["*7197", "*7197", "*7197", "*1111", "*1111", "*1111"],
+        "transaction_amount": [-100.0, -50.0, -10.0, -30.0, 200.0, -5.0],
+        "payment_amount": [-100.0, -50.0, -10.0, -30.0, 200.0, -5.0],
+        "category": ["Супермаркеты", "Супермаркеты", "Супермаркеты", "Фастфуд", "Пополнения", "Фастфуд"],
+        "bonuses_including_cashback": [1.0, 0.0, 0.0, 3.0, 0.0, 0.0],
+    }
+)
+
+
+class TestBulkReports(unittest.TestCase):
+    def setUp(self) -> None:
+        self.frame = normalize_operations(OPERATIONS)
+
+    def test_rolling_windows(self) -> None:
+        reports = bulk_reports(self.frame)
+        rows = {(row["card"], row["category"], row["window_end"]): row for row in reports.to_dict("records")}
+        # январь и февраль в окне, которое оканчивается мартом; апрель - уже без января
+        march = rows[("7197", "Супермаркеты", "2024-03-31")]
+        self.assertEqual((march["window_start"], march["operations"], march["spent"]), ("2024-01-01", 2, 150.0))
+        self.assertEqual(rows[("7197", "Супермаркеты", "2024-04-30")]["payment_amount"], -60.0)
+        self.assertEqual(rows[("1111", "Пополнения", "2024-02-29")]["spent"], 0.0)
+        # окна оканчиваются не позже последнего месяца данных, пустые окна и операции без даты не выводятся
+        self.assertEqual(reports["window_end"].max(), "2024-04-30")
+        self.assertNotIn(("1111", "Пополнения", "2024-03-31"), rows)
+        self.assertEqual(rows[("1111", "Фастфуд", "2024-04-30")]["operations"], 1)
+        self.assertEqual(len(reports), 8)
+        # в сырой таблице дата платежа строкой: нераспознанная - как без даты
+        raw = OPERATIONS.assign(data_payment=["15.01.2024", "дата", None, "10.04.2024", "31.12.2023", "05.04.2024"])
+        self.assertEqual(month_numbers(raw).tolist(), [24288, -1, -1, 24291, 24287, 24291])
+
+    def test_shards_match(self) -> None:
+        expected = bulk_reports(self.frame)
+        for shard in ["card", "year"]:
+            pd.testing.assert_frame_equal(bulk_reports(self.frame, shard, workers=1), expected)
+        pd.testing.assert_frame_equal(bulk_reports(self.frame, "year", workers=2), expected)
+        with self.assertRaises(ValueError):
+            bulk_reports(self.frame, "month")
+
+    def test_one_jsonl_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "operations.csv")
+            output = os.path.join(tmp, "close.jsonl")
+            OPERATIONS.to_csv(data_path, index=False)
+            main_bulk_reports([data_path, "--output", output, "--shard", "card", "--workers", "1"])
+            with open(output, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual(len(lines), 8)
+            self.assertEqual(lines[0]["window_end"], "2023-12-31")
+            self.assertEqual(write_bulk_reports(os.path.join(tmp, "empty.jsonl"), bulk_reports(self.frame[:0])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from typing import Any
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.cache import cache_dir, read_cache, write_cache
+from src.store import clear_stores, get_store, normalize_operations, rebuild_cache
+
+RAW = pd.DataFrame(
+    {
+        "date_operation": ["05.06.2024 11:04:40", "04.06.2024 09:00:00", "03.06.2024 10:00:00"],
+        "data_payment": ["05.06.2024", None, "03.06.2024"],
+        "card_number": [None, "*1111", "*1111"],
+        "transaction_amount": [-14.78, -28, 100],
+        "category": ["Услуги банка", "Транспорт", "Переводы"],
+        "description": ["Плата за оповещения", "Метро", float("nan")],
+    }
+)
+
+
+class TestColumnCache(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_stores()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "operations.xls")
+        with open(self.path, "wb") as f:
+            f.write(b"xls")
+
+    def tearDown(self) -> None:
+        clear_stores()
+        self.tmp.cleanup()
+
+    def test_roundtrip(self) -> None:
+        frame = normalize_operations(RAW)
+        write_cache(self.path, frame)
+        self.assertTrue(os.path.isdir(cache_dir(self.path)))
+        pd.testing.assert_frame_equal(read_cache(self.path), frame)
+
+    def test_touch_keeps_cache(self) -> None:
+        write_cache(self.path, normalize_operations(RAW))
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNotNone(read_cache(self.path))
+
+    def test_changed_content_invalidates(self) -> None:
+        write_cache(self.path, normalize_operations(RAW))
+        with open(self.path, "wb") as f:
+            f.write(b"XLS")
+        self.assertIsNone(read_cache(self.path))
+
+    @patch("pandas.read_excel")
+    def test_store_uses_disk_cache(self, mock_read_excel: Any) -> None:
+        mock_read_excel.return_value = RAW
+        get_store(self.path)
+        clear_stores()
+        store = get_store(self.path)
+        mock_read_excel.assert_called_once()
+        self.assertEqual(len(store), 3)
+
+    @patch("pandas.read_excel")
+    def test_rebuild(self, mock_read_excel: Any) -> None:
+        mock_read_excel.return_value = RAW
+        get_store(self.path)
+        rebuild_cache(self.path)
+        self.assertEqual(mock_read_excel.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.cashback import CashbackRules, check_cashback, load_rules, main_cashback
+from src.store import normalize_operations
+
+OPERATIONS = pd.DataFrame(
+    {
+        "data_payment": ["05.01.2024", "06.01.2024", "07.01.2024", "20.01.2024", "03.02.2024", "04.02.2024", None],
+        "card_number": ["*7197", "*7197", "*7197", "*1111", "*1111", None, "*1111"],
+        "transaction_amount": [-1000.0, -30000.0, -450.0, -199.0, 500.0, -100.0, -100.0],
+        "MCC": [5411.0, 5411.0, 5814.0, 5814.0, None, 5411.0, 5411.0],
+        "category": ["Супермаркеты", "Супермаркеты", "Фастфуд", "Фастфуд", "Пополнения", "Супермаркеты", "Фастфуд"],
+        "bonuses_including_cashback": [50.0, 1000.0, 4.0, 5.0, 0.0, 1.0, 1.0],
+    }
+)
+RULES = {
+    "default_rate": 0.01,
+    "rules": [
+        {"name": "Фастфуд по карте", "mcc": [5812, 5814], "card": "*1111", "rate": 0.03},
+        {"name": "Супермаркеты", "category": "Супермаркеты", "rate": 0.05, "cap": 1000, "end": "2024-01-31"},
+    ],
+}
+RULES_TOML = """default_rate = 0.01
+
+[[rules]]
+name = "Фастфуд по карте"
+mcc = [5812, 5814]
+card = "*1111"
+rate = 0.03
+
+[[rules]]
+name = "Супермаркеты"
+category = "Супермаркеты"
+rate = 0.05
+cap = 1000
+end = "2024-01-31"
+"""
+
+
+class TestCashback(unittest.TestCase):
+    def setUp(self) -> None:
+        self.frame = normalize_operations(OPERATIONS)
+
+    def test_expected_vs_actual(self) -> None:
+        result = check_cashback(self.frame, CashbackRules.from_dict(RULES))
+        rows = {(row["card"], row["month"]): row for row in result.to_dict("records")}
+        # 5% с 31000 = 1550, но не больше 1000 за месяц; фастфуд 7197 - по умолчанию: 4.5 -> 4
+        self.assertEqual(rows[("7197", "2024-01")]["expected"], 1004.0)
+        self.assertEqual(rows[("7197", "2024-01")]["difference"], 50.0)
+        # 3% с 199 = 5.97 -> 5; пополнение кешбэк не дает, операции без карты и даты не считаются
+        self.assertEqual(rows[("1111", "2024-01")]["expected"], 5.0)
+        self.assertEqual((rows[("1111", "2024-02")]["expected"], rows[("1111", "2024-02")]["spent"]), (0.0, 0.0))
+        self.assertEqual(list(result["month"]), ["2024-01", "2024-01", "2024-02"])
+
+    def test_failed_and_undated_rows(self) -> None:
+        raw = OPERATIONS.assign(status=["OK", "FAILED", "OK", "OK", "OK", "OK", "OK"])
+        raw.loc[3, "data_payment"] = "не указана"
+        result = check_cashback(raw).set_index(["card", "month"])
+        # отклоненная операция на 30000 кешбэк не дает: 1% с 1000 и 450
+        self.assertEqual(tuple(result.loc[("7197", "2024-01"), ["spent", "expected"]]), (1450.0, 14.0))
+        self.assertNotIn(("1111", "2024-01"), result.index)
+
+    def test_default_and_rounding(self) -> None:
+        result = check_cashback(self.frame)
+        # без правил - 1 рубль на каждые 100 рублей каждой операции
+        self.assertEqual(result.set_index(["card", "month"]).loc[("7197", "2024-01"), "expected"], 314.0)
+        exact = check_cashback(self.frame, CashbackRules.from_dict({"rounding": "none"}))
+        self.assertAlmostEqual(exact.set_index(["card", "month"]).loc[("7197", "2024-01"), "expected"], 314.5)
+        with self.assertRaises(ValueError):
+            CashbackRules.from_dict({"rules": [{"category": "Фастфуд", "rate": 0.05, "limit": 10}]})
+
+    def test_rules_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            toml_path = os.path.join(tmp, "rules.toml")
+            with open(toml_path, "w", encoding="utf-8") as f:
+                f.write(RULES_TOML)
+            json_path = os.path.join(tmp, "rules.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(RULES, f, ensure_ascii=False)
+            self.assertEqual(load_rules(toml_path).rules, load_rules(json_path).rules)
+            self.assertEqual(load_rules(os.path.join(tmp, "нет.toml")), CashbackRules())
+            data_path = os.path.join(tmp, "operations.csv")
+            output = os.path.join(tmp, "cashback.jsonl")
+            OPERATIONS.to_csv(data_path, index=False)
+            main_cashback([data_path, "--rules", toml_path, "--output", output])
+            with open(output, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+            expected = [(line["card"], line["expected"]) for line in lines[:2]]
+            self.assertEqual(expected, [("1111", 5.0), ("7197", 1004.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
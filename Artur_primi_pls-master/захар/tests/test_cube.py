@@ -0,0 +1,67 @@
+import unittest
+
+import pandas as pd
+
+from src.aggregates import card_keys
+from src.cube import SpendingCube, build_cube
+from src.store import TransactionStore, normalize_operations
+from src.views import calcul_total_expen, proc_card_data
+
+FRAME = normalize_operations(
+    pd.DataFrame(
+        {
+            "data_payment": ["01.01.2020", "15.01.2020", "03.02.2020", "10.03.2020", None],
+            "card_number": ["*1234", "*5678", "*1234", None, "*5678"],
+            "category": ["Еда", "Еда", "Такси", "Еда", "Такси"],
+            "transaction_amount": [-100.04, -50.0, 20.0, -30.0, -5.0],
+            "payment_amount": [-100.04, -50.0, 20.0, -30.0, -5.0],
+            "bonuses_including_cashback": [1.0, 0.0, 0.0, 0.0, 2.0],
+        }
+    )
+)
+
+
+class TestSpendingCube(unittest.TestCase):
+    def test_card_keys(self) -> None:
+        keys = card_keys(pd.Series(["*1234", None, "1234", "*0001"]))
+        self.assertEqual(keys.tolist()[0], "1234")
+        self.assertTrue(pd.isna(keys[1]) and pd.isna(keys[2]))
+        self.assertEqual(keys[3], "0001")
+
+    def test_period_totals(self) -> None:
+        cube = build_cube(FRAME)
+        self.assertAlmostEqual(cube.total("category", "Еда", "payment_amount", "2020-01-01", "2020-01-31"), -150.04)
+        self.assertAlmostEqual(cube.total("category", "Еда", "payment_amount", "2020-01-02", "2020-03-10"), -80.0)
+        self.assertEqual(cube.total("category", "Нет", "payment_amount"), 0.0)
+        self.assertAlmostEqual(cube.total("category", "Такси", "payment_amount"), 15.0)
+
+    def test_monthly(self) -> None:
+        months = build_cube(FRAME).monthly("card", "1234", "spent")
+        self.assertEqual([month["month"] for month in months], ["2020-01", "2020-02", "2020-03"])
+        self.assertAlmostEqual(months[0]["spent"], 100.04)
+
+    def test_incremental_add(self) -> None:
+        cube = SpendingCube()
+        cube.add(FRAME.iloc[3:])
+        cube.add(FRAME.iloc[:3])
+        full = build_cube(FRAME)
+        for dimension in ["all", "category", "card"]:
+            self.assertEqual(cube.totals(dimension, "spent").keys(), full.totals(dimension, "spent").keys())
+            for key, value in full.totals(dimension, "spent", "2020-01-10", "2020-03-01").items():
+                self.assertAlmostEqual(cube.total(dimension, key, "spent", "2020-01-10", "2020-03-01"), value)
+
+    def test_totals_rounded_to_kopeck(self) -> None:
+        # 0.1 + 0.2 в float - 0.30000000000000004
+        frame = FRAME.iloc[:2].assign(payment_amount=[0.1, 0.2])
+        self.assertEqual(build_cube(frame).total("category", "Еда", "payment_amount", "2020-01-01", "2020-01-31"), 0.3)
+
+    def test_views_match_records_exactly(self) -> None:
+        frame = FRAME.assign(transaction_amount=[-0.1, -0.2, -0.7, -30.0, -5.0])
+        store = TransactionStore(frame)
+        records = store.records()
+        self.assertEqual(calcul_total_expen(store), calcul_total_expen(records))
+        self.assertEqual(proc_card_data(store), proc_card_data(records))
+
+
+if __name__ == "__main__":
+    unittest.main()
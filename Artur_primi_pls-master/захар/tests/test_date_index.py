@@ -0,0 +1,46 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src.date_index import CategoryDateIndex
+from src.services import get_expen_by_categ
+from src.store import normalize_operations
+
+FRAME = normalize_operations(
+    pd.DataFrame(
+        {
+            "category": ["Еда", "Еда", "Еда", "Вода", "Еда", None],
+            "data_payment": ["10.01.2020", "01.01.2020", "15.04.2020", "02.01.2020", None, "05.01.2020"],
+            "payment_amount": [-10.0, -20.0, -30.0, -40.0, -50.0, -60.0],
+        }
+    )
+)
+
+
+@pytest.mark.parametrize(
+    "category, start, end, include_end, rows",
+    [
+        ("Еда", "2020-01-01", "2020-01-10", True, [0, 1]),
+        ("Еда", "2020-01-01", "2020-01-10", False, [1]),
+        ("Еда", "2020-01-02", "2020-12-31", True, [0, 2]),
+        ("Вода", "2020-01-01", "2020-12-31", True, [3]),
+        ("Нет", "2020-01-01", "2020-12-31", True, []),
+    ],
+)
+def test_rows(category: str, start: str, end: str, include_end: bool, rows: list) -> None:
+    assert CategoryDateIndex(FRAME).rows(category, start, end, include_end).tolist() == rows
+
+
+def test_total() -> None:
+    assert CategoryDateIndex(FRAME).total("Еда", "2020-01-01", "2020-04-15") == -60.0
+
+
+def test_get_expen_by_categ_does_not_mutate() -> None:
+    raw = pd.DataFrame(
+        {"category": ["Еда", "Еда"], "data_payment": ["01.03.2020", "01.01.2019"], "payment_amount": [-5.0, -7.0]}
+    )
+    before = raw.copy()
+    result = json.loads(get_expen_by_categ(raw, "Еда", "2020-04-01"))
+    assert result == {"category": "Еда", "total_expenses": -5.0, "report_date": "2020-04-01"}
+    pd.testing.assert_frame_equal(raw, before)
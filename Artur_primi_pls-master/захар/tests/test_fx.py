@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.fx import RateTable, load_rates, update_rates
+from src.services import category_expenses
+from src.store import normalize_operations
+from src.views import calcul_total_expen, proc_card_data
+
+OPERATIONS = pd.DataFrame(
+    {
+        "date_operation": ["05.06.2024 11:04:40", "04.06.2024 09:00:00", "02.05.2024 10:00:00", "01.01.2024 10:00:00"],
+        "data_payment": ["05.06.2024", None, "02.05.2024", "01.01.2024"],
+        "card_number": ["*7197", "*7197", "*1111", "*1111"],
+        "transaction_amount": [-100.0, -10.0, -1000.0, -5.0],
+        "currency_operation": ["RUB", "USD", "RUB", "EUR"],
+        "payment_amount": [-100.0, -900.0, -1000.0, -500.0],
+        "payment_currency": ["RUB", "RUB", "RUB", "RUB"],
+        "category": ["Супермаркеты", "Супермаркеты", "Супермаркеты", "Фастфуд"],
+        "bonuses_including_cashback": [1.0, 9.0, 10.0, 5.0],
+    }
+)
+RATES = pd.DataFrame(
+    {
+        "date": ["2024-02-01", "2024-05-01", "2024-06-01", "2024-06-01"],
+        "currency": ["USD", "USD", "USD", "EUR"],
+        "rate": [90.0, 80.0, 100.0, 110.0],
+    }
+)
+
+
+class TestRateTable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rates = RateTable(RATES)
+        self.frame = normalize_operations(OPERATIONS)
+
+    def test_as_of_rates(self) -> None:
+        currencies = pd.Series(["USD", "USD", "usd ", "RUB", None, "EUR"])
+        dates = pd.to_datetime(pd.Series(["2024-01-15", "2024-05-31", "2024-07-01", "2024-07-01", None, None]))
+        # раньше первого снимка - первый курс; без даты - последний; пустая валюта - рубли
+        self.assertEqual(self.rates.rates_at(currencies, dates).tolist(), [90.0, 80.0, 100.0, 1.0, 1.0, 110.0])
+        with self.assertRaises(ValueError):
+            self.rates.rates_at(pd.Series(["GBP"]), pd.Series([pd.Timestamp("2024-06-01")]))
+
+    def test_convert(self) -> None:
+        converted = self.rates.convert(self.frame, "RUB")
+        # USD без даты платежа - по дню операции 04.06 (снимок 01.06), EUR раньше снимков - 110
+        self.assertEqual(converted["transaction_amount"].tolist(), [-100.0, -1000.0, -1000.0, -550.0])
+        self.assertEqual(converted["payment_amount"].tolist(), OPERATIONS["payment_amount"].tolist())
+        in_usd = self.rates.convert(self.frame, "USD")
+        self.assertEqual(in_usd["transaction_amount"].tolist()[:2], [-1.0, -10.0])
+        self.assertEqual(set(in_usd["currency_operation"]), {"USD"})
+        # исходная таблица не меняется
+        self.assertEqual(self.frame["transaction_amount"].tolist(), OPERATIONS["transaction_amount"].tolist())
+
+    def test_totals_in_currency(self) -> None:
+        with patch("src.fx.get_rates", return_value=self.rates):
+            self.assertEqual(calcul_total_expen(self.frame), 1115.0)
+            self.assertEqual(calcul_total_expen(self.frame, currency="RUB"), 2650.0)
+            self.assertEqual(calcul_total_expen(OPERATIONS.to_dict("records"), currency="RUB"), 2650.0)
+            cards = {card["last_digits"]: card["total_spent"] for card in proc_card_data(self.frame, currency="RUB")}
+            self.assertEqual(cards, {"7197": 1100.0, "1111": 1550.0})
+            result = category_expenses(self.frame, "Супермаркеты", "2024-06-30", currency="USD")
+        self.assertEqual(result["currency"], "USD")
+        # 05.06 по 100, 02.05 по 80; операция без даты платежа в период не входит
+        self.assertTrue(np.isclose(result["total_expenses"], -1 - 12.5))
+
+    def test_snapshots_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ["rates.csv", "rates.json"]:
+                path = os.path.join(tmp, name)
+                self.rates.save(path)
+                loaded = load_rates(path)
+                pd.testing.assert_frame_equal(loaded.to_frame(), self.rates.to_frame())
+            with open(os.path.join(tmp, "rates.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["2024-06-01"], {"EUR": 110.0, "USD": 100.0})
+            self.assertEqual(len(load_rates(os.path.join(tmp, "нет.csv"))), 0)
+
+    def test_update_from_api(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rates.csv")
+            with patch("src.market.fetch_rates", return_value={"USD": 95.0}) as fetch:
+                rates = update_rates(["USD", "RUB"], "key", path, RateTable(RATES), day="2024-06-01")
+            fetch.assert_called_once_with(["USD"], "key")
+            version = rates.version
+            self.assertEqual(load_rates(path).rates_at(pd.Series(["USD"]), pd.Series([pd.NaT])).tolist(), [95.0])
+            rates.add("2024-06-02", {"USD": 96.0})
+            self.assertGreater(rates.version, version)
+
+
+if __name__ == "__main__":
+    unittest.main()
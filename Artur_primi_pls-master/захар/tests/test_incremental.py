@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.incremental import DashboardState, append_operations, load_state, refresh_dashboard
+from src.store import clear_stores, get_store, normalize_operations
+from src.views import calcul_total_expen, proc_card_data, top_transactions_5
+
+
+def make_operations(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    moments = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 180 * 86400, rows)), unit="s")
+    amounts = np.round(rng.uniform(-3000, 500, rows), 2)
+    return pd.DataFrame(
+        {
+            "date_operation": moments.strftime("%d.%m.%Y %H:%M:%S"),
+            "data_payment": moments.strftime("%d.%m.%Y"),
+            "card_number": rng.choice(["*7197", "*1111", None], rows),
+            "status": "OK",
+            "transaction_amount": amounts,
+            "payment_amount": amounts,
+            "category": rng.choice(["Супермаркеты", "Транспорт", "Каршеринг"], rows),
+            "description": rng.choice(["Магнит", "Метро", "Ситидрайв", "Колхоз"], rows),
+            "bonuses_including_cashback": rng.integers(0, 20, rows).astype(float),
+        }
+    )
+
+
+class TestDashboardState(unittest.TestCase):
+    def setUp(self) -> None:
+        self.raw = make_operations(500)
+        self.frame = normalize_operations(self.raw)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_file = os.path.join(self.tmp.name, "state.json")
+
+    def tearDown(self) -> None:
+        clear_stores()
+        self.tmp.cleanup()
+
+    def test_delta_matches_full_recompute(self) -> None:
+        state = DashboardState()
+        self.assertEqual(state.update(self.frame.iloc[:400]), 400)
+        state.save(self.state_file)
+        state = load_state(self.state_file)
+        self.assertEqual(state.update(self.frame), 100)
+        result = state.result()
+        self.assertAlmostEqual(result["total_expenses"], calcul_total_expen(self.frame), places=6)
+        expected_cards = {card["last_digits"]: card for card in proc_card_data(self.frame)}
+        for card in result["card_data"]:
+            self.assertAlmostEqual(card["total_spent"], expected_cards[card["last_digits"]]["total_spent"], places=6)
+            self.assertAlmostEqual(card["cashback"], expected_cards[card["last_digits"]]["cashback"], places=6)
+        # NaN после чтения из JSON - другой объект, сравниваем сериализованные списки
+        self.assertEqual(json.dumps(result["top_transactions"]), json.dumps(top_transactions_5(self.frame)))
+
+    def test_category_totals(self) -> None:
+        state = DashboardState()
+        state.update(self.frame)
+        end = pd.Timestamp("2024-05-15")
+        dates = self.frame["data_payment"]
+        window = self.frame[(dates >= end - pd.DateOffset(months=3)) & (dates <= end)]
+        expected = window.groupby(window["category"].astype(object))["payment_amount"].sum()
+        totals = state.category_totals("2024-05-15")
+        for category, amount in expected.items():
+            self.assertAlmostEqual(totals[category], amount, places=6)
+
+    def test_boundary_rows(self) -> None:
+        state = DashboardState()
+        state.update(self.frame)
+        self.assertEqual(state.update(self.frame), 0)
+        # та же секунда, что и high-water mark, но другая операция - новая
+        same_second = self.raw.iloc[[-1]].assign(description="Пятерочка")
+        self.assertEqual(state.update(normalize_operations(same_second)), 1)
+        self.assertEqual(state.rows, 501)
+
+
+class TestAppendOperations(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_stores()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "operations.csv")
+        self.state_file = os.path.join(self.tmp.name, "state.json")
+        self.raw = make_operations(300)
+        self.raw.iloc[:250].to_csv(self.path, index=False)
+
+    def tearDown(self) -> None:
+        clear_stores()
+        self.tmp.cleanup()
+
+    def test_append_updates_store_and_state(self) -> None:
+        first = refresh_dashboard(self.path, self.state_file)
+        self.assertEqual(first["rows"], 250)
+        store = get_store(self.path)
+        store.search_index()
+        # новая выписка пересекается с уже учтенными строками
+        result = append_operations(self.raw.iloc[200:], self.path, self.state_file)
+        self.assertEqual(result["rows"], 300)
+        self.assertEqual(len(get_store(self.path)), 300)
+        self.assertEqual(len(store.search_index().search("магнит")), int((self.raw["description"] == "Магнит").sum()))
+        self.assertAlmostEqual(result["total_expenses"], calcul_total_expen(normalize_operations(self.raw)), places=6)
+        self.assertEqual(refresh_dashboard(self.path, self.state_file)["rows"], 300)
+
+    def test_new_export_extends_state(self) -> None:
+        refresh_dashboard(self.path, self.state_file)
+        # новая выгрузка той же выписки: старые строки те же, дописаны новые
+        self.raw.to_csv(self.path, index=False)
+        os.utime(self.path, ns=(0, 0))
+        with patch("src.incremental._rebuild", side_effect=AssertionError("пересчет")):
+            result = refresh_dashboard(self.path, self.state_file)
+        self.assertEqual(result["rows"], 300)
+        self.assertAlmostEqual(result["total_expenses"], calcul_total_expen(normalize_operations(self.raw)), places=6)
+        self.assertEqual(load_state(self.state_file).store_version, get_store(self.path).version)
+
+    def test_appended_rows_survive_restart(self) -> None:
+        refresh_dashboard(self.path, self.state_file)
+        append_operations(self.raw.iloc[250:], self.path, self.state_file)
+        # новый процесс: хранилище читается с диска заново
+        clear_stores()
+        self.assertEqual(len(get_store(self.path)), 300)
+        with patch("src.incremental._rebuild", side_effect=AssertionError("пересчет")):
+            self.assertEqual(refresh_dashboard(self.path, self.state_file)["rows"], 300)
+
+    def test_other_statement_rebuilds(self) -> None:
+        refresh_dashboard(self.path, self.state_file)
+        other = os.path.join(self.tmp.name, "other.csv")
+        self.raw.iloc[[0]].assign(card_number="*2222", transaction_amount=-7.0, payment_amount=-7.0).to_csv(
+            other, index=False
+        )
+        result = refresh_dashboard(other, self.state_file)
+        self.assertEqual((result["rows"], result["total_expenses"]), (1, 7.0))
+        self.assertEqual([card["last_digits"] for card in result["card_data"]], ["2222"])
+        # та же выписка, но файл переписан - тоже заново
+        self.raw.iloc[:100].to_csv(self.path, index=False)
+        os.utime(self.path, ns=(0, 0))
+        self.assertEqual(refresh_dashboard(self.path, self.state_file)["rows"], 100)
+
+    def test_rows_older_than_mark_counted(self) -> None:
+        refresh_dashboard(self.path, self.state_file)
+        late = self.raw.iloc[[10]].assign(description="Пятерочка", transaction_amount=-123.0, payment_amount=-123.0)
+        result = append_operations(pd.concat([self.raw.iloc[:250], late]), self.path, self.state_file)
+        self.assertEqual(result["rows"], 251)
+        expected = normalize_operations(pd.concat([self.raw.iloc[:250], late]))
+        self.assertAlmostEqual(result["total_expenses"], calcul_total_expen(expected), places=6)
+        self.assertEqual(refresh_dashboard(self.path, self.state_file)["rows"], 251)
+
+
+if __name__ == "__main__":
+    unittest.main()
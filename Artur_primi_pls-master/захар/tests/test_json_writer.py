@@ -0,0 +1,72 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.json_writer import dumps_records, iter_records, json_safe, write_json, write_records
+from src.store import normalize_operations
+from src.utils import read_json
+
+OPERATIONS = pd.DataFrame(
+    {
+        "date_operation": ["05.06.2024 11:04:40", "04.06.2024 09:00:00", "03.06.2024 08:00:00"],
+        "data_payment": ["05.06.2024", None, "03.06.2024"],
+        "card_number": [None, "*1111", "*7197"],
+        "transaction_amount": [-14.78, -28.0, np.nan],
+        "category": ["Услуги банка", "Транспорт", "Супермаркеты"],
+        "description": ["Плата за оповещения", "Метро", "Магнит"],
+    }
+)
+
+
+class TestJsonWriter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.frame = normalize_operations(OPERATIONS)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_same_layout_as_json_dump(self) -> None:
+        records = [{"description": "Обед", "amount": 1.5}, {"description": "Кафе", "amount": 2}]
+        self.assertEqual(dumps_records(records), json.dumps(records, indent=4, ensure_ascii=False))
+        self.assertEqual(dumps_records([]), json.dumps([], indent=4))
+        self.assertEqual(dumps_records(iter(records), indent=None), json.dumps(records, ensure_ascii=False))
+
+    def test_nan_written_as_null(self) -> None:
+        text = dumps_records(self.frame)
+        self.assertNotIn("NaN", text)
+        records = json.loads(text)
+        self.assertIsNone(records[0]["card_number"])
+        self.assertIsNone(records[1]["data_payment"])
+        self.assertIsNone(records[2]["transaction_amount"])
+        self.assertEqual(records[1]["card_number"], "*1111")
+        self.assertEqual(json_safe({"a": [np.float64("inf"), np.int64(3)]}), {"a": [None, 3]})
+
+    def test_jsonl_gzip(self) -> None:
+        path = os.path.join(self.tmp.name, "result.jsonl.gz")
+        self.assertEqual(write_records(path, self.frame, lines=True), 3)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        descriptions = [json.loads(line)["description"] for line in lines]
+        self.assertEqual(descriptions, ["Плата за оповещения", "Метро", "Магнит"])
+
+    def test_frame_written_in_chunks(self) -> None:
+        frame = pd.concat([self.frame] * 5, ignore_index=True)
+        self.assertEqual(list(iter_records(frame, chunk_size=4)), list(iter_records(frame)))
+        path = os.path.join(self.tmp.name, "result.json")
+        write_records(path, frame)
+        self.assertEqual(len(read_json(path)), 15)
+
+    def test_write_json_dict(self) -> None:
+        path = os.path.join(self.tmp.name, "operations_data.json")
+        write_json(path, {"total_expenses": float("nan"), "card_data": [{"cashback": np.float64(1.5)}]})
+        self.assertEqual(read_json(path), {"total_expenses": None, "card_data": [{"cashback": 1.5}]})
+
+
+if __name__ == "__main__":
+    unittest.main()
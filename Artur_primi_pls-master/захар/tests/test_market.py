@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from src.market import TTLCache, fetch_rates, get_market_data
+
+
+class StubRatesHandler(BaseHTTPRequestHandler):
+    """Заглушка apilayer: отвечает курсом рубля к валюте base и запоминает запросы."""
+
+    requests_seen: List[str] = []
+    rates = {"USD": 92.5163, "EUR": 99.0814}
+
+    def do_GET(self) -> None:
+        StubRatesHandler.requests_seen.append(self.path)
+        query = parse_qs(urlparse(self.path).query)
+        base = query["base"][0]
+        body = json.dumps({"base": base, "rates": {symbol: self.rates[base] for symbol in query["symbols"]}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+class TestMarketData(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubRatesHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/latest"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        StubRatesHandler.requests_seen = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "market_cache.json")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_fetch_rates_as_published(self) -> None:
+        rates = fetch_rates(["USD", "EUR"], "key", self.url)
+        # курс из ответа без пересчета, как в прежнем get_cur_rate
+        self.assertEqual(rates, {"USD": 92.5163, "EUR": 99.0814})
+        self.assertEqual(
+            sorted(parse_qs(urlparse(path).query)["base"][0] for path in StubRatesHandler.requests_seen), ["EUR", "USD"]
+        )
+        self.assertTrue(all("symbols=RUB" in path for path in StubRatesHandler.requests_seen))
+
+    @patch("yfinance.Ticker")
+    def test_cached_run_makes_no_calls(self, mock_ticker: Any) -> None:
+        mock_data = Mock()
+        mock_data.history.return_value = pd.DataFrame({"High": [100.0]})
+        mock_ticker.return_value = mock_data
+        first = get_market_data(["USD", "EUR"], ["AAPL", "MSFT"], cache=TTLCache(self.cache_path), base_url=self.url)
+        expected_rates = [{"currency": "USD", "rate": 92.5163}, {"currency": "EUR", "rate": 99.0814}]
+        self.assertEqual(first["currency_rates"], expected_rates)
+        self.assertEqual(first["stock_prices"], [{"stock": "AAPL", "price": 100.0}, {"stock": "MSFT", "price": 100.0}])
+        self.assertEqual(len(StubRatesHandler.requests_seen), 2)
+        self.assertEqual(mock_ticker.call_count, 2)
+        # новый запуск: кеш читается с диска, сеть не нужна
+        second = get_market_data(["USD", "EUR"], ["AAPL", "MSFT"], cache=TTLCache(self.cache_path), base_url=self.url)
+        self.assertEqual(second, first)
+        self.assertEqual(len(StubRatesHandler.requests_seen), 2)
+        self.assertEqual(mock_ticker.call_count, 2)
+
+    def test_expired_values_refetched(self) -> None:
+        cache = TTLCache(self.cache_path, ttl=-1)
+        get_market_data(["USD"], [], cache=cache, base_url=self.url)
+        get_market_data(["USD"], [], cache=cache, base_url=self.url)
+        self.assertEqual(len(StubRatesHandler.requests_seen), 2)
+
+    def test_failed_fetch_returns_none(self) -> None:
+        result = get_market_data(["GBP"], [], cache=TTLCache(None), base_url=self.url + "/missing")
+        self.assertEqual(result["currency_rates"], [{"currency": "GBP", "rate": None}])
+
+    def test_zero_rate_skipped(self) -> None:
+        with patch.object(StubRatesHandler, "rates", {"USD": 0, "EUR": 99.0814}):
+            result = get_market_data(["USD", "EUR"], [], cache=TTLCache(None), base_url=self.url)
+        self.assertEqual(
+            result["currency_rates"], [{"currency": "USD", "rate": None}, {"currency": "EUR", "rate": 99.0814}]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.metrics import METRICS, Metrics, timed, write_metrics
+from src.server import handle_request
+from src.views import calcul_total_expen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.metrics = Metrics()
+
+    def test_decorator_and_context(self) -> None:
+        @timed("aggregate", rows=len, metrics=self.metrics)
+        def total(rows: list) -> float:
+            return sum(rows)
+
+        self.assertEqual(total([1.0, 2.0]), 3.0)
+        total([1.0])
+        with timed("serialize", "dump", metrics=self.metrics) as timer:
+            timer.rows, timer.size = 2, 128
+        snapshot = self.metrics.snapshot()
+        item = snapshot["aggregate"]["total"]
+        self.assertEqual((item["calls"], item["rows"], item["errors"]), (2, 3, 0))
+        self.assertEqual(item["seconds"]["count"], 2)
+        self.assertEqual(item["seconds"]["buckets"]["+Inf"], 2)
+        self.assertEqual(snapshot["serialize"]["dump"]["bytes"], 128)
+
+    def test_error_counted_and_logged(self) -> None:
+        with self.assertLogs("src.metrics", level="INFO") as logs:
+            with self.assertRaises(KeyError):
+                with timed("load", "broken", metrics=self.metrics) as timer:
+                    timer.rows = 5
+                    raise KeyError("card_number")
+        event = json.loads(logs.records[0].getMessage())
+        self.assertEqual((event["stage"], event["operation"], event["rows"]), ("load", "broken", 5))
+        self.assertEqual(event["error"], "KeyError")
+        self.assertEqual(self.metrics.snapshot()["load"]["broken"]["errors"], 1)
+
+    def test_prometheus(self) -> None:
+        with timed("fetch", "rates", metrics=self.metrics):
+            pass
+        text = self.metrics.to_prometheus()
+        self.assertIn("# TYPE operations_calls_total counter", text)
+        self.assertIn('operations_calls_total{stage="fetch",operation="rates"} 1', text)
+        self.assertIn('operations_stage_seconds_bucket{stage="fetch",operation="rates",le="+Inf"} 1', text)
+        self.assertIn('operations_stage_seconds_count{stage="fetch",operation="rates"} 1', text)
+        with tempfile.TemporaryDirectory() as tmp:
+            write_metrics(os.path.join(tmp, "metrics.prom"), self.metrics)
+            write_metrics(os.path.join(tmp, "metrics.json"), self.metrics)
+            with open(os.path.join(tmp, "metrics.prom"), encoding="utf-8") as f:
+                self.assertEqual(f.read(), text)
+            with open(os.path.join(tmp, "metrics.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["fetch"]["rates"]["calls"], 1)
+
+    def test_hot_paths_instrumented(self) -> None:
+        METRICS.reset()
+        calcul_total_expen([{"transaction_amount": -10.0}, {"transaction_amount": 5.0}])
+        self.assertEqual(METRICS.snapshot()["aggregate"]["calcul_total_expen"]["rows"], 2)
+        status, body = handle_request("/metrics", {"format": "prometheus"})
+        self.assertEqual(status, 200)
+        self.assertIn('operation="calcul_total_expen"', body)
+        self.assertEqual(handle_request("/metrics", {})[1]["aggregate"]["calcul_total_expen"]["calls"], 1)
+
+    def test_log_through_queue(self) -> None:
+        # liggin пишет в файл из отдельного потока; при выходе очередь дописывается
+        with tempfile.TemporaryDirectory() as tmp:
+            code = (
+                "import logging; from src.utils import liggin; liggin(); "
+                "logging.getLogger('src.views').info('проверка очереди')"
+            )
+            env = dict(os.environ, PYTHONPATH=ROOT)
+            subprocess.run([sys.executable, "-c", code], cwd=tmp, env=env, check=True)
+            with open(os.path.join(tmp, "utils_log.txt"), encoding="utf-8") as f:
+                line = f.read()
+        self.assertIn("INFO - <string>:1 - проверка очереди", line)
+
+
+if __name__ == "__main__":
+    unittest.main()
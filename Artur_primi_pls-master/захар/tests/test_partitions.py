@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from src import partitions
+from src.partitions import PartitionedStore, ingest_statement, main_partitions, read_manifest
+from src.reports import filter_by_category_date
+from src.result_cache import QUERY_CACHE
+from src.services import category_expenses
+from src.store import clear_stores, get_store, normalize_operations
+
+OPERATIONS = pd.DataFrame(
+    {
+        "date_operation": [
+            "05.06.2024 11:04:40",
+            "04.06.2024 09:00:00",
+            "01.05.2024 10:00:00",
+            "15.01.2023 10:00:00",
+            "02.02.2024 10:00:00",
+        ],
+        "data_payment": ["05.06.2024", "04.06.2024", "01.05.2024", "15.01.2023", None],
+        "card_number": ["*7197", "*1111", None, "*7197", "*7197"],
+        "transaction_amount": [-160.89, -28.0, -250.0, -1000.0, -99.0],
+        "payment_amount": [-160.89, -28.0, -250.0, -1000.0, -99.0],
+        "category": ["Супермаркеты", "Транспорт", "Супермаркеты", "Супермаркеты", "Супермаркеты"],
+        "description": ["Колхоз", "Метро Санкт-Петербург", "Магнит", "Лента", "Ёлки"],
+    }
+)
+
+
+class TestPartitions(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_stores()
+        QUERY_CACHE.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, "operations.csv")
+        self.dataset = os.path.join(self.tmp.name, "dataset")
+        OPERATIONS.to_csv(self.csv_path, index=False)
+        self.added = ingest_statement(self.dataset, self.csv_path)
+
+    def tearDown(self) -> None:
+        clear_stores()
+        QUERY_CACHE.clear()
+        self.tmp.cleanup()
+
+    def test_manifest(self) -> None:
+        self.assertEqual(self.added, {"2023-01": 1, "2024-05": 1, "2024-06": 2, "undated": 1})
+        june = read_manifest(self.dataset)["partitions"]["2024-06"]
+        self.assertEqual((june["rows"], june["min_date"], june["max_date"]), (2, "2024-06-04", "2024-06-05"))
+        self.assertEqual(june["categories"], ["Супермаркеты", "Транспорт"])
+        # та же выписка второй раз ничего не добавляет и части не переписывает
+        self.assertEqual(ingest_statement(self.dataset, self.csv_path), {})
+        self.assertEqual(read_manifest(self.dataset)["partitions"]["2024-06"]["directory"], june["directory"])
+
+    def test_pruned_queries_match_memory(self) -> None:
+        store = get_store(self.dataset)
+        memory = get_store(self.csv_path)
+        self.assertIsInstance(store, PartitionedStore)
+        self.assertEqual(store.partitions_for("Транспорт", "2024-03-30", "2024-06-30"), ["2024-06"])
+        self.assertEqual(store.partitions_for("Супермаркеты", "2024-05-02", "2024-07-31"), ["2024-06"])
+        with patch("src.partitions.read_partition", wraps=partitions.read_partition) as read:
+            result = category_expenses(store, "Супермаркеты", "2024-06-30")
+            self.assertEqual(read.call_count, 2)
+            reports = filter_by_category_date(store, "Супермаркеты", "01.05.2024")
+        self.assertAlmostEqual(
+            result["total_expenses"], category_expenses(memory.frame, "Супермаркеты", "2024-06-30")["total_expenses"]
+        )
+        self.assertEqual(
+            json.dumps(reports), json.dumps(filter_by_category_date(memory.frame, "Супермаркеты", "01.05.2024"))
+        )
+        # без границ - вся история, включая операции без даты платежа
+        self.assertAlmostEqual(store.category_total("Супермаркеты", "payment_amount"), -1509.89)
+        self.assertIsNone(store._frame)
+        pd.testing.assert_frame_equal(store.frame, memory.frame)
+
+    def test_append_and_cli(self) -> None:
+        store = get_store(self.dataset)
+        store.append(normalize_operations(OPERATIONS.iloc[:1].assign(date_operation="06.06.2024 10:00:00")))
+        self.assertEqual(len(store), 6)
+        self.assertEqual(read_manifest(self.dataset)["partitions"]["2024-06"]["rows"], 3)
+        self.assertIsNot(get_store(self.dataset), store)
+        with patch("builtins.print") as printed:
+            main_partitions(["info", self.dataset])
+        self.assertIn("2024-06: 3 строк", printed.call_args_list[2].args[0])
+
+    def test_recreated_dataset(self) -> None:
+        store = get_store(self.dataset)
+        self.assertAlmostEqual(category_expenses(store, "Супермаркеты", "2024-06-30")["total_expenses"], -410.89)
+        # набор удален и собран заново из другой выписки: счетчик версий снова 1, но это другой набор
+        shutil.rmtree(self.dataset)
+        OPERATIONS.assign(category="Транспорт").to_csv(self.csv_path, index=False)
+        ingest_statement(self.dataset, self.csv_path)
+        recreated = get_store(self.dataset)
+        self.assertIsNot(recreated, store)
+        self.assertNotEqual(recreated.version, store.version)
+        self.assertEqual(category_expenses(recreated, "Супермаркеты", "2024-06-30")["total_expenses"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
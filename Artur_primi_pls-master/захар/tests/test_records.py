@@ -0,0 +1,63 @@
+import json
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.records import Transaction, TransactionRecords
+from src.store import normalize_operations, to_records
+from src.views import calcul_total_expen, proc_card_data, top_transactions_5
+
+OPERATIONS = pd.DataFrame(
+    {
+        "date_operation": ["05.06.2024 11:04:40", "04.06.2024 09:00:00", "03.06.2024 08:00:00", "02.06.2024 10:00:00"],
+        "data_payment": ["05.06.2024", None, "03.06.2024", "02.06.2024"],
+        "card_number": [None, "*1111", "*7197", "*1111"],
+        "status": ["OK", "OK", "OK", "FAILED"],
+        "transaction_amount": [-14.78, -28.0, -160.89, 500.0],
+        "category": ["Услуги банка", "Транспорт", "Супермаркеты", "Пополнения"],
+        "description": ["Плата за оповещения", "Метро", "Колхоз", "Пополнение"],
+        "bonuses_including_cashback": [0.0, 0.0, 3.0, np.nan],
+    }
+)
+
+
+class TestTransactionRecords(unittest.TestCase):
+    def setUp(self) -> None:
+        self.frame = normalize_operations(OPERATIONS)
+        self.records = to_records(self.frame)
+        self.compact = TransactionRecords.from_frame(self.frame)
+
+    def test_views_accept_compact(self) -> None:
+        for compact in [self.compact, TransactionRecords.from_records(self.records)]:
+            self.assertEqual(calcul_total_expen(compact), calcul_total_expen(self.records))
+            self.assertEqual(json.dumps(proc_card_data(compact)), json.dumps(proc_card_data(self.records)))
+            self.assertEqual(json.dumps(top_transactions_5(compact)), json.dumps(top_transactions_5(self.records)))
+
+    def test_rows_like_dicts(self) -> None:
+        rows = list(self.compact)
+        self.assertEqual(len(rows), 4)
+        self.assertIsInstance(rows[1], Transaction)
+        self.assertEqual(rows[1]["date_operation"], "04.06.2024 09:00:00")
+        self.assertTrue(pd.isna(rows[1]["data_payment"]))
+        self.assertEqual(rows[2].card_number, "*7197")
+        self.assertEqual(rows[0].get("unknown", 0.0), 0.0)
+        self.assertEqual(json.dumps(rows[3].to_dict()), json.dumps(self.compact[-1].to_dict()))
+        # старый код для списка словарей работает и со строками Transaction
+        self.assertEqual(calcul_total_expen(rows), calcul_total_expen(self.records))
+        with self.assertRaises(KeyError):
+            rows[0]["unknown"]
+        self.assertFalse(hasattr(rows[0], "__dict__"))
+
+    def test_strings_shared(self) -> None:
+        # коды int32 в таблицу строк, одна строка на значение
+        self.assertEqual(self.compact.codes["category"].dtype, np.int32)
+        self.assertEqual(list(self.compact.strings["card_number"]), ["*1111", "*7197"])
+        self.assertIs(self.compact[1].card_number, self.compact[3].card_number)
+        self.assertEqual(json.dumps(self.compact.to_records()), json.dumps(self.records))
+        many = TransactionRecords.from_frame(pd.concat([self.frame] * 1000, ignore_index=True))
+        self.assertLess(many.nbytes() / len(many), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,8 @@ from unittest.mock import mock_open, patch
 
 import pandas as pd
 
-from src.reports import main_reports, read_xlsx
+from src.reports import filter_by_category_date, main_reports, read_xlsx
+from src.store import normalize_operations
 
 
 class TestReadTransactionsXlsx(unittest.TestCase):
@@ -16,7 +17,7 @@ class TestReadTransactionsXlsx(unittest.TestCase):
         )
         mock_read_excel.return_value = mock_df
         result = read_xlsx("dum_path_52.xlsx")
-        pd.testing.assert_frame_equal(result, mock_df)
+        pd.testing.assert_frame_equal(result, normalize_operations(mock_df))
 
     @patch("pandas.read_excel", side_effect=FileNotFoundError)
     def test_read_transactions_xlsx_failure(self, mock_read_excel: Any) -> None:
@@ -24,6 +25,27 @@ class TestReadTransactionsXlsx(unittest.TestCase):
         self.assertTrue(result.empty)
 
 
+class TestFilterByCategoryDate(unittest.TestCase):
+    def test_filter_by_category_date_window(self) -> None:
+        operations = normalize_operations(
+            pd.DataFrame(
+                {
+                    "category": ["Еда", "Еда", "Еда", "Вода"],
+                    "data_payment": ["31.12.2019", "01.01.2020", "15.03.2020", "02.01.2020"],
+                    "payment_amount": [1.0, 2.0, 3.0, 4.0],
+                }
+            )
+        )
+        result = filter_by_category_date(operations, "Еда", "01.01.2020")
+        self.assertEqual(
+            result,
+            [
+                {"category": "Еда", "data_payment": "01.01.2020", "payment_amount": 2.0},
+                {"category": "Еда", "data_payment": "15.03.2020", "payment_amount": 3.0},
+            ],
+        )
+
+
 class TestMainReports(unittest.TestCase):
     @patch("builtins.open", new_callable=mock_open)
     @patch("src.reports.filter_transactions_by_category_and_date")
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.reports import filter_by_category_date
+from src.result_cache import QUERY_CACHE, ResultCache
+from src.services import category_expenses, find_transactions, get_keyword
+from src.store import clear_stores, get_store, normalize_operations
+
+OPERATIONS = pd.DataFrame(
+    {
+        "date_operation": ["05.06.2024 11:04:40", "04.06.2024 09:00:00", "01.05.2024 10:00:00"],
+        "data_payment": ["05.06.2024", "04.06.2024", "01.05.2024"],
+        "card_number": ["*7197", "*1111", np.nan],
+        "status": ["OK", "OK", "OK"],
+        "transaction_amount": [-160.89, -28.0, -250.0],
+        "payment_amount": [-160.89, -28.0, -250.0],
+        "category": ["Супермаркеты", "Транспорт", "Супермаркеты"],
+        "description": ["Колхоз", "Метро Санкт-Петербург", "Магнит"],
+    }
+)
+
+
+class Store:
+    def __init__(self, version: str, source: str = "operations.xls") -> None:
+        self.version = version
+        self.source = source
+
+
+class TestResultCache(unittest.TestCase):
+    def test_lru_and_size_bound(self) -> None:
+        cache = ResultCache(max_entries=2, max_bytes=10)
+        for name in ["a", "b", "c"]:
+            cache.set(name, "xx")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "xx")
+        cache.set("d", "yyyyyyyy")
+        # вытесняется давно не использованная "c", а не только что прочитанная "b"
+        self.assertIsNone(cache.get("c"))
+        self.assertEqual(cache.get("b"), "xx")
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"], stats["evictions"]), (2, 10, 2))
+        cache.set("e", "z")
+        # 11 байт больше предела - уходит и "d"
+        self.assertIsNone(cache.get("d"))
+        cache.set("huge", "z" * 11)
+        self.assertIsNone(cache.get("huge"))
+
+    def test_key_on_store_version(self) -> None:
+        cache = ResultCache()
+        calls = []
+
+        def compute() -> dict:
+            calls.append(1)
+            return {"total": len(calls)}
+
+        self.assertEqual(cache.get_or_compute("category", {"category": "Фастфуд"}, Store("1"), compute), {"total": 1})
+        self.assertEqual(cache.get_or_compute("category", {"category": "Фастфуд"}, Store("1"), compute), {"total": 1})
+        self.assertEqual(cache.get_or_compute("category", {"category": "Фастфуд"}, Store("2"), compute), {"total": 2})
+        # таблицы без версии (не из файла) не кешируются
+        self.assertEqual(cache.get_or_compute("category", {"category": "Фастфуд"}, Store(""), compute), {"total": 3})
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["bypass"]), (1, 2, 1))
+
+    def test_disk_tier(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = os.path.join(tmp, "answers")
+            first = ResultCache(directory=directory)
+            first.get_or_compute("keyword", {"q": "обед"}, Store("1"), lambda: "[]", as_text=True)
+            second = ResultCache(directory=directory)
+            value = second.get_or_compute("keyword", {"q": "обед"}, Store("1"), lambda: "пересчитано", as_text=True)
+            self.assertEqual(value, "[]")
+            self.assertEqual(second.stats()["disk_hits"], 1)
+            second.clear()
+            self.assertFalse(os.path.exists(directory))
+
+
+class TestCachedQueries(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_stores()
+        QUERY_CACHE.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "operations.csv")
+        OPERATIONS.to_csv(self.path, index=False)
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        clear_stores()
+        QUERY_CACHE.clear()
+        self.tmp.cleanup()
+
+    def test_repeated_queries_hit(self) -> None:
+        first = get_keyword("МАГНИТ", self.path)
+        with patch("src.services._search_records", side_effect=AssertionError("пересчет")):
+            self.assertEqual(get_keyword("магнит", self.path), first)
+        frame = get_store(self.path).frame
+        total = category_expenses(frame, "Супермаркеты", "2024-06-30")
+        self.assertEqual(category_expenses(frame, "Супермаркеты", "2024-06-30"), total)
+        reports = filter_by_category_date(frame, "Супермаркеты", "01.05.2024")
+        cached = filter_by_category_date(frame, "Супермаркеты", "01.05.2024")
+        self.assertEqual(json.dumps(cached), json.dumps(reports))
+        self.assertTrue(np.isnan(cached[1]["card_number"]))
+        self.assertEqual(QUERY_CACHE.stats()["hits"], 3)
+
+    def test_new_data_invalidates(self) -> None:
+        store = get_store(self.path)
+        self.assertEqual(len(find_transactions("Супермаркеты", self.path)), 2)
+        extra = normalize_operations(OPERATIONS.iloc[:1].assign(date_operation="06.06.2024 10:00:00"))
+        store.append(extra)
+        self.assertEqual(len(find_transactions("Супермаркеты", self.path)), 3)
+        # посторонняя таблица без хранилища считается каждый раз
+        result = category_expenses(normalize_operations(OPERATIONS), "Супермаркеты", "2024-06-30")
+        self.assertEqual(result["category"], "Супермаркеты")
+        self.assertEqual(QUERY_CACHE.stats()["bypass"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
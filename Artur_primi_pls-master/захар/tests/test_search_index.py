@@ -0,0 +1,93 @@
+import os
+import tempfile
+
+import pandas as pd
+import pytest
+
+from src.search_index import SearchIndex, edit_distance, normalize_text, open_index, stem_ru
+
+FRAME = pd.DataFrame(
+    {
+        "description": ["Пятёрочка", "Обед в кафе", "Метро", float("nan"), "ОБЕДЫ"],
+        "category": ["Супермаркеты", "Фастфуд", "Транспорт", "Переводы", "Фастфуд"],
+    }
+)
+
+
+def test_normalize_text() -> None:
+    assert normalize_text("ПЯТЁРОЧКА") == "пятерочка"
+
+
+@pytest.mark.parametrize(
+    "query, rows",
+    [
+        ("обед", [1, 4]),
+        ("ФАСТ", [1, 4]),
+        ("пятерочка", [0]),
+        ("тр", [2]),
+        ("нет такого", []),
+        ("", [0, 1, 2, 3, 4]),
+    ],
+)
+def test_search(query: str, rows: list) -> None:
+    index = SearchIndex()
+    index.add(FRAME)
+    assert index.search(query).tolist() == rows
+
+
+def test_incremental_add_matches_full_build() -> None:
+    full = SearchIndex()
+    full.add(FRAME)
+    parts = SearchIndex()
+    parts.add(FRAME.iloc[:2])
+    parts.add(FRAME.iloc[2:])
+    for query in ["обед", "фаст", "е", "метро"]:
+        assert parts.search(query).tolist() == full.search(query).tolist()
+
+
+def test_open_index_persists_and_appends() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.npz")
+        open_index(FRAME.iloc[:3], path, "v1")
+        index = open_index(FRAME, path, "v1")
+        assert index.rows == 5
+        assert index.search("обед").tolist() == [1, 4]
+        assert open_index(FRAME.iloc[:1], path, "v2").rows == 1
+
+
+@pytest.mark.parametrize("word, stem", [("обеды", "обед"), ("обед", "обед"), ("аптеки", "аптек"), ("аптека", "аптек")])
+def test_stem_ru(word: str, stem: str) -> None:
+    assert stem_ru(word) == stem
+
+
+def test_edit_distance_bounded() -> None:
+    assert edit_distance("магнит", "магнт", 2) == 1
+    assert edit_distance("магнит", "метро", 2) == 3
+    assert edit_distance("а", "абвгд", 2) == 3
+
+
+@pytest.mark.parametrize(
+    "query, stem, rows",
+    [
+        ("пятерчка", False, [0]),
+        ("Обеды", False, [4, 1]),
+        ("обеды", True, [1, 4]),
+        ("метрро", False, [2]),
+        ("совсем другое", False, []),
+    ],
+)
+def test_fuzzy_search(query: str, stem: bool, rows: list) -> None:
+    index = SearchIndex()
+    index.add(FRAME)
+    found, scores = index.fuzzy_search(query, stem=stem)
+    assert found.tolist() == rows
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_fuzzy_limit_and_new_rows() -> None:
+    index = SearchIndex()
+    index.add(FRAME)
+    assert len(index.fuzzy_search("обед", limit=1)[0]) == 1
+    # словарь слов дополняется строками, добавленными после первого нечеткого запроса
+    index.add(pd.DataFrame({"description": ["Магнит"], "category": ["Супермаркеты"]}))
+    assert index.fuzzy_search("магнт")[0].tolist() == [5]
@@ -0,0 +1,140 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Tuple
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import pandas as pd
+
+from src.main import run_cli
+from src.server import ApiServer, handle_request
+from src.store import clear_stores
+
+OPERATIONS = pd.DataFrame(
+    {
+        "date_operation": ["05.06.2024 11:04:40", "04.06.2024 09:00:00", "01.05.2024 10:00:00"],
+        "data_payment": ["05.06.2024", "04.06.2024", "01.05.2024"],
+        "card_number": ["*7197", "*1111", "*7197"],
+        "status": ["OK", "OK", "OK"],
+        "transaction_amount": [-160.89, -28.0, -250.0],
+        "payment_amount": [-160.89, -28.0, -250.0],
+        "category": ["Супермаркеты", "Транспорт", "Супермаркеты"],
+        "description": ["Колхоз", "Метро Санкт-Петербург", "Магнит"],
+        "bonuses_including_cashback": [3.0, 0.0, 5.0],
+    }
+)
+MARKET = {"currency_rates": [{"currency": "USD", "rate": 90.0}], "stock_prices": [{"stock": "AAPL", "price": 200.0}]}
+
+
+class TestHandleRequest(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_stores()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "operations.csv")
+        OPERATIONS.to_csv(self.path, index=False)
+
+    def tearDown(self) -> None:
+        clear_stores()
+        self.tmp.cleanup()
+
+    def test_search(self) -> None:
+        status, body = handle_request("/search", {"q": "метро"}, self.path)
+        self.assertEqual(status, 200)
+        self.assertEqual([record["description"] for record in body], ["Метро Санкт-Петербург"])
+
+    def test_category(self) -> None:
+        status, body = handle_request("/category", {"category": "Супермаркеты", "date": "2024-06-10"}, self.path)
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"category": "Супермаркеты", "total_expenses": -410.89, "report_date": "2024-06-10"})
+
+    def test_reports(self) -> None:
+        status, body = handle_request("/reports", {"category": "Супермаркеты", "start_date": "01.06.2024"}, self.path)
+        self.assertEqual(status, 200)
+        self.assertEqual([record["description"] for record in body], ["Колхоз"])
+
+    @patch("src.views.get_market_data", return_value=MARKET)
+    def test_dashboard(self, mock_market: Any) -> None:
+        status, body = handle_request("/dashboard", {"date_time": "2024-06-05 13:00:00"}, self.path)
+        self.assertEqual(status, 200)
+        self.assertEqual(body["greeting"], "Добрый день!")
+        self.assertEqual(body["total_expenses"], 438.89)
+        self.assertEqual(len(body["top_transactions"]), 3)
+        self.assertEqual(body["currency_rates"], MARKET["currency_rates"])
+
+    def test_errors(self) -> None:
+        self.assertEqual(handle_request("/unknown", {}, self.path)[0], 404)
+        self.assertEqual(handle_request("/search", {}, self.path)[0], 400)
+        self.assertEqual(handle_request("/greeting", {"date_time": "вчера"}, self.path)[0], 400)
+        self.assertEqual(handle_request("/search", {"q": "метро"}, os.path.join(self.tmp.name, "no.xls"))[0], 503)
+
+
+class TestApiServer(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_stores()
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "operations.csv")
+        OPERATIONS.to_csv(path, index=False)
+        self.server = ApiServer(path, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        clear_stores()
+        self.tmp.cleanup()
+
+    def get(self, path: str) -> Tuple[int, Any]:
+        try:
+            with urlopen(self.base + path, timeout=10) as response:
+                return response.status, json.loads(response.read().decode("utf-8"))
+        except HTTPError as e:
+            return e.code, json.loads(e.read().decode("utf-8"))
+
+    def test_concurrent_requests(self) -> None:
+        paths = [f"/search?q={quote('магнит')}", f"/category?category={quote('Транспорт')}&date=2024-06-10"] * 10
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(self.get, paths))
+        self.assertTrue(all(status == 200 for status, _ in responses))
+        self.assertEqual(responses[0][1][0]["description"], "Магнит")
+        self.assertEqual(responses[1][1]["total_expenses"], -28.0)
+
+    def test_not_found(self) -> None:
+        status, body = self.get("/nothing")
+        self.assertEqual(status, 404)
+        self.assertIn("error", body)
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_stores()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "operations.csv")
+        OPERATIONS.to_csv(self.path, index=False)
+
+    def tearDown(self) -> None:
+        clear_stores()
+        self.tmp.cleanup()
+
+    def test_search_to_file(self) -> None:
+        output = os.path.join(self.tmp.name, "result.json")
+        code = run_cli(["--data", self.path, "--output", output, "search", "колхоз"])
+        self.assertEqual(code, 0)
+        with open(output, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)[0]["category"], "Супермаркеты")
+
+    def test_bad_arguments_exit_code(self) -> None:
+        output = os.path.join(self.tmp.name, "result.json")
+        code = run_cli(["--data", self.path, "--output", output, "reports", "Транспорт", "2024-06-01"])
+        self.assertEqual(code, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
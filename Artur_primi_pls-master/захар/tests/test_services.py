@@ -1,4 +1,6 @@
 import json
+import os
+import tempfile
 import unittest
 from typing import Any
 from unittest.mock import patch
@@ -6,7 +8,7 @@ from unittest.mock import patch
 import pandas as pd
 from pytest import fixture
 
-from src.services import get_keyword
+from src.services import get_keyword, search_many
 
 
 @patch("pandas.read_excel")
@@ -133,5 +135,45 @@ class TestGetTransactionsByKeyword(unittest.TestCase):
                 self.assertEqual(str(e), "Test exception")
 
 
+@patch("pandas.read_excel")
+def test_search_many(mock_read_excel: Any) -> None:
+    """
+    Проверяет, что search_many находит все запросы за один вызов и пишет один файл.
+    """
+    mock_data = [
+        {"description": "Обед в кафе", "category": "Фастфуд"},
+        {"description": "Такси", "category": "Транспорт"},
+        {"description": "Обеды", "category": "Фастфуд"},
+    ]
+    mock_read_excel.return_value = pd.DataFrame(mock_data)
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, "batch.json")
+        result = search_many(["обед", "Такси", "Фаст", "нет"], output_file)
+        with open(output_file, encoding="utf-8") as f:
+            assert json.load(f) == result
+    assert result["обед"] == {"count": 2, "transactions": [mock_data[0], mock_data[2]]}
+    assert result["Такси"] == {"count": 1, "transactions": [mock_data[1]]}
+    assert result["Фаст"]["count"] == 2
+    assert result["нет"] == {"count": 0, "transactions": []}
+
+
+@patch("pandas.read_excel")
+def test_fuzzy_keyword(mock_read_excel: Any) -> None:
+    """
+    Проверяет нечеткий поиск get_keyword: опечатка и другая форма слова, ранжирование и limit.
+    """
+    mock_data = [
+        {"description": "Обед в кафе", "category": "Фастфуд"},
+        {"description": "Магнит", "category": "Супермаркеты"},
+        {"description": "Обеды", "category": "Фастфуд"},
+    ]
+    mock_read_excel.return_value = pd.DataFrame(mock_data)
+    assert json.loads(get_keyword("Магнт")) == [{"message": "Слово не найдено ни где"}]
+    found = json.loads(get_keyword("Магнт", fuzzy=True))
+    assert [(item["description"], item["score"]) for item in found] == [("Магнит", 0.833)]
+    found = json.loads(get_keyword("обеды", fuzzy=True, stem=True, limit=1))
+    assert [item["description"] for item in found] == ["Обед в кафе"]
+
+
 if __name__ == "__main__":
     unittest.main()
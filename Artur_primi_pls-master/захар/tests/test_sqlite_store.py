@@ -0,0 +1,88 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.reports import filter_by_category_date
+from src.result_cache import QUERY_CACHE
+from src.services import category_expenses, find_transactions
+from src.sqlite_store import SqliteStore, build_database, main_sqlite
+from src.store import clear_stores, get_store, normalize_operations
+
+OPERATIONS = pd.DataFrame(
+    {
+        "date_operation": ["05.06.2024 11:04:40", "04.06.2024 09:00:00", "01.05.2024 10:00:00", "02.02.2024 10:00:00"],
+        "data_payment": ["05.06.2024", "04.06.2024", "01.05.2024", None],
+        "card_number": ["*7197", "*1111", None, "*7197"],
+        "status": ["OK", "OK", "OK", "FAILED"],
+        "transaction_amount": [-160.89, -28.0, -250.0, -99.0],
+        "payment_amount": [-160.89, -28.0, -250.0, -99.0],
+        "category": ["Супермаркеты", "Транспорт", "Супермаркеты", "Супермаркеты"],
+        "description": ["Колхоз", "Метро Санкт-Петербург", "Магнит", "Ёлки 100%"],
+    }
+)
+
+
+class TestSqliteStore(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_stores()
+        QUERY_CACHE.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, "operations.csv")
+        self.db_path = os.path.join(self.tmp.name, "operations.db")
+        OPERATIONS.to_csv(self.csv_path, index=False)
+        build_database(self.db_path, self.csv_path)
+
+    def tearDown(self) -> None:
+        clear_stores()
+        QUERY_CACHE.clear()
+        self.tmp.cleanup()
+
+    def test_schema_and_indexes(self) -> None:
+        connection = sqlite3.connect(self.db_path)
+        names = {row[0] for row in connection.execute("SELECT name FROM sqlite_master")}
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(operations)")]
+        first = connection.execute("SELECT date_operation, data_payment FROM operations ORDER BY id").fetchone()
+        connection.close()
+        self.assertTrue({"operations", "texts_fts", "idx_category_payment", "idx_card"} <= names)
+        self.assertEqual(columns[2:5], ["date_operation", "data_payment", "card_number"])
+        self.assertEqual(first, ("2024-06-05T11:04:40", "2024-06-05"))
+
+    def test_same_answers_as_memory(self) -> None:
+        store = get_store(self.db_path)
+        memory = get_store(self.csv_path)
+        self.assertIsInstance(store, SqliteStore)
+        for query in ["магнит", "ЕЛКИ", "0%", "супер", "нет такого"]:
+            self.assertEqual(
+                json.dumps(find_transactions(query, self.db_path)), json.dumps(find_transactions(query, self.csv_path))
+            )
+        for args in [("Супермаркеты", "2024-06-30"), ("Транспорт", "2024-06-04"), ("Фастфуд", None)]:
+            expected = category_expenses(memory.frame, *args)["total_expenses"]
+            self.assertAlmostEqual(category_expenses(store, *args)["total_expenses"], expected)
+        self.assertEqual(
+            json.dumps(filter_by_category_date(store, "Супермаркеты", "01.05.2024")),
+            json.dumps(filter_by_category_date(memory.frame, "Супермаркеты", "01.05.2024")),
+        )
+        self.assertEqual(store.category_total("Супермаркеты", "spent"), 509.89)
+        # все ответы получены запросами к базе, таблица целиком не читалась
+        self.assertIsNone(store._frame)
+        pd.testing.assert_frame_equal(store.frame[memory.frame.columns], memory.frame)
+
+    def test_append_and_cli(self) -> None:
+        store = get_store(self.db_path)
+        version = store.version
+        store.append(normalize_operations(OPERATIONS.iloc[:1].assign(description="Пятерочка")))
+        self.assertNotEqual(store.version, version)
+        self.assertEqual(len(store), 5)
+        self.assertEqual(len(store.search("пятерочка")), 1)
+        main_sqlite([self.csv_path, os.path.join(self.tmp.name, "copy.sqlite")])
+        self.assertEqual(len(get_store(os.path.join(self.tmp.name, "copy.sqlite"))), 4)
+        with self.assertRaises(FileNotFoundError):
+            get_store(os.path.join(self.tmp.name, "нет.db"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# модули, которые не должны грузиться при импорте: только при первом обращении к рынку или .env
+LAZY_MODULES = ["yfinance", "requests", "dotenv"]
+# бюджет времени импорта, мкс (python -X importtime, cumulative); основная часть - pandas
+IMPORT_BUDGETS = {
+    "src.main": 100_000,
+    "src.views": 1_500_000,
+    "src.services": 1_500_000,
+    "src.reports": 1_500_000,
+    "src.server": 1_500_000,
+}
+
+
+def import_times(module: str, cwd: str = ROOT) -> Dict[str, int]:
+    """
+    Импортирует module в отдельном процессе с -X importtime и возвращает имя модуля -> cumulative, мкс.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:") :].split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", list(IMPORT_BUDGETS))
+def test_import_budget(module: str) -> None:
+    times = import_times(module)
+    loaded = [name for name in LAZY_MODULES if name in times]
+    assert loaded == [], f"{module} при импорте грузит {loaded}"
+    assert times[module] <= IMPORT_BUDGETS[module], f"{module}: {times[module]} мкс"
+
+
+def test_import_has_no_side_effects() -> None:
+    # импорт не пишет лог и не читает .env - это делает init_app при запуске
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, ".env"), "w") as f:
+            f.write("api_key=from_env_file\n")
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        env.pop("api_key", None)
+        code = "import os, src.main, src.views, src.services, src.reports; print(os.getenv('api_key'))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=tmp, env=env, capture_output=True, text=True)
+        assert result.stdout.strip() == "None"
+        assert not os.path.exists(os.path.join(tmp, "utils_log.txt"))
+
+
+def test_help_does_not_load_pandas() -> None:
+    # --help отвечает до init_app и до импорта модулей с pandas
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "src.main", "--help"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    loaded = {line.split("|")[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+    assert "pandas" not in loaded
+    assert "src.store" not in loaded
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from typing import Any
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.store import clear_stores, combine_operations, get_store, normalize_operations, resolve_sources, to_records
+
+RAW = pd.DataFrame(
+    {
+        "date_operation": ["05.06.2024 11:04:40", "04.06.2024 09:00:00"],
+        "data_payment": ["05.06.2024", None],
+        "card_number": [None, "*1111"],
+        "status": ["OK", "FAILED"],
+        "transaction_amount": [-14.78, -28],
+        "category": ["Услуги банка", "Транспорт"],
+        "description": ["Плата за оповещения", "Метро"],
+        "bonuses_including_cashback": [0, 3],
+    }
+)
+
+
+class TestNormalizeOperations(unittest.TestCase):
+    def test_types(self) -> None:
+        frame = normalize_operations(RAW)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(frame["date_operation"]))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(frame["data_payment"]))
+        self.assertIsInstance(frame["category"].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(frame["card_number"].dtype, pd.CategoricalDtype)
+        self.assertEqual(frame["transaction_amount"].dtype, "float64")
+        self.assertEqual(frame["bonuses_including_cashback"].dtype, "float64")
+
+    def test_records_keep_old_format(self) -> None:
+        records = to_records(normalize_operations(RAW))
+        self.assertEqual(records[0]["date_operation"], "05.06.2024 11:04:40")
+        self.assertEqual(records[0]["data_payment"], "05.06.2024")
+        self.assertTrue(pd.isna(records[1]["data_payment"]))
+        self.assertEqual(records[1]["card_number"], "*1111")
+
+
+class TestGetStore(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_stores()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "operations.xls")
+        with open(self.path, "wb") as f:
+            f.write(b"xls")
+
+    def tearDown(self) -> None:
+        clear_stores()
+        self.tmp.cleanup()
+
+    @patch("pandas.read_excel")
+    def test_parsed_once(self, mock_read_excel: Any) -> None:
+        mock_read_excel.return_value = RAW
+        first = get_store(self.path)
+        second = get_store(self.path)
+        self.assertIs(first, second)
+        mock_read_excel.assert_called_once()
+
+    @patch("pandas.read_excel")
+    def test_reparsed_after_change(self, mock_read_excel: Any) -> None:
+        mock_read_excel.return_value = RAW
+        get_store(self.path)
+        with open(self.path, "ab") as f:
+            f.write(b"more")
+        get_store(self.path)
+        self.assertEqual(mock_read_excel.call_count, 2)
+
+
+class TestMultiSource(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_stores()
+        self.tmp = tempfile.TemporaryDirectory()
+        # майская и июньская выписки пересекаются одной операцией
+        RAW.iloc[[1, 0]].to_csv(os.path.join(self.tmp.name, "may.csv"), index=False)
+        RAW.iloc[[0]].to_csv(os.path.join(self.tmp.name, "june.csv"), index=False)
+        with open(os.path.join(self.tmp.name, "notes.txt"), "w") as f:
+            f.write("не выписка")
+
+    def tearDown(self) -> None:
+        clear_stores()
+        self.tmp.cleanup()
+
+    def test_resolve_sources(self) -> None:
+        names = [os.path.basename(path) for path in resolve_sources(self.tmp.name)]
+        self.assertEqual(names, ["june.csv", "may.csv"])
+        pattern = os.path.join(self.tmp.name, "m*.csv")
+        self.assertEqual([os.path.basename(path) for path in resolve_sources(pattern)], ["may.csv"])
+        self.assertEqual(resolve_sources("operations.xls"), ["operations.xls"])
+
+    def test_directory_merged_and_deduplicated(self) -> None:
+        store = get_store(self.tmp.name, workers=2)
+        records = store.records()
+        self.assertEqual(len(records), 2)
+        self.assertEqual([os.path.basename(record["source_file"]) for record in records], ["june.csv", "may.csv"])
+        self.assertEqual({record["description"] for record in records}, {"Плата за оповещения", "Метро"})
+        self.assertIs(get_store(self.tmp.name), store)
+
+    def test_missing_pattern(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            get_store(os.path.join(self.tmp.name, "*.xls"))
+
+    def test_repeats_inside_statement_kept(self) -> None:
+        frame = normalize_operations(RAW.iloc[[0, 0]])
+        combined = combine_operations([frame, normalize_operations(RAW.iloc[[0]])], ["a.xls", "b.xls"])
+        self.assertEqual(list(combined["source_file"]), ["a.xls", "a.xls"])
+
+
+if __name__ == "__main__":
+    unittest.main()
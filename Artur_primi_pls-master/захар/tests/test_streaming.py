@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+import pandas as pd
+
+from src.reports import filter_by_category_date
+from src.store import normalize_operations
+from src.streaming import (
+    iter_chunks,
+    stream_card_data,
+    stream_category_window,
+    stream_search,
+    stream_total_expenses,
+)
+from src.views import calcul_total_expen, proc_card_data
+
+RAW = pd.DataFrame(
+    {
+        "date_operation": [f"{day:02d}.01.2024 12:00:00" for day in range(1, 8)],
+        "data_payment": [f"{day:02d}.01.2024" for day in range(1, 8)],
+        "card_number": ["*1111", "*2222", None, "*1111", "*2222", "*1111", "*3333"],
+        "transaction_amount": [-100.15, -20.0, 300.0, -0.25, -7.5, 50.0, -1.05],
+        "payment_amount": [-100.15, -20.0, 300.0, -0.25, -7.5, 50.0, -1.05],
+        "category": ["Еда", "Такси", "Переводы", "Еда", "Еда", "Бонусы", "Еда"],
+        "description": ["Пятёрочка", "Яндекс Такси", "Илья", "Магнит", "Пятерочка", "Кешбэк", "Метро"],
+        "bonuses_including_cashback": [1, 0, 0, 0, 0, 50, 0],
+    }
+)
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, "operations.csv")
+        self.xlsx_path = os.path.join(self.tmp.name, "operations.xlsx")
+        RAW.to_csv(self.csv_path, index=False)
+        RAW.to_excel(self.xlsx_path, index=False)
+        self.frame = normalize_operations(RAW)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_chunk_sizes(self) -> None:
+        for path in [self.csv_path, self.xlsx_path]:
+            self.assertEqual([len(chunk) for chunk in iter_chunks(path, 3)], [3, 3, 1])
+
+    def test_totals_match_full_load(self) -> None:
+        for path in [self.csv_path, self.xlsx_path]:
+            self.assertEqual(stream_total_expenses(iter_chunks(path, 2)), calcul_total_expen(self.frame))
+            self.assertEqual(stream_card_data(iter_chunks(path, 2)), proc_card_data(self.frame))
+
+    def test_category_window(self) -> None:
+        result = stream_category_window(
+            iter_chunks(self.csv_path, 2), "Еда", datetime(2024, 1, 1), datetime(2024, 1, 5), include_end=False
+        )
+        self.assertEqual(result["transactions"], filter_by_category_date(self.frame, "Еда", "01.01.2024")[:2])
+        self.assertAlmostEqual(result["total_expenses"], -100.4)
+
+    def test_search(self) -> None:
+        found = list(stream_search(iter_chunks(self.xlsx_path, 2), "ПЯТЕР"))
+        self.assertEqual([item["description"] for item in found], ["Пятёрочка", "Пятерочка"])
+
+    def test_unknown_format(self) -> None:
+        with self.assertRaises(ValueError):
+            list(iter_chunks("operations.txt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
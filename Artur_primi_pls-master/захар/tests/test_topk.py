@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from src.topk import top_k, top_k_stream
+from src.views import top_transactions_5
+
+OPERATIONS = [
+    {"date_operation": "01.01.2024 10:00:00", "card_number": "*1111", "category": "Еда", "transaction_amount": -10.0},
+    {"date_operation": "02.01.2024 10:00:00", "card_number": "*2222", "category": "Еда", "transaction_amount": 50.0},
+    {"date_operation": "03.02.2024 10:00:00", "card_number": "*1111", "category": "Такси", "transaction_amount": 50.0},
+    {"date_operation": "04.02.2024 10:00:00", "card_number": None, "category": "Такси", "transaction_amount": 70.0},
+    {"date_operation": "05.02.2024 10:00:00", "card_number": "*2222", "category": "Еда", "transaction_amount": -5.0},
+]
+
+
+def test_top_transactions_5_does_not_mutate() -> None:
+    transactions = list(OPERATIONS)
+    result = top_transactions_5(transactions)
+    assert transactions == OPERATIONS
+    assert [item["transaction_amount"] for item in result] == [70.0, 50.0, 50.0, -5.0, -10.0]
+
+
+def test_ties_keep_original_order() -> None:
+    assert top_k(OPERATIONS, 2) == [OPERATIONS[3], OPERATIONS[1]]
+
+
+@pytest.mark.parametrize(
+    "by, expected",
+    [
+        ("category", {"Еда": [1, 4], "Такси": [3, 2]}),
+        ("card", {"1111": [2, 0], "2222": [1, 4]}),
+        ("month", {"2024-01": [1, 0], "2024-02": [3, 2]}),
+    ],
+)
+def test_grouped(by: str, expected: dict) -> None:
+    result = top_k(OPERATIONS, 2, by=by)
+    assert result == {group: [OPERATIONS[i] for i in rows] for group, rows in expected.items()}
+    assert top_k(pd.DataFrame(OPERATIONS), 2, by=by) == result
+
+
+def test_stream_matches_single_pass() -> None:
+    frame = pd.DataFrame(OPERATIONS)
+    chunks = [frame.iloc[:2], frame.iloc[2:3], frame.iloc[3:]]
+    assert top_k_stream(chunks, 3) == top_k(OPERATIONS, 3)
+    assert top_k_stream([OPERATIONS[:3], OPERATIONS[3:]], 1, by="card") == top_k(OPERATIONS, 1, by="card")
+
+
+def test_unknown_group() -> None:
+    with pytest.raises(ValueError):
+        top_k(OPERATIONS, 1, by="weekday")
@@ -5,7 +5,8 @@ from unittest.mock import Mock, patch
 import pandas as pd
 import pytest
 
-from src.views import calcul_total_expen, get_greet, get_stoc_cur, proc_card_data, read_xlsx, top_transactions_5
+from src.utils import read_xlsx
+from src.views import calcul_total_expen, get_greet, get_stoc_cur, proc_card_data, top_transactions_5
 
 
 @pytest.mark.parametrize(
@@ -137,5 +138,19 @@ def test_process_card_data() -> None:
     assert proc_card_data(operations) == expected_result
 
 
+def test_dataframe_matches_list() -> None:
+    """Векторные расчеты по таблице совпадают с расчетами по списку словарей."""
+    operations = pd.DataFrame(
+        {
+            "card_number": ["*1234", "*5678", "*1234", None, "*5678", "*1234"],
+            "transaction_amount": [-0.15, -50.05, 200.0, -75.0, -0.1, -2.675],
+            "bonuses_including_cashback": [1.0, 0.0, 3.0, 0.0, 2.0, 0.0],
+        }
+    )
+    records = operations.to_dict("records")
+    assert calcul_total_expen(operations) == calcul_total_expen(records)
+    assert proc_card_data(operations) == proc_card_data(records)
+
+
 if __name__ == "__main__":
     unittest.main()